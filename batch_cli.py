@@ -0,0 +1,238 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from batching import DEFAULT_CONTEXT_TOKENS
+from bm25_index import DEFAULT_BM25_DIR
+from cascade import DEFAULT_CALIBRATION_PATH
+from classification_index import DEFAULT_CLASSIFICATION_DIR
+from ensemble import (
+    DEFAULT_KEEP_ALIVE, DEFAULT_MODELS, DEFAULT_PARALLEL_MODELS, VOTE_METHODS, parse_model_weights
+)
+from ingest import SUPPORTED_EXTENSIONS
+from llm_engine import DEFAULT_MAX_CONCURRENCY
+from pdf_ingest import DEFAULT_PDF_CACHE_PATH, PDF_CHUNK_FILES, PDF_EXTENSIONS, PdfTextCache
+from pipeline import PatentPipeline, iter_pdf_rows, load_rows
+from result_store import DEFAULT_RESULT_MAX_AGE
+from vector_index import DEFAULT_INDEX_DIR, DEFAULT_TOP_K
+
+
+def collect_workbooks(inputs, extensions=SUPPORTED_EXTENSIONS):
+    """Sammelt Excel-Dateien und Lens-CSV-Exporte (bzw. extensions) aus Verzeichnissen, Glob-Mustern und Dateipfaden"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            candidates = [os.path.join(item, name) for name in sorted(os.listdir(item))]
+        else:
+            candidates = sorted(glob.glob(item)) or [item]
+        paths.extend(
+            path for path in candidates
+            if path.lower().endswith(extensions) and os.path.isfile(path)
+        )
+    # Doppelte Angaben nur einmal verarbeiten, Reihenfolge beibehalten
+    return list(dict.fromkeys(paths))
+
+
+def analyze_workbook(pipeline, file_path, rows, duplicates=None, sources=None, known_verdicts=None):
+    """Analysiert eine eingelesene Arbeitsmappe und liefert JSONL-Datensätze
+
+    Pro Datei steht zuerst ein Kopfdatensatz (type "file") mit Keywords und
+    Stand der Technik, danach je Patent ein Datensatz (type "patent").
+    sources (Zeilen-ID -> Datei) ersetzt file_path pro Zeile, z.B. für einen Block von PDFs.
+    known_verdicts enthält die Urteile früherer Blöcke für Duplikate über
+    Blockgrenzen und wird um die neuen Urteile ergänzt.
+    """
+    texts = dict(rows)
+    rows, batches = pipeline.prepare(rows, duplicates)
+    keywords, _, verdicts = pipeline.analyze(rows, batches, duplicates=duplicates, known_verdicts=known_verdicts)
+    if known_verdicts is not None:
+        known_verdicts.update(verdicts)
+    prior_art = [document["lens_id"] for document, _ in pipeline.prior_art(keywords)]
+    files = {}
+    for row_id in verdicts:
+        files.setdefault((sources or {}).get(row_id, file_path), []).append(row_id)
+    records = []
+    for path, row_ids in files.items():
+        records.append({"type": "file", "file": path, "keywords": keywords, "prior_art": prior_art})
+        records.extend(patent_record(path, row_id, verdicts[row_id], duplicates, texts[row_id]) for row_id in row_ids)
+    return records
+
+
+def patent_record(file_path, row_id, verdict, duplicates, text):
+    """JSONL-Datensatz eines Patents; ohne Bewertung sind die Urteilsfelder None"""
+    return {
+        "type": "patent",
+        "file": file_path,
+        "row_id": row_id,
+        "verdict": verdict["verdict"] if verdict else None,
+        "confidence": verdict["confidence"] if verdict else None,
+        "duplicate_of": (duplicates or {}).get(row_id),
+        "agreement": verdict.get("agreement") if verdict else None,
+        "votes": verdict.get("votes") if verdict else None,
+        "from_store": bool(verdict and verdict.get("from_store")),
+        "stage": verdict.get("stage") if verdict else None,
+        "row": text,
+    }
+
+
+def main(argv=None):
+    """Headless-Einstieg: screent viele Arbeitsmappen ohne GUI"""
+    parser = argparse.ArgumentParser(description="Patent Scanner ohne GUI für Massen-Screenings")
+    parser.add_argument("inputs", nargs="+",
+                        help="Verzeichnisse, Glob-Muster, Excel-Dateien, Lens-CSV-Exporte oder Patent-PDFs")
+    parser.add_argument("-o", "--output", default="results.jsonl", help="Ziel-Datei (JSONL)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Prozesse für Einlesen und Vorverarbeitung (auch PDF-Seitenbereiche)")
+    parser.add_argument("--pdf-cache", default=DEFAULT_PDF_CACHE_PATH,
+                        help="Cache des aus PDFs extrahierten Textes (pro Dateihash)")
+    parser.add_argument("--pdf-chunk", type=int, default=PDF_CHUNK_FILES,
+                        help="Gelesene PDFs pro Analyse-Block")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help="Gleichzeitige Ollama-Anfragen pro Endpunkt")
+    parser.add_argument("--hosts", nargs="+",
+                        help="Ollama-Endpunkte, auf die die Anfragen verteilt werden (Standard: OLLAMA_HOSTS)")
+    parser.add_argument("--context-tokens", type=int, default=DEFAULT_CONTEXT_TOKENS)
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--classification-dir", default=DEFAULT_CLASSIFICATION_DIR,
+                        help="CPC-/IPCR-Index für die Kandidatenauswahl")
+    parser.add_argument("--bm25-dir", default=DEFAULT_BM25_DIR,
+                        help="BM25-Index für die lokale Recherche mit den Keywords (bm25_index.py)")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--no-index", action="store_true",
+                        help="Referenzindizes nicht laden, Zeilen ohne Vergleichspatente bewerten")
+    parser.add_argument("--models", nargs="+", default=list(DEFAULT_MODELS),
+                        help="Ollama-Modelle des Ensembles; das erste liefert auch die Keywords")
+    parser.add_argument("--vote", choices=VOTE_METHODS, default="majority")
+    parser.add_argument("--weights", nargs="*", metavar="MODELL=GEWICHT",
+                        help="Stimmgewichte für --vote weighted, z.B. llama3=0.82")
+    parser.add_argument("--parallel-models", type=int, default=DEFAULT_PARALLEL_MODELS,
+                        help="Gleichzeitig geladene Modelle")
+    parser.add_argument("--keep-alive", default=DEFAULT_KEEP_ALIVE,
+                        help="Wie lange Ollama die Modelle geladen hält")
+    parser.add_argument("--no-cache", action="store_true", help="Antwort-Cache umgehen")
+    parser.add_argument("--no-cascade", action="store_true",
+                        help="Alle Zeilen vom Modell bewerten lassen, ohne Vorauswahl")
+    parser.add_argument("--band", nargs=2, type=float, metavar=("UNTEN", "OBEN"),
+                        help="Unsicherheitsband der Vorauswahl (Standard: aus --calibration)")
+    parser.add_argument("--calibration", default=DEFAULT_CALIBRATION_PATH,
+                        help="Modell-Wahrscheinlichkeiten, aus denen das Band abgeleitet wird")
+    parser.add_argument("--full", action="store_true",
+                        help="Gespeicherte Bewertungen ignorieren und alle Zeilen neu bewerten")
+    parser.add_argument("--result-max-days", type=float, default=DEFAULT_RESULT_MAX_AGE / 86400,
+                        help="Gespeicherte Bewertungen nach so vielen Tagen ohne Nutzung verwerfen")
+    parser.add_argument("--metrics-csv", help="Aufruf-Metriken als CSV speichern")
+    parser.add_argument("--metrics-prom", help="Metriken im Prometheus-Textformat speichern")
+    args = parser.parse_args(argv)
+
+    workbooks = collect_workbooks(args.inputs)
+    pdfs = collect_workbooks(args.inputs, PDF_EXTENSIONS)
+    if not workbooks and not pdfs:
+        print("Keine Excel-, CSV- oder PDF-Dateien gefunden", file=sys.stderr)
+        return 1
+
+    pipeline = PatentPipeline(
+        context_tokens=args.context_tokens,
+        max_concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        index_dir=args.index_dir,
+        top_k=args.top_k,
+        classification_dir=args.classification_dir,
+        bm25_dir=args.bm25_dir,
+        hosts=args.hosts,
+        models=args.models,
+        vote=args.vote,
+        model_weights=parse_model_weights(args.weights),
+        parallel_models=args.parallel_models,
+        keep_alive=args.keep_alive,
+        incremental=not args.full,
+        result_max_age=args.result_max_days * 86400,
+        cascade=not args.no_cascade,
+        cascade_band=tuple(args.band) if args.band else None,
+        calibration_path=args.calibration,
+        use_index=not args.no_index,
+        on_status=lambda message: print(message, file=sys.stderr)
+    )
+
+    started = time.perf_counter()
+    failures = 0
+    records = 0
+    # Patente ohne Bewertung (Antwort fehlt oder war ungültig) zählen als Fehlschlag
+    unrated = 0
+
+    def report_pdf_error(path, error):
+        nonlocal failures
+        failures += 1
+        print(f"Fehler bei {path}: {error}", file=sys.stderr)
+
+    def write(label, results):
+        nonlocal records, unrated
+        for record in results:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        patents = [record for record in results if record["type"] == "patent"]
+        missing = sum(record["verdict"] is None for record in patents)
+        records += len(patents)
+        unrated += missing
+        print(f"{'⚠️' if missing else '✅'} {label}: {len(patents)} Patente, {missing} ohne Bewertung, "
+              f"{pipeline.last_stored} aus früheren Analysen, "
+              f"{pipeline.last_screened} durch die Vorauswahl", file=sys.stderr)
+        if pipeline.last_agreement is not None:
+            print(f"   Übereinstimmung der Modelle: {pipeline.last_agreement['mean_agreement']:.0%}, "
+                  f"einstimmig: {pipeline.last_agreement['unanimous']:.0%}", file=sys.stderr)
+
+    # Einlesen läuft im Prozesspool, die LLM-Stufe startet mit der ersten fertigen Datei
+    with ProcessPoolExecutor(max_workers=args.workers) as pool, \
+            open(args.output, "w", encoding="utf-8") as out:
+        futures = {pool.submit(load_rows, path): path for path in workbooks}
+        # PDFs werden seitenbereichsweise im selben Pool gelesen, während die Arbeitsmappen laufen
+        pdf_chunks = iter_pdf_rows(
+            pdfs, pool, PdfTextCache(args.pdf_cache), args.pdf_chunk, on_error=report_pdf_error
+        ) if pdfs else ()
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                results = analyze_workbook(pipeline, path, *future.result())
+            except Exception as e:
+                failures += 1
+                print(f"Fehler bei {path}: {e}", file=sys.stderr)
+                continue
+            write(path, results)
+        done = 0
+        pdf_verdicts = {}
+        for rows, duplicates, sources in pdf_chunks:
+            try:
+                results = analyze_workbook(pipeline, None, rows, duplicates, sources, pdf_verdicts)
+            except Exception as e:
+                failures += len(sources)
+                print(f"Fehler bei {len(sources)} PDFs: {e}", file=sys.stderr)
+                continue
+            done += len(sources)
+            write(f"PDFs {done}/{len(pdfs)}", results)
+
+    if len(pipeline.engine.pool) > 1:
+        throughput = pipeline.telemetry.summary()["endpoints"]
+        for endpoint in pipeline.engine.pool.stats():
+            entry = throughput.get(endpoint["endpoint"], {"calls": 0, "tokens_per_second": 0.0})
+            print(f"   {endpoint['endpoint']}: {entry['calls']} Aufrufe, "
+                  f"{entry['tokens_per_second']:.1f} tok/s, {endpoint['failures']} Ausfälle"
+                  f"{'' if endpoint['healthy'] else ' (nicht erreichbar)'}", file=sys.stderr)
+
+    if args.metrics_csv:
+        pipeline.telemetry.export_csv(args.metrics_csv)
+    if args.metrics_prom:
+        pipeline.telemetry.export_prometheus(args.metrics_prom)
+
+    print(
+        f"{len(workbooks) + len(pdfs) - failures}/{len(workbooks) + len(pdfs)} Dateien, {records} Patente "
+        f"({unrated} ohne Bewertung) in {time.perf_counter() - started:.1f} s -> {args.output}",
+        file=sys.stderr
+    )
+    return 1 if failures or unrated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
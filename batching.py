@@ -0,0 +1,110 @@
+import math
+import re
+
+# Kontextfenster von llama3 in Ollama (siehe prompt_eval_count in Test1.json)
+DEFAULT_CONTEXT_TOKENS = 4096
+# Reserve für die Antwort des Modells
+RESERVED_OUTPUT_TOKENS = 512
+
+# Wörter, Zahlen und einzelne Sonderzeichen
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+|\d+|[^\w\s]|_", re.UNICODE)
+
+
+def count_tokens(text):
+    """Schätzt die Anzahl der Tokens eines Textes (konservativ für BPE-Tokenizer)"""
+    total = 0
+    for piece in _TOKEN_PATTERN.findall(str(text)):
+        if piece.isdigit():
+            # Llama3 zerlegt Zahlen in Gruppen von bis zu drei Ziffern
+            total += math.ceil(len(piece) / 3)
+        elif len(piece) > 1:
+            total += math.ceil(len(piece) / 4)
+        else:
+            total += 1
+    return total
+
+
+def truncate_to_tokens(text, max_tokens):
+    """Kürzt einen Text so, dass er höchstens max_tokens Tokens umfasst"""
+    text = str(text)
+    if count_tokens(text) <= max_tokens:
+        return text
+    # Binäre Suche über die Zeichenlänge
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= max_tokens:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low]
+
+
+def row_to_text(row_id, row):
+    """Serialisiert eine Tabellenzeile kompakt als 'Spalte: Wert'-Liste"""
+    fields = []
+    for column, value in row.items():
+        # Leere Zellen (NaN/None) tragen keine Information
+        if value is None or value != value or str(value).strip() == "":
+            continue
+        fields.append(f"{column}: {str(value).strip()}")
+    return f"[{row_id}] " + " | ".join(fields)
+
+
+def batch_budget(prompt_template, context_tokens=DEFAULT_CONTEXT_TOKENS,
+                 reserved_output=RESERVED_OUTPUT_TOKENS):
+    """Berechnet das Token-Budget für Zeilen nach Abzug von Prompt und Antwort"""
+    overhead = count_tokens(prompt_template.format(content="", count=0))
+    budget = context_tokens - reserved_output - overhead
+    if budget <= 0:
+        raise ValueError(
+            f"Kontextbudget von {context_tokens} Tokens reicht nicht für den Prompt"
+        )
+    return budget
+
+
+def pack_rows(rows, budget, max_rows=None):
+    """Packt (Zeilen-ID, Text)-Paare in Batches, die jeweils ins Budget passen
+
+    Die Reihenfolge der Zeilen bleibt erhalten. Zeilen, die allein das Budget
+    überschreiten, werden gekürzt und bilden einen eigenen Batch. max_rows
+    begrenzt zusätzlich die Zeilen pro Batch (Platz für die Antwort).
+    """
+    batches = []
+    current = []
+    used = 0
+    for row_id, text in rows:
+        # +1 für den Zeilenumbruch zwischen den Zeilen
+        tokens = count_tokens(text) + 1
+        if tokens > budget:
+            text = truncate_to_tokens(text, budget - 1)
+            tokens = budget
+        full = max_rows is not None and len(current) >= max_rows
+        if current and (used + tokens > budget or full):
+            batches.append(current)
+            current = []
+            used = 0
+        current.append((row_id, text))
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_content(batch):
+    """Fügt die Zeilentexte eines Batches zum Prompt-Inhalt zusammen"""
+    return "\n".join(text for _, text in batch)
+
+
+def merge_verdicts(batches, verdict_maps):
+    """Führt die Bewertungen der Batches in Zeilenreihenfolge zusammen
+
+    verdict_maps enthält pro Batch ein Dictionary Zeilen-ID -> Bewertung.
+    Liefert ein Dictionary über alle Zeilen; fehlt für eine Zeile eine
+    Bewertung, wird None eingetragen, fremde Zeilen-IDs werden verworfen.
+    """
+    merged = {}
+    for batch, verdicts in zip(batches, verdict_maps):
+        for row_id, _ in batch:
+            merged[row_id] = verdicts.get(row_id)
+    return dict(sorted(merged.items()))
@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Repository-Wurzel, damit die Module auch beim direkten Aufruf gefunden werden
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from batching import count_tokens, truncate_to_tokens  # noqa: E402
+from endpoint_pool import model_key  # noqa: E402
+
+DEFAULT_RECORDING = os.path.join(ROOT_DIR, "Test1.json")
+EMBEDDING_DIM = 64
+_ROW_ID_PATTERN = re.compile(r"^\[(\d+)\] ", re.MULTILINE)
+
+
+def load_recording(path=DEFAULT_RECORDING):
+    """Lädt eine aufgezeichnete Ollama-Antwort (auch doppelt kodiertes JSON)"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, str):
+        data = json.loads(data)
+    return data
+
+
+class MockOllamaServer:
+    """Lokaler Ersatz für einen Ollama-Server, der aufgezeichnete Antworten abspielt
+
+    Die Antwortzeit folgt den Token-Raten der Aufzeichnung (oder den
+    angegebenen Raten), skaliert mit time_scale. parallel begrenzt wie
+    OLLAMA_NUM_PARALLEL die gleichzeitig bearbeiteten Anfragen. Mit
+    fail_after fällt der Server nach so vielen POST-Anfragen aus und trennt
+    jede weitere Verbindung ohne Antwort.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, recording=DEFAULT_RECORDING,
+                 prompt_rate=None, eval_rate=None, latency=0.0, load_seconds=0.0,
+                 time_scale=1.0, parallel=1, fail_after=None):
+        self.recording = load_recording(recording)
+        rec = self.recording
+        # Raten in Tokens pro Sekunde, standardmäßig aus der Aufzeichnung
+        self.prompt_rate = prompt_rate or rec["prompt_eval_count"] / (rec["prompt_eval_duration"] / 1e9)
+        self.eval_rate = eval_rate or rec["eval_count"] / (rec["eval_duration"] / 1e9)
+        self.latency = latency
+        self.load_seconds = load_seconds
+        self.time_scale = time_scale
+        self.slots = threading.Semaphore(parallel)
+        self.loaded_models = set()
+        self.requests = 0
+        self.fail_after = fail_after
+        self.posts = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Startet den Server in einem Hintergrund-Thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Beendet den Server"""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sleep(self, seconds):
+        if seconds > 0 and self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _fails(self, post):
+        """Zählt eine Anfrage und prüft, ob der Server bereits ausgefallen ist"""
+        with self._lock:
+            self.posts += post
+            return self.fail_after is not None and self.posts > self.fail_after
+
+    def _load(self, model):
+        """Simuliert das Laden eines Modells beim ersten Aufruf"""
+        # Ollama meldet geladene Modelle mit Tag ("llama3" -> "llama3:latest")
+        model = model_key(model)
+        with self._lock:
+            self.requests += 1
+            first = model not in self.loaded_models
+            self.loaded_models.add(model)
+        return self.load_seconds if first else 0.0
+
+    def answer(self, request):
+        """Erzeugt den Antworttext zu einer generate-Anfrage"""
+        prompt = request.get("prompt", "")
+        if request.get("format"):
+            # Strukturierte Ausgabe: deterministische Urteile für alle Zeilen-IDs
+            verdicts = []
+            for row_id in _ROW_ID_PATTERN.findall(prompt):
+                digest = hashlib.sha256(f"{row_id}:{prompt[:200]}".encode()).digest()
+                verdicts.append({
+                    "row_id": int(row_id),
+                    "verdict": digest[0] % 2,
+                    "confidence": round(0.5 + digest[1] / 510, 3),
+                })
+            return json.dumps({"verdicts": verdicts})
+        if not prompt:
+            return ""
+        return self.recording["response"]
+
+    def generate(self, request):
+        """Liefert Metriken und Antwort; die Wartezeit simuliert die Inferenz"""
+        model = request.get("model", "")
+        options = request.get("options") or {}
+        num_ctx = options.get("num_ctx") or 2048
+        # Mit context liegt der Anfang schon im KV-Cache, ausgewertet werden nur neue Tokens
+        context = request.get("context") or []
+        prompt_tokens = min(count_tokens(request.get("prompt", "")), max(num_ctx - len(context), 0))
+        text = self.answer(request)
+        if options.get("num_predict"):
+            text = truncate_to_tokens(text, options["num_predict"])
+        eval_tokens = count_tokens(text)
+        load = self._load(model)
+        if request.get("keep_alive") in (0, "0", "0s"):
+            # Entladen wie bei Ollama: der nächste Aufruf lädt das Modell erneut
+            with self._lock:
+                self.loaded_models.discard(model_key(model))
+        prompt_seconds = prompt_tokens / self.prompt_rate
+        eval_seconds = eval_tokens / self.eval_rate
+        metrics = {
+            "model": model,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((self.latency + load + prompt_seconds + eval_seconds) * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": prompt_tokens,
+            "prompt_eval_duration": int(prompt_seconds * 1e9),
+            "eval_count": eval_tokens,
+            "eval_duration": int(eval_seconds * 1e9),
+            # Platzhalter-Token-IDs; die Länge entspricht dem Kontext nach der Antwort
+            "context": list(range(min(len(context) + prompt_tokens + eval_tokens, num_ctx))),
+        }
+        return text, metrics, self.latency + load + prompt_seconds, eval_seconds
+
+    def embed(self, request):
+        """Liefert deterministische Pseudo-Embeddings"""
+        inputs = request.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        load = self._load(request.get("model", ""))
+        tokens = sum(count_tokens(text) for text in inputs)
+        seconds = self.latency + load + tokens / self.prompt_rate
+        embeddings = []
+        for text in inputs:
+            digest = hashlib.sha256(text.encode("utf-8")).digest()
+            embeddings.append([(digest[i % len(digest)] - 128) / 128 for i in range(EMBEDDING_DIM)])
+        return {
+            "model": request.get("model", ""),
+            "embeddings": embeddings,
+            "total_duration": int(seconds * 1e9),
+            "load_duration": int(load * 1e9),
+            "prompt_eval_count": tokens,
+        }, seconds
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if server._fails(post=False):
+                    self.close_connection = True
+                elif self.path in ("/", "/api/version"):
+                    self._send_json({"version": "mock"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": m, "model": m} for m in sorted(server.loaded_models)]})
+                elif self.path == "/api/ps":
+                    self._send_json({"models": [{"name": m, "model": m} for m in sorted(server.loaded_models)]})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                request = self._read_json()
+                if server._fails(post=True):
+                    # Ausfall: Verbindung ohne Antwort schließen
+                    self.close_connection = True
+                elif self.path == "/api/generate":
+                    self._generate(request)
+                elif self.path == "/api/embed":
+                    with server.slots:
+                        payload, seconds = server.embed(request)
+                        server._sleep(seconds)
+                    self._send_json(payload)
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def _generate(self, request):
+                with server.slots:
+                    text, metrics, wait_seconds, eval_seconds = server.generate(request)
+                    server._sleep(wait_seconds)
+                    if not request.get("stream", True):
+                        server._sleep(eval_seconds)
+                        self._send_json({**metrics, "response": text})
+                        return
+
+                    # Streaming: ein NDJSON-Chunk pro Wortstück
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    pieces = re.findall(r"\S+\s*|\s+", text) or [""]
+                    for piece in pieces:
+                        server._sleep(eval_seconds / len(pieces))
+                        self._write_chunk({"model": metrics["model"], "created_at": metrics["created_at"],
+                                           "response": piece, "done": False})
+                    self._write_chunk({**metrics, "response": ""})
+                    self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, payload):
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def main():
+    """Startet einen Mock-Server im Vordergrund"""
+    parser = argparse.ArgumentParser(description="Lokaler Ollama-Ersatz mit aufgezeichneten Antworten")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--recording", default=DEFAULT_RECORDING)
+    parser.add_argument("--prompt-rate", type=float, help="Prompt-Tokens pro Sekunde")
+    parser.add_argument("--eval-rate", type=float, help="Generierte Tokens pro Sekunde")
+    parser.add_argument("--latency", type=float, default=0.0, help="Feste Zusatzlatenz (s)")
+    parser.add_argument("--load-seconds", type=float, default=0.0, help="Ladezeit beim ersten Aufruf")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Faktor für alle Wartezeiten")
+    parser.add_argument("--parallel", type=int, default=1, help="Gleichzeitig bearbeitete Anfragen")
+    args = parser.parse_args()
+
+    server = MockOllamaServer(
+        args.host, args.port, args.recording, args.prompt_rate, args.eval_rate,
+        args.latency, args.load_seconds, args.time_scale, args.parallel
+    )
+    print(f"Mock-Ollama läuft auf {server.url}")
+    server.start()
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+# Repository-Wurzel, damit die Pipeline-Module auch beim direkten Aufruf gefunden werden
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import pandas as pd  # noqa: E402
+
+from mock_ollama import MockOllamaServer  # noqa: E402
+from pipeline import PatentPipeline, load_rows  # noqa: E402
+
+DEFAULT_SOURCE = os.path.join(ROOT_DIR, "patentdb.csv")
+# POST-Anfragen, nach denen ein ausfallender Endpunkt die Verbindungen trennt
+DEFAULT_FAIL_AFTER = 2
+RESULT_COLUMNS = (
+    "rows", "context_tokens", "concurrency", "prefix_reuse", "endpoints", "dead_endpoints",
+    "failing_endpoints", "batches", "requests", "failed_requests",
+    "run_p50_s", "run_p95_s", "request_p50_s", "request_p95_s",
+    "rows_per_second", "prompt_tokens", "peak_memory_mb",
+)
+
+
+def percentile(values, fraction):
+    """Perzentil mit linearer Interpolation"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def synthetic_workbook(source_df, rows, seed=0):
+    """Vervielfacht einen Lens-Export auf die gewünschte Zeilenzahl
+
+    Jede Kopie erhält eigene Lens IDs und Familien sowie Abstracts mit
+    gemischter Wortfolge (gleiche Länge), damit die Duplikaterkennung sie
+    nicht zusammenfasst und jede Zeile wie im echten Lauf bewertet wird.
+    """
+    rng = random.Random(seed)
+    copies = []
+    for copy in range(-(-rows // len(source_df))):
+        df = source_df.copy()
+        if copy:
+            for column in ("Lens ID", "Simple Family Members"):
+                if column in df.columns:
+                    df[column] = df[column].map(
+                        lambda value: ";;".join(f"{member}-{copy}" for member in value.split(";;") if member)
+                    )
+            if "Abstract" in df.columns:
+                df["Abstract"] = df["Abstract"].map(lambda text: " ".join(rng.sample(text.split(), len(text.split()))))
+        copies.append(df)
+    return pd.concat(copies, ignore_index=True).head(rows)
+
+
+def dead_host():
+    """URL eines geschlossenen lokalen Ports; Anfragen scheitern sofort mit Verbindungsfehler"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def run_case(hosts, workbook, context_tokens, concurrency, repeats, prefix_reuse=True, dead_endpoints=0,
+             failing_endpoints=0, fail_after=DEFAULT_FAIL_AFTER, server_options=None):
+    """Misst einen Parametersatz über mehrere Wiederholungen
+
+    workbook wird wie in der Anwendung mit load_rows eingelesen (Projektion
+    und Duplikatsuche zählen zur Laufzeit). hosts sind die erreichbaren Endpunkte; dead_endpoints weitere, nicht
+    erreichbare werden vorangestellt, damit der Pool auf sie ausweichen muss.
+    failing_endpoints frische Mock-Server (mit server_options) fallen pro
+    Wiederholung nach fail_after Anfragen mitten im Lauf aus; ihre Anfragen
+    müssen auf anderen Endpunkten wiederholt werden, sonst bricht der Fall
+    mit RuntimeError ab.
+    """
+    hosts = [dead_host() for _ in range(dead_endpoints)] + list(hosts)
+    run_seconds = []
+    request_seconds = []
+    peak_bytes = 0
+    batches = []
+    rows = []
+    requests = 0
+    prompt_tokens = 0
+    failed_requests = 0
+    # Ergebnis-Speicher nur für diesen Fall, damit keine Wiederholung gespeicherte Urteile übernimmt
+    store_dir = tempfile.TemporaryDirectory()
+    for _ in range(repeats):
+        failing = [
+            MockOllamaServer(fail_after=fail_after, **(server_options or {})).start()
+            for _ in range(failing_endpoints)
+        ]
+        # Frische Pipeline ohne Cache, ohne gespeicherte Urteile und ohne Vorauswahl-Index:
+        # jede Wiederholung zählt voll
+        pipeline = PatentPipeline(
+            context_tokens=context_tokens, max_concurrency=concurrency,
+            use_cache=False, use_index=False,
+            hosts=hosts + [server.url for server in failing], reuse_prefix=prefix_reuse, incremental=False,
+            result_path=os.path.join(store_dir.name, "verdicts.sqlite")
+        )
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows, duplicates = load_rows(workbook)
+        prepared, batches = pipeline.prepare(rows, duplicates)
+        _, _, verdicts = pipeline.analyze(prepared, batches, duplicates=duplicates)
+        run_seconds.append(time.perf_counter() - started)
+        peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        summary = pipeline.telemetry.summary()
+        requests = summary["calls"]
+        prompt_tokens = summary["prompt_tokens"]
+        request_seconds.extend(call["queue_seconds"] + call["wall_seconds"] for call in pipeline.telemetry.recent)
+        failed_requests = sum(endpoint["failures"] for endpoint in pipeline.engine.pool.stats())
+        pipeline.results.close()
+        for server in failing:
+            server.stop()
+        if failing:
+            missing = [row_id for row_id, verdict in verdicts.items() if verdict is None]
+            # Bei wenigen Batches erreicht kein ausfallender Server seine Schwelle
+            failed_over = any(server.posts > fail_after for server in failing)
+            if failed_over and not failed_requests or missing:
+                raise RuntimeError(
+                    f"Failover fehlgeschlagen: {failed_requests} Ausfälle erkannt, "
+                    f"{len(missing)} Zeilen ohne Bewertung"
+                )
+    store_dir.cleanup()
+
+    return {
+        "rows": len(rows),
+        "context_tokens": context_tokens,
+        "concurrency": concurrency,
+        "prefix_reuse": "on" if prefix_reuse else "off",
+        "endpoints": len(hosts) - dead_endpoints,
+        "dead_endpoints": dead_endpoints,
+        "failing_endpoints": failing_endpoints,
+        "batches": len(batches),
+        "requests": requests,
+        "failed_requests": failed_requests,
+        "run_p50_s": percentile(run_seconds, 0.5),
+        "run_p95_s": percentile(run_seconds, 0.95),
+        "request_p50_s": percentile(request_seconds, 0.5),
+        "request_p95_s": percentile(request_seconds, 0.95),
+        "rows_per_second": len(rows) / statistics.median(run_seconds),
+        "prompt_tokens": prompt_tokens,
+        "peak_memory_mb": peak_bytes / 2 ** 20,
+    }
+
+
+def print_table(results):
+    """Gibt die Ergebnisse als Tabelle aus"""
+    header = " ".join(f"{column:>15}" for column in RESULT_COLUMNS)
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(" ".join(
+            f"{result[c]:>15.3f}" if isinstance(result[c], float) else f"{result[c]:>15}"
+            for c in RESULT_COLUMNS
+        ))
+
+
+def main(argv=None):
+    """Führt den Parameter-Sweep gegen einen lokalen Mock-Ollama aus"""
+    parser = argparse.ArgumentParser(description="Durchsatz- und Latenz-Benchmark der Analyse-Pipeline")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Lens-Export als Zeilenquelle")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--context-tokens", type=int, nargs="+", default=[2048, 4096, 8192])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--prefix-reuse", nargs="+", choices=("on", "off"), default=["on", "off"],
+                        help="Prompt-Anfang per context wiederverwenden")
+    parser.add_argument("--endpoints", type=int, nargs="+", default=[1],
+                        help="Anzahl erreichbarer Mock-Server, auf die der Pool verteilt")
+    parser.add_argument("--dead-endpoints", type=int, nargs="+", default=[0],
+                        help="Zusätzliche nicht erreichbare Endpunkte (Failover)")
+    parser.add_argument("--failing-endpoints", type=int, nargs="+", default=[0],
+                        help="Zusätzliche Endpunkte, die mitten im Lauf ausfallen")
+    parser.add_argument("--fail-after", type=int, default=DEFAULT_FAIL_AFTER,
+                        help="Anfragen bis zum Ausfall eines ausfallenden Endpunkts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--parallel", type=int, default=4, help="Parallele Slots des Mock-Servers")
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Skaliert die simulierten Inferenzzeiten (1.0 = Echtzeit)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Feste Zusatzlatenz pro Anfrage (s)")
+    parser.add_argument("-o", "--output", help="Ergebnisse zusätzlich als CSV speichern")
+    args = parser.parse_args(argv)
+
+    source_df = pd.read_csv(args.source, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    workbook_dir = tempfile.TemporaryDirectory()
+    results = []
+    server_options = {"parallel": args.parallel, "time_scale": args.time_scale, "latency": args.latency}
+    with ExitStack() as stack:
+        servers = [
+            stack.enter_context(MockOllamaServer(**server_options))
+            for _ in range(max(args.endpoints))
+        ]
+        for rows, context_tokens, concurrency, prefix_reuse, endpoints, dead_endpoints, failing_endpoints in (
+                itertools.product(args.rows, args.context_tokens, args.concurrency, args.prefix_reuse,
+                                  args.endpoints, args.dead_endpoints, args.failing_endpoints)):
+            workbook = os.path.join(workbook_dir.name, f"patente_{rows}.csv")
+            if not os.path.exists(workbook):
+                synthetic_workbook(source_df, rows).to_csv(workbook, index=False, encoding="utf-8")
+            hosts = [server.url for server in servers[:endpoints]]
+            results.append(run_case(hosts, workbook, context_tokens, concurrency, args.repeats,
+                                    prefix_reuse == "on", dead_endpoints, failing_endpoints,
+                                    args.fail_after, server_options))
+            print(f"rows={rows} context_tokens={context_tokens} concurrency={concurrency} "
+                  f"prefix_reuse={prefix_reuse} endpoints={endpoints} dead_endpoints={dead_endpoints} "
+                  f"failing_endpoints={failing_endpoints}: {results[-1]['run_p50_s']:.2f} s", file=sys.stderr)
+
+    workbook_dir.cleanup()
+
+    print_table(results)
+    if args.output:
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=RESULT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
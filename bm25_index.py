@@ -0,0 +1,450 @@
+import argparse
+import json
+import math
+import os
+import re
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+
+from classification_index import DEPTHS, classification_prefix, extract_codes
+from patent_store import PatentStore, split_values
+
+DEFAULT_BM25_DIR = "bm25_index"
+# Gewicht der Felder bei Termfrequenz und Dokumentlänge (vereinfachtes BM25F)
+FIELD_WEIGHTS = {"Title": 3, "Abstract": 1, "CPC Classifications": 2}
+# Spalten, die zusätzlich gespeichert werden, um Treffer anzuzeigen
+DOCUMENT_COLUMNS = ("Lens ID", "Display Key", "Title")
+BM25_K1 = 1.2
+BM25_B = 0.75
+PRIOR_ART_HITS = 10
+# Ab so vielen Segmenten werden sie beim Hinzufügen zusammengeführt
+MAX_SEGMENTS = 8
+# Termfrequenzen werden als uint8 gespeichert
+MAX_TERM_FREQUENCY = 255
+# Zeilen pro CSV-Block beim Indexieren; jeder Block wird ein Segment
+INDEX_CHUNK_ROWS = 50000
+
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or the this to with "
+    "here some keywords keyword search database patents patent like".split()
+)
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Trennt die Klauseln einer Suchanfrage: "A OR B OR C" oder Komma-/Zeilenlisten
+_CLAUSE_PATTERN = re.compile(r"\s+OR\s+|[,;\n]")
+_TERMS_FILE = "terms.json"
+_TERM_OFFSETS_FILE = "term_offsets.npy"
+_DOC_FREQS_FILE = "doc_freqs.npy"
+_POSTINGS_FILE = "postings.npy"
+_TERM_FREQS_FILE = "term_freqs.npy"
+_DOC_LENGTHS_FILE = "doc_lengths.npy"
+_DOCUMENTS_FILE = "documents.json"
+_META_FILE = "metadata.json"
+
+
+def _varint_sizes(values):
+    """Bytes pro Wert in der Varint-Kodierung"""
+    sizes = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        sizes += values >= (1 << shift)
+    return sizes
+
+
+def encode_varints(values):
+    """Kodiert nichtnegative Ganzzahlen als Varints (7 Bit pro Byte, oberstes Bit: es folgen weitere)"""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = _varint_sizes(values)
+    owners = np.repeat(np.arange(len(values)), sizes)
+    byte_index = np.arange(int(sizes.sum())) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+    data = ((values[owners] >> (7 * byte_index).astype(np.uint64)) & 0x7F).astype(np.uint8)
+    data[byte_index < np.repeat(sizes - 1, sizes)] |= 0x80
+    return data
+
+
+def decode_varints(data):
+    """Dekodiert eine Folge von Varints"""
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    byte_index = np.arange(len(data)) - np.repeat(starts, ends - starts + 1)
+    parts = (data & 0x7F).astype(np.uint64) << (7 * byte_index).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+def tokenize(text):
+    """Zerlegt einen Text in kleingeschriebene Wörter ohne Stoppwörter"""
+    return [word for word in _WORD_PATTERN.findall(str(text).lower()) if word not in STOPWORDS]
+
+
+def code_terms(code):
+    """Terme eines Klassifikationscodes in allen Präfixtiefen, z.B. g01n, g01n27, g01n27/404"""
+    return [prefix.lower() for depth in DEPTHS if (prefix := classification_prefix(code, depth))]
+
+
+def parse_query(query):
+    """Zerlegt eine Suchanfrage wie extract_keywords_from_ollama_response sie erzeugt
+
+    Die Klauseln von "A OR B OR C" (oder einer Komma-Liste) werden in Terme
+    zerlegt; Klassifikationscodes ergeben ihre Präfix-Terme. Liefert die
+    eindeutigen Terme in Reihenfolge.
+    """
+    terms = []
+    for clause in _CLAUSE_PATTERN.split(str(query)):
+        clause = clause.strip().strip("\"'*-•").strip()
+        if not clause:
+            continue
+        for depth in DEPTHS:
+            terms.extend(code.lower() for code in extract_codes(clause, depth))
+        terms.extend(tokenize(clause))
+    return list(dict.fromkeys(terms))
+
+
+def _cell(value):
+    """Leere Zellen (NaN/None) als leere Zeichenkette"""
+    if value is None or value != value:
+        return ""
+    return str(value)
+
+
+def document_terms(record):
+    """Gewichtete Termfrequenzen und Länge eines Patents"""
+    counts = Counter()
+    for field, weight in FIELD_WEIGHTS.items():
+        value = _cell(record.get(field))
+        if field == "CPC Classifications":
+            terms = [term for code in split_values(value) for term in code_terms(code)]
+        else:
+            terms = tokenize(value)
+        for term in terms:
+            counts[term] += weight
+    return counts, sum(counts.values())
+
+
+class _Segment:
+    """Unveränderlicher Teil des Index mit eigenen Postings
+
+    Postings sind pro Term nach Dokument sortiert und als Varint-kodierte
+    Abstände gespeichert, Termfrequenzen als uint8.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, _TERMS_FILE), encoding="utf-8") as f:
+            self.term_ids = {term: i for i, term in enumerate(json.load(f))}
+        with open(os.path.join(path, _DOCUMENTS_FILE), encoding="utf-8") as f:
+            self.documents = json.load(f)
+        self.term_offsets = np.load(os.path.join(path, _TERM_OFFSETS_FILE), mmap_mode="r")
+        self.doc_freqs = np.load(os.path.join(path, _DOC_FREQS_FILE), mmap_mode="r")
+        self.freq_offsets = np.concatenate(([0], np.cumsum(self.doc_freqs, dtype=np.int64)))
+        self.postings = np.load(os.path.join(path, _POSTINGS_FILE), mmap_mode="r")
+        self.term_freqs = np.load(os.path.join(path, _TERM_FREQS_FILE), mmap_mode="r")
+        self.doc_lengths = np.load(os.path.join(path, _DOC_LENGTHS_FILE), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.documents)
+
+    def doc_freq(self, term):
+        term_id = self.term_ids.get(term)
+        return 0 if term_id is None else int(self.doc_freqs[term_id])
+
+    def postings_of(self, term):
+        """Liefert (Dokument-IDs, Termfrequenzen) eines Terms"""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.uint8)
+        deltas = decode_varints(self.postings[self.term_offsets[term_id]:self.term_offsets[term_id + 1]])
+        freqs = self.term_freqs[self.freq_offsets[term_id]:self.freq_offsets[term_id + 1]]
+        return np.cumsum(deltas).astype(np.int64), freqs
+
+    def all_postings(self):
+        """Liefert (Term-IDs, Dokument-IDs, Termfrequenzen) aller Postings"""
+        deltas = decode_varints(self.postings).astype(np.int64)
+        term_ids = np.repeat(np.arange(len(self.doc_freqs)), self.doc_freqs)
+        # Abstände pro Term aufsummieren: Gesamtsumme minus Summe vor dem Term
+        totals = np.cumsum(deltas)
+        before = np.concatenate(([0], totals))[self.freq_offsets[:-1]]
+        return term_ids, totals - np.repeat(before, self.doc_freqs), np.asarray(self.term_freqs)
+
+    @staticmethod
+    def write(path, terms, term_ids, doc_ids, freqs, doc_lengths, documents):
+        """Schreibt ein Segment aus (Term-ID, Dokument-ID, Frequenz)-Tripeln"""
+        # Terme alphabetisch, Postings nach Term und Dokument sortiert
+        order = sorted(range(len(terms)), key=terms.__getitem__)
+        rank = np.empty(len(terms), dtype=np.int64)
+        rank[order] = np.arange(len(terms))
+        term_ids = rank[term_ids]
+        postings_order = np.lexsort((doc_ids, term_ids))
+        term_ids, doc_ids, freqs = term_ids[postings_order], doc_ids[postings_order], freqs[postings_order]
+
+        doc_freqs = np.bincount(term_ids, minlength=len(terms)).astype(np.uint32)
+        starts = np.zeros(len(term_ids), dtype=bool)
+        starts[np.concatenate(([0], np.cumsum(doc_freqs)[:-1])).astype(np.int64)[doc_freqs > 0]] = True
+        # Erstes Posting eines Terms absolut, danach Abstand zum vorigen Dokument
+        deltas = np.where(starts, doc_ids, doc_ids - np.concatenate(([0], doc_ids[:-1])))
+        sizes = _varint_sizes(deltas.astype(np.uint64))
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        term_offsets[1:] = np.cumsum(np.bincount(term_ids, weights=sizes, minlength=len(terms)))
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, _TERMS_FILE), "w", encoding="utf-8") as f:
+            json.dump([terms[i] for i in order], f, ensure_ascii=False)
+        with open(os.path.join(path, _DOCUMENTS_FILE), "w", encoding="utf-8") as f:
+            json.dump(documents, f, ensure_ascii=False)
+        np.save(os.path.join(path, _TERM_OFFSETS_FILE), term_offsets)
+        np.save(os.path.join(path, _DOC_FREQS_FILE), doc_freqs)
+        np.save(os.path.join(path, _POSTINGS_FILE), encode_varints(deltas))
+        np.save(os.path.join(path, _TERM_FREQS_FILE), np.minimum(freqs, MAX_TERM_FREQUENCY).astype(np.uint8))
+        np.save(os.path.join(path, _DOC_LENGTHS_FILE), np.asarray(doc_lengths, dtype=np.float32))
+
+
+class BM25Index:
+    """Lokale Volltextsuche über Lens-Exporte mit BM25-Ranking
+
+    Title, Abstract und CPC-Klassifikationen werden gewichtet indexiert.
+    Der Index besteht aus Segmenten: add() schreibt ein neues Segment, ein
+    erneut indexiertes Patent (gleiche Lens ID) ersetzt das ältere, und
+    merge() fasst alle Segmente zu einem zusammen.
+    """
+
+    def __init__(self, index_dir, metadata):
+        self.index_dir = index_dir
+        self.metadata = metadata
+        self._open_segments()
+
+    def _open_segments(self):
+        """Öffnet die in den Metadaten eingetragenen Segmente"""
+        metadata = self.metadata
+        self.segments = [_Segment(os.path.join(self.index_dir, name)) for name in metadata["segments"]]
+        # Ersetzte Patente pro Segment
+        self.deleted = [
+            np.isin(np.arange(len(segment)), metadata["deleted"].get(name, []))
+            for name, segment in zip(metadata["segments"], self.segments)
+        ]
+
+    def __len__(self):
+        return sum(len(segment) for segment in self.segments) - sum(int(mask.sum()) for mask in self.deleted)
+
+    @classmethod
+    def create(cls, index_dir=DEFAULT_BM25_DIR):
+        """Legt einen leeren Index an; ein vorhandener Index wird ersetzt"""
+        if os.path.isdir(index_dir):
+            shutil.rmtree(index_dir)
+        os.makedirs(index_dir)
+        metadata = {"segments": [], "deleted": {}, "next_segment": 1, "fields": FIELD_WEIGHTS}
+        cls._save_metadata(index_dir, metadata)
+        return cls(index_dir, metadata)
+
+    @classmethod
+    def build(cls, source, index_dir=DEFAULT_BM25_DIR):
+        """Erstellt den Index neu aus einem DataFrame oder PatentStore"""
+        index = cls.create(index_dir)
+        index.add(source)
+        return index
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_BM25_DIR):
+        """Lädt einen gespeicherten Index; Postings bleiben auf der Platte"""
+        with open(os.path.join(index_dir, _META_FILE), encoding="utf-8") as f:
+            return cls(index_dir, json.load(f))
+
+    @classmethod
+    def exists(cls, index_dir=DEFAULT_BM25_DIR):
+        """Prüft, ob unter index_dir ein Index liegt"""
+        return os.path.exists(os.path.join(index_dir, _META_FILE))
+
+    @staticmethod
+    def _save_metadata(index_dir, metadata):
+        path = os.path.join(index_dir, _META_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(metadata, f)
+        # Erst nach vollständigem Schreiben ersetzen, damit Leser nie halbe Metadaten sehen
+        os.replace(path + ".tmp", path)
+
+    def add(self, source):
+        """Indexiert Patente aus einem DataFrame oder PatentStore als neues Segment"""
+        if isinstance(source, PatentStore):
+            source = source.to_dataframe([*DOCUMENT_COLUMNS, *FIELD_WEIGHTS])
+        records = source.to_dict("records")
+        if not records:
+            return self
+
+        terms = {}
+        term_ids, doc_ids, freqs, doc_lengths, documents = [], [], [], [], []
+        for doc_id, record in enumerate(records):
+            counts, length = document_terms(record)
+            for term, count in counts.items():
+                term_ids.append(terms.setdefault(term, len(terms)))
+                doc_ids.append(doc_id)
+                freqs.append(count)
+            doc_lengths.append(length)
+            documents.append({
+                "lens_id": _cell(record.get("Lens ID")),
+                "display_key": _cell(record.get("Display Key")),
+                "title": _cell(record.get("Title")),
+            })
+
+        name = f"segment_{self.metadata['next_segment']:05d}"
+        _Segment.write(
+            os.path.join(self.index_dir, name), list(terms),
+            np.asarray(term_ids, dtype=np.int64), np.asarray(doc_ids, dtype=np.int64),
+            np.asarray(freqs, dtype=np.int64), doc_lengths, documents
+        )
+        self._supersede(name, documents)
+        self.metadata["segments"].append(name)
+        self.metadata["next_segment"] += 1
+        self._save_metadata(self.index_dir, self.metadata)
+        self._open_segments()
+        if len(self.segments) > MAX_SEGMENTS:
+            self.merge()
+        return self
+
+    def _supersede(self, name, documents):
+        """Markiert ältere Fassungen der neu indexierten Patente als gelöscht"""
+        latest = {}
+        for local, document in enumerate(documents):
+            if document["lens_id"]:
+                latest[document["lens_id"]] = local
+        deleted = self.metadata["deleted"]
+        # Innerhalb des neuen Segments gilt das letzte Vorkommen
+        own = [local for local, document in enumerate(documents)
+               if document["lens_id"] and latest[document["lens_id"]] != local]
+        if own:
+            deleted[name] = own
+        for segment_name, segment in zip(self.metadata["segments"], self.segments):
+            replaced = [local for local, document in enumerate(segment.documents)
+                        if document["lens_id"] in latest]
+            if replaced:
+                deleted[segment_name] = sorted(set(deleted.get(segment_name, [])) | set(replaced))
+
+    def merge(self):
+        """Fasst alle Segmente zu einem zusammen und entfernt ersetzte Patente"""
+        if len(self.segments) <= 1 and not any(mask.any() for mask in self.deleted):
+            return self
+        terms = {}
+        all_terms, all_docs, all_freqs, doc_lengths, documents = [], [], [], [], []
+        for segment, deleted in zip(self.segments, self.deleted):
+            # Alte Dokument-IDs auf die neuen, lückenlosen IDs abbilden
+            remap = np.full(len(segment), -1, dtype=np.int64)
+            live = np.flatnonzero(~deleted)
+            remap[live] = np.arange(len(documents), len(documents) + len(live))
+            lookup = np.array(
+                [terms.setdefault(term, len(terms)) for term in sorted(segment.term_ids, key=segment.term_ids.get)],
+                dtype=np.int64
+            )
+            term_ids, doc_ids, freqs = segment.all_postings()
+            keep = remap[doc_ids] >= 0
+            all_terms.append(lookup[term_ids[keep]])
+            all_docs.append(remap[doc_ids[keep]])
+            all_freqs.append(freqs[keep].astype(np.int64))
+            doc_lengths.extend(np.asarray(segment.doc_lengths)[live].tolist())
+            documents.extend(segment.documents[i] for i in live)
+
+        name = f"segment_{self.metadata['next_segment']:05d}"
+        _Segment.write(
+            os.path.join(self.index_dir, name), list(terms),
+            np.concatenate(all_terms), np.concatenate(all_docs), np.concatenate(all_freqs),
+            doc_lengths, documents
+        )
+        old_segments = self.metadata["segments"]
+        self.metadata.update(segments=[name], deleted={}, next_segment=self.metadata["next_segment"] + 1)
+        self._save_metadata(self.index_dir, self.metadata)
+        for old in old_segments:
+            shutil.rmtree(os.path.join(self.index_dir, old), ignore_errors=True)
+        self._open_segments()
+        return self
+
+    def search(self, query, k=PRIOR_ART_HITS):
+        """Liefert die k besten Patente zu einer Anfrage wie "A OR B OR C" als (Dokument, Score)"""
+        return self.search_terms(parse_query(query), k)
+
+    def search_terms(self, terms, k=PRIOR_ART_HITS):
+        """BM25-Suche über eine Liste von Termen (ODER-Verknüpfung)"""
+        # Statistiken inklusive ersetzter Patente, bis merge() sie entfernt
+        total_docs = sum(len(segment) for segment in self.segments)
+        if not total_docs or not terms:
+            return []
+        average_length = max(
+            sum(float(np.sum(segment.doc_lengths)) for segment in self.segments) / total_docs, 1.0
+        )
+        # Dokumenthäufigkeit über alle Segmente
+        idf = {}
+        for term in terms:
+            df = sum(segment.doc_freq(term) for segment in self.segments)
+            if df:
+                idf[term] = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+
+        hits = []
+        for segment, deleted in zip(self.segments, self.deleted):
+            scores = None
+            for term, weight in idf.items():
+                doc_ids, freqs = segment.postings_of(term)
+                if not len(doc_ids):
+                    continue
+                if scores is None:
+                    scores = np.zeros(len(segment), dtype=np.float32)
+                freqs = freqs.astype(np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * segment.doc_lengths[doc_ids] / average_length)
+                # Innerhalb eines Terms ist jede Dokument-ID eindeutig
+                scores[doc_ids] += weight * freqs * (BM25_K1 + 1) / (freqs + norm)
+            if scores is None:
+                continue
+            scores[deleted] = 0
+            candidates = np.flatnonzero(scores > 0)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+            hits.extend((float(scores[i]), segment.documents[i]) for i in candidates)
+        hits.sort(key=lambda hit: -hit[0])
+        return [(document, score) for score, document in hits[:k]]
+
+
+def main():
+    """Baut, ergänzt oder durchsucht den BM25-Index über Lens-Exporte"""
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Lokale BM25-Suche über Lens-Exporte")
+    parser.add_argument("--index-dir", default=DEFAULT_BM25_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    for command, help_text in (("build", "Index neu erstellen"), ("add", "Patente ergänzen oder aktualisieren")):
+        sub = commands.add_parser(command, help=help_text)
+        sub.add_argument("sources", nargs="+", help="Lens-CSV-Exporte oder importierte Patent-Stores")
+    search = commands.add_parser("search", help="Suchanfrage, z.B. 'gas sensor OR humidity'")
+    search.add_argument("query")
+    search.add_argument("-k", type=int, default=PRIOR_ART_HITS)
+    commands.add_parser("merge", help="Segmente zusammenführen")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if args.command == "search":
+        index = BM25Index.load(args.index_dir)
+        hits = index.search(args.query, args.k)
+        elapsed = time.perf_counter() - started
+        for document, score in hits:
+            print(f"{score:7.3f}  {document['display_key'] or document['lens_id']}  {document['title']}")
+        print(f"{len(hits)} Treffer in {elapsed * 1000:.1f} ms")
+        return
+
+    if args.command == "merge":
+        index = BM25Index.load(args.index_dir).merge()
+    else:
+        index = (BM25Index.create(args.index_dir) if args.command == "build"
+                 or not BM25Index.exists(args.index_dir) else BM25Index.load(args.index_dir))
+        columns = {*DOCUMENT_COLUMNS, *FIELD_WEIGHTS}
+        for source in args.sources:
+            if PatentStore.exists(source):
+                index.add(PatentStore.load(source))
+                continue
+            # Blockweise einlesen; jeder Block wird ein Segment
+            for chunk in pd.read_csv(source, dtype=str, encoding="utf-8-sig", chunksize=INDEX_CHUNK_ROWS,
+                                     usecols=lambda column: column in columns):
+                index.add(chunk)
+    print(f"{len(index)} Patente in {len(index.segments)} Segment(en) indexiert in "
+          f"{time.perf_counter() - started:.1f} s nach '{args.index_dir}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+import csv
+import os
+import re
+
+import numpy as np
+
+from bm25_index import tokenize
+
+# Wahrscheinlichkeiten der Modelle aus früheren Läufen (Spalte pro Modell)
+DEFAULT_CALIBRATION_PATH = "modell_statistik1.csv"
+# Unsicherheitsband ohne Kalibrierungsdatei; dazwischen entscheidet das Modell
+DEFAULT_BAND = (0.2, 0.8)
+# Herkunft eines Urteils
+STAGE_SCREENING = "screening"
+STAGE_MODEL = "model"
+# Anteil der Wortüberlappung am Ähnlichkeitswert, der Rest ist die Index-Ähnlichkeit
+LEXICAL_WEIGHT = 0.5
+# Kosinus-Ähnlichkeit, unterhalb der Embeddings als unähnlich gelten
+COSINE_FLOOR = 0.5
+# Logistische Abbildung des Ähnlichkeitswerts auf eine Konfliktwahrscheinlichkeit
+SCORE_MIDPOINT = 0.35
+SCORE_SLOPE = 12.0
+
+# Zeilen-ID und Spaltennamen einer serialisierten Zeile, z.B. "[3] Title: " oder "| AB: "
+_FIELD_LABEL = re.compile(r"(?:^\[\d+\] |\| )[^|:\n]{1,40}: ")
+
+
+def row_words(text):
+    """Wörter einer serialisierten Zeile ohne Zeilen-ID und Spaltennamen"""
+    return set(tokenize(_FIELD_LABEL.sub(" ", text)))
+
+
+def lexical_overlap(words, hits):
+    """Größter Überlappungskoeffizient der Wörter mit einem Vergleichspatent"""
+    best = 0.0
+    for document, _ in hits:
+        other = set(tokenize(document["text"]))
+        if words and other:
+            best = max(best, len(words & other) / min(len(words), len(other)))
+    return best
+
+
+def screening_probabilities(rows, hits, kinds):
+    """Konfliktwahrscheinlichkeit pro Zeile aus Wortüberlappung und Index-Ähnlichkeit
+
+    hits enthält pro Zeile die (Dokument, Score)-Paare der Vorauswahl, kinds
+    deren Herkunft: "classification" (Jaccard der Codes) oder "vector"
+    (Kosinus). Nur für Zeilen mit mindestens einem Vergleichspatent.
+    """
+    lexical = np.array([lexical_overlap(row_words(text), row_hits) for (_, text), row_hits in zip(rows, hits)])
+    top = np.array([row_hits[0][1] for row_hits in hits], dtype=np.float64)
+    is_vector = np.array([kind == "vector" for kind in kinds], dtype=bool)
+    similarity = np.where(is_vector, np.clip((top - COSINE_FLOOR) / (1 - COSINE_FLOOR), 0, 1), top)
+    score = LEXICAL_WEIGHT * lexical + (1 - LEXICAL_WEIGHT) * similarity
+    return 1 / (1 + np.exp(-SCORE_SLOPE * (score - SCORE_MIDPOINT)))
+
+
+def calibrated_band(path=DEFAULT_CALIBRATION_PATH, model=None):
+    """Unsicherheitsband aus den gemessenen Modell-Wahrscheinlichkeiten
+
+    Die Vorauswahl entscheidet nur, wenn sie mindestens so sicher ist wie
+    das Modell im Median: Wahrscheinlichkeiten zwischen 1 - c und c gehen an
+    das Modell. Verwendet wird die Spalte, mit der der Modellname beginnt
+    (llama3 -> llama), sonst alle Modelle.
+    """
+    if not os.path.exists(path):
+        return DEFAULT_BAND
+    with open(path, newline="", encoding="utf-8") as f:
+        records = list(csv.DictReader(f))
+    columns = [column for column in (records[0] if records else {}) if column != "Nr"]
+    matching = [column for column in columns if model and model.lower().startswith(column.lower())]
+    values = [float(record[column]) for record in records for column in matching or columns if record[column]]
+    if not values:
+        return DEFAULT_BAND
+    certainty = float(np.median(values))
+    certainty = max(certainty, 1 - certainty)
+    return (1 - certainty, certainty)
+
+
+def screen(rows, probabilities, band):
+    """Teilt die Zeilen am Unsicherheitsband
+
+    Liefert (Zeilen-ID -> Urteil der Vorauswahl, Zeilen für das Modell).
+    """
+    low, high = band
+    decided = {}
+    uncertain = []
+    for row, probability in zip(rows, probabilities):
+        if low < probability < high:
+            uncertain.append(row)
+            continue
+        verdict = int(probability >= high)
+        decided[row[0]] = {
+            "verdict": verdict,
+            "confidence": float(probability if verdict else 1 - probability),
+            "stage": STAGE_SCREENING,
+        }
+    return decided, uncertain
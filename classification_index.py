@@ -0,0 +1,233 @@
+import argparse
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from batching import truncate_to_tokens
+from patent_store import PatentStore, split_values
+from vector_index import CANDIDATE_TOKENS, DEFAULT_TOP_K, DocumentTable, patent_text, write_documents
+
+DEFAULT_CLASSIFICATION_DIR = "classification_index"
+# Spalten des Lens-Exports mit Klassifikationen (beide im selben Code-Format)
+CLASSIFICATION_COLUMNS = ("CPC Classifications", "IPCR Classifications")
+# Präfixtiefe der Codes: G01N, G01N27 oder G01N27/404
+DEPTHS = ("subclass", "group", "subgroup")
+DEFAULT_DEPTH = "group"
+
+# CPC-/IPC-Code, z.B. "G01N27/404" oder "G01N 27/404"
+_CODE_PATTERN = re.compile(r"\b([A-HY]\d{2}[A-Z])\s?(\d{1,4})/(\d{1,6})\b")
+_POSTINGS_FILE = "postings.npy"
+_POSTING_OFFSETS_FILE = "posting_offsets.npy"
+_DOC_SIZES_FILE = "doc_sizes.npy"
+_META_FILE = "metadata.json"
+
+
+def classification_prefix(code, depth=DEFAULT_DEPTH):
+    """Kürzt einen Klassifikationscode auf die gewünschte Tiefe, None bei ungültigem Code"""
+    match = _CODE_PATTERN.search(code)
+    if match is None:
+        return None
+    subclass, group, subgroup = match.groups()
+    if depth == "subclass":
+        return subclass
+    if depth == "group":
+        return f"{subclass}{group}"
+    if depth == "subgroup":
+        return f"{subclass}{group}/{subgroup}"
+    raise ValueError(f"Unbekannte Tiefe {depth!r}, erlaubt: {', '.join(DEPTHS)}")
+
+
+def extract_codes(text, depth=DEFAULT_DEPTH):
+    """Findet alle Klassifikationscodes in einem Text (z.B. einer serialisierten Zeile)"""
+    return list(dict.fromkeys(
+        classification_prefix(f"{subclass}{group}/{subgroup}", depth)
+        for subclass, group, subgroup in _CODE_PATTERN.findall(str(text))
+    ))
+
+
+class ClassificationIndex:
+    """Invertierter Index Klassifikationscode -> Referenzpatente
+
+    Kandidaten entstehen nur bei überlappenden Codes; bewertet wird mit der
+    Jaccard-Ähnlichkeit der Code-Mengen. Postings und Mengengrößen liegen
+    memory-gemappt auf der Platte, ebenso die Dokumente der Treffer.
+    """
+
+    def __init__(self, postings, posting_offsets, doc_sizes, metadata, documents):
+        self.postings = postings
+        self.posting_offsets = posting_offsets
+        self.doc_sizes = doc_sizes
+        self.metadata = metadata
+        self.depth = metadata["depth"]
+        self.documents = documents
+        self.code_ids = {code: i for i, code in enumerate(metadata["codes"])}
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, source, index_dir=DEFAULT_CLASSIFICATION_DIR, depth=DEFAULT_DEPTH,
+              columns=CLASSIFICATION_COLUMNS):
+        """Erstellt den Index aus einem DataFrame oder PatentStore"""
+        if depth not in DEPTHS:
+            raise ValueError(f"Unbekannte Tiefe {depth!r}, erlaubt: {', '.join(DEPTHS)}")
+        if isinstance(source, PatentStore):
+            codes, doc_ids, code_ids = cls._pairs_from_store(source, depth, columns)
+            # Für die Dokumente nur die Prompt-Spalten dekodieren
+            rows = source.to_dataframe(["Lens ID", "Display Key", "Title", "Abstract"])
+        else:
+            codes, doc_ids, code_ids = cls._pairs_from_dataframe(source, depth, columns)
+            rows = source
+        documents = [cls._document(row) for _, row in rows.iterrows()]
+        if not codes:
+            raise ValueError("Keine Klassifikationen zum Indexieren gefunden")
+
+        # Doppelte (Patent, Code)-Paare entfernen, z.B. aus CPC und IPCR
+        pairs = np.unique(doc_ids.astype(np.int64) * len(codes) + code_ids)
+        doc_ids = (pairs // len(codes)).astype(np.int32)
+        code_ids = (pairs % len(codes)).astype(np.int32)
+
+        # Postings nach Code sortiert, innerhalb eines Codes nach Patent
+        order = np.argsort(code_ids, kind="stable")
+        postings = doc_ids[order]
+        posting_offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+        posting_offsets[1:] = np.cumsum(np.bincount(code_ids, minlength=len(codes)))
+        doc_sizes = np.bincount(doc_ids, minlength=len(documents)).astype(np.int32)
+
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, _POSTINGS_FILE), postings)
+        np.save(os.path.join(index_dir, _POSTING_OFFSETS_FILE), posting_offsets)
+        np.save(os.path.join(index_dir, _DOC_SIZES_FILE), doc_sizes)
+        write_documents(index_dir, documents)
+        metadata = {"depth": depth, "columns": list(columns), "codes": codes}
+        with open(os.path.join(index_dir, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        return cls.load(index_dir)
+
+    @staticmethod
+    def _document(row):
+        """Metadaten eines Referenzpatents für den Prompt"""
+        text = patent_text({field: row.get(field) for field in ("Title", "Abstract")})
+        return {
+            "lens_id": str(row.get("Lens ID") or ""),
+            "display_key": str(row.get("Display Key") or ""),
+            "text": truncate_to_tokens(text, CANDIDATE_TOKENS),
+        }
+
+    @staticmethod
+    def _pairs_from_dataframe(df, depth, columns):
+        """(Code-Liste, Patent-IDs, Code-IDs) aus den Klassifikationsspalten"""
+        codes = {}
+        doc_ids = []
+        code_ids = []
+        for column in columns:
+            if column not in df.columns:
+                continue
+            for position, value in enumerate(df[column].tolist()):
+                if not isinstance(value, str):
+                    continue
+                for code in split_values(value):
+                    prefix = classification_prefix(code, depth)
+                    if prefix is None:
+                        continue
+                    doc_ids.append(position)
+                    code_ids.append(codes.setdefault(prefix, len(codes)))
+        return list(codes), np.asarray(doc_ids, dtype=np.int64), np.asarray(code_ids, dtype=np.int64)
+
+    @staticmethod
+    def _pairs_from_store(store, depth, columns):
+        """Wie _pairs_from_dataframe, aber direkt auf den internierten Store-IDs"""
+        codes = {}
+        doc_ids = []
+        code_ids = []
+        for column in columns:
+            if not store.has_column(column):
+                continue
+            ids, offsets = store.multi_arrays(column)
+            # Vokabular einmal auf Präfixe abbilden statt pro Vorkommen
+            lookup = np.array([
+                -1 if (prefix := classification_prefix(value, depth)) is None
+                else codes.setdefault(prefix, len(codes))
+                for value in store.vocabulary(column)
+            ], dtype=np.int64)
+            rows = np.repeat(np.arange(len(store), dtype=np.int64), np.diff(offsets))
+            mapped = lookup[np.asarray(ids)] if len(ids) else np.empty(0, dtype=np.int64)
+            valid = mapped >= 0
+            doc_ids.append(rows[valid])
+            code_ids.append(mapped[valid])
+        if not doc_ids:
+            return [], np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return list(codes), np.concatenate(doc_ids), np.concatenate(code_ids)
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_CLASSIFICATION_DIR):
+        """Lädt einen gespeicherten Index; die Postings bleiben auf der Platte"""
+        with open(os.path.join(index_dir, _META_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        return cls(
+            np.load(os.path.join(index_dir, _POSTINGS_FILE), mmap_mode="r"),
+            np.load(os.path.join(index_dir, _POSTING_OFFSETS_FILE), mmap_mode="r"),
+            np.load(os.path.join(index_dir, _DOC_SIZES_FILE), mmap_mode="r"),
+            metadata, DocumentTable(index_dir)
+        )
+
+    @classmethod
+    def exists(cls, index_dir=DEFAULT_CLASSIFICATION_DIR):
+        """Prüft, ob unter index_dir ein Index liegt"""
+        return os.path.exists(os.path.join(index_dir, _META_FILE))
+
+    def query_codes(self, text):
+        """Klassifikationscodes eines Textes in der Tiefe des Index"""
+        return extract_codes(text, self.depth)
+
+    def candidates(self, codes):
+        """Liefert (Patent-IDs, Jaccard) aller Patente mit mindestens einem gemeinsamen Code"""
+        query = np.unique([self.code_ids[code] for code in codes if code in self.code_ids])
+        if not len(query):
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        postings = np.concatenate([
+            self.postings[self.posting_offsets[c]:self.posting_offsets[c + 1]] for c in query
+        ])
+        # Schnittmenge = Häufigkeit eines Patents in den Postings der Anfrage
+        doc_ids, intersection = np.unique(postings, return_counts=True)
+        union = len(query) + self.doc_sizes[doc_ids] - intersection
+        return doc_ids, (intersection / union).astype(np.float32)
+
+    def search(self, code_lists, k=DEFAULT_TOP_K):
+        """Liefert pro Code-Liste die k ähnlichsten Patente als (Dokument, Score)"""
+        results = []
+        for codes in code_lists:
+            doc_ids, scores = self.candidates(codes)
+            if len(doc_ids) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                doc_ids, scores = doc_ids[top], scores[top]
+            order = np.argsort(-scores, kind="stable")
+            results.append([(self.documents[doc_ids[i]], float(scores[i])) for i in order])
+        return results
+
+
+def main():
+    """Baut den Klassifikationsindex aus einem Lens-CSV-Export oder Patent-Store"""
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Invertierten CPC-/IPCR-Index über einen Lens-Export erstellen")
+    parser.add_argument("source", help="Lens-Export, z.B. patentdb.csv, oder ein importierter Patent-Store")
+    parser.add_argument("--index-dir", default=DEFAULT_CLASSIFICATION_DIR)
+    parser.add_argument("--depth", choices=DEPTHS, default=DEFAULT_DEPTH)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    if PatentStore.exists(args.source):
+        source = PatentStore.load(args.source)
+    else:
+        source = pd.read_csv(args.source, dtype=str, encoding="utf-8-sig")
+    index = ClassificationIndex.build(source, args.index_dir, depth=args.depth)
+    print(f"{len(index)} Patente, {len(index.code_ids)} Codes indexiert in "
+          f"{time.perf_counter() - started:.1f} s nach '{args.index_dir}'")
+
+
+if __name__ == "__main__":
+    main()
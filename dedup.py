@@ -0,0 +1,159 @@
+import re
+import zlib
+
+import numpy as np
+
+from patent_store import split_values
+
+# Spalten, die eine Patentfamilie bzw. ein Dokument kennzeichnen (Lens-Export)
+FAMILY_COLUMNS = ("Simple Family Members",)
+ID_COLUMNS = ("Lens ID", "PN")
+# Spalten mit dem Abstract (Lens-Export bzw. Arbeitsmappen mit Kürzeln)
+ABSTRACT_COLUMNS = ("Abstract", "AB")
+
+# MinHash-Signaturlänge und LSH-Aufteilung in Bänder (BANDS * ROWS_PER_BAND)
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+# Geschätzte Jaccard-Ähnlichkeit, ab der zwei Abstracts als Duplikat gelten
+DEFAULT_SIMILARITY = 0.8
+# Wörter pro Shingle
+SHINGLE_WORDS = 3
+# Kurze Abstracts (z.B. nur ein Anmeldername) nicht vergleichen
+MIN_SHINGLES = 5
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+_rng = np.random.default_rng(1)
+# Feste Hash-Permutationen, damit Signaturen über Läufe vergleichbar bleiben
+_PERM_A = _rng.integers(1, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, 1 << 32, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    """Zerlegt einen Text in Wort-n-Gramme als 32-Bit-Hashes"""
+    words = _WORD_PATTERN.findall(str(text).lower())
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 0))}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash(hashes):
+    """MinHash-Signatur einer Shingle-Menge"""
+    # a * x + b bleibt unter 2^64, da a, x und b kleiner als 2^32 sind
+    values = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return values.min(axis=1)
+
+
+def _first_value(record, candidates):
+    """Wert der ersten vorhandenen Spalte aus candidates"""
+    return next((record[column] for column in candidates if column in record), None)
+
+
+def _cell(value):
+    """Leere Zellen (NaN/None) als leere Zeichenkette"""
+    if value is None or value != value:
+        return ""
+    return str(value).strip()
+
+
+class _UnionFind:
+    """Fasst Zeilen zu Gruppen zusammen; Repräsentant ist die kleinste Zeilen-ID"""
+
+    def __init__(self):
+        self.parent = {}
+
+    def add(self, item):
+        self.parent.setdefault(item, item)
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            self.parent[max(a, b)] = min(a, b)
+
+
+class DuplicateFinder:
+    """Findet Familienmitglieder und Beinahe-Duplikate zeilenweise
+
+    Zeilen derselben Patentfamilie (Simple Family Members bzw. gleiche
+    Lens ID) und Zeilen mit nahezu gleichem Abstract (MinHash/LSH) bilden
+    eine Gruppe. Pro Zeile wird nur die Signatur behalten, daher eignet sich
+    die Klasse für blockweises Einlesen.
+    """
+
+    def __init__(self, similarity=DEFAULT_SIMILARITY):
+        self.similarity = similarity
+        self.groups = _UnionFind()
+        # Lens ID bzw. Familienmitglied -> erste Zeile, in der es vorkam
+        self.owners = {}
+        self.signatures = {}
+
+    def add(self, row_id, record):
+        """Nimmt eine Zeile (Dictionary oder pandas-Zeile) auf"""
+        self.groups.add(row_id)
+        for column in (*ID_COLUMNS, *FAMILY_COLUMNS):
+            if column not in record:
+                continue
+            for member in split_values(_cell(record[column])):
+                if member in self.owners:
+                    self.groups.union(self.owners[member], row_id)
+                else:
+                    self.owners[member] = row_id
+
+        hashes = shingles(_cell(_first_value(record, ABSTRACT_COLUMNS)))
+        if len(hashes) >= MIN_SHINGLES:
+            self.signatures[row_id] = minhash(hashes)
+
+    def duplicates(self):
+        """Liefert Zeilen-ID -> Repräsentant für alle Zeilen, die nicht selbst Repräsentant sind"""
+        # Beinahe-Duplikate: Kandidaten aus gleichen LSH-Bändern, dann Signaturvergleich
+        rows_per_band = NUM_PERMUTATIONS // LSH_BANDS
+        for band in range(LSH_BANDS):
+            buckets = {}
+            for row_id, signature in self.signatures.items():
+                key = signature[band * rows_per_band:(band + 1) * rows_per_band].tobytes()
+                buckets.setdefault(key, []).append(row_id)
+            for bucket in buckets.values():
+                # Pro Gruppe im Bucket nur einen Vertreter vergleichen, sonst
+                # wächst der Aufwand bei vielen gleichen Abstracts quadratisch
+                seen = []
+                for row_id in bucket:
+                    root = self.groups.find(row_id)
+                    for other in seen:
+                        if self.groups.find(other) == root:
+                            break
+                        estimate = np.mean(self.signatures[other] == self.signatures[row_id])
+                        if estimate >= self.similarity:
+                            self.groups.union(other, row_id)
+                            break
+                    else:
+                        seen.append(row_id)
+
+        return {
+            row_id: representative
+            for row_id in self.groups.parent
+            if (representative := self.groups.find(row_id)) != row_id
+        }
+
+
+def collapse_rows(rows, duplicates):
+    """Entfernt alle Zeilen, die durch einen Repräsentanten vertreten werden"""
+    return [(row_id, text) for row_id, text in rows if row_id not in duplicates]
+
+
+def expand_verdicts(verdicts, duplicates, known=None):
+    """Überträgt die Bewertung jedes Repräsentanten auf seine Duplikate
+
+    Übertragene Bewertungen tragen die Zeilen-ID ihres Repräsentanten unter
+    "duplicate_of". known enthält Bewertungen von Repräsentanten, die schon
+    früher bewertet wurden (z.B. in einem vorherigen Block).
+    """
+    expanded = dict(verdicts)
+    for row_id, representative in duplicates.items():
+        verdict = verdicts[representative] if representative in verdicts else (known or {}).get(representative)
+        expanded[row_id] = {**verdict, "duplicate_of": representative} if verdict else None
+    return dict(sorted(expanded.items()))
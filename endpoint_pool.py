@@ -0,0 +1,143 @@
+import asyncio
+import os
+import threading
+import time
+
+# Kommagetrennte Liste weiterer Ollama-Server, z.B. "http://gpu1:11434,http://gpu2:11434"
+HOSTS_ENV = "OLLAMA_HOSTS"
+# Abstand der Health-Checks je Endpunkt
+HEALTH_CHECK_INTERVAL = 30.0
+# Zeit bis zum Verbindungsaufbau bzw. bis zur nächsten Antwort eines Endpunkts
+CONNECT_TIMEOUT = 5.0
+DEFAULT_REQUEST_TIMEOUT = 600.0
+
+
+def model_key(model):
+    """Modellname mit Tag; Ollama ergänzt ein fehlendes Tag zu :latest ("llama3" == "llama3:latest")"""
+    if model and ":" not in model.rsplit("/", 1)[-1]:
+        return f"{model}:latest"
+    return model
+
+
+def default_hosts():
+    """Endpunkte aus OLLAMA_HOSTS, sonst der Standard-Host des ollama-Pakets"""
+    hosts = [host.strip() for host in os.environ.get(HOSTS_ENV, "").split(",") if host.strip()]
+    return hosts or [None]
+
+
+class Endpoint:
+    """Zustand eines Ollama-Servers im Pool"""
+
+    def __init__(self, host):
+        self.host = host
+        self.healthy = True
+        # Laufende Anfragen dieses Prozesses an den Endpunkt
+        self.outstanding = 0
+        self.loaded_models = set()
+        self.requests = 0
+        self.failures = 0
+        self.last_check = 0.0
+        self.last_error = None
+
+    @property
+    def name(self):
+        return self.host or "Standard"
+
+
+class EndpointPool:
+    """Verteilt Anfragen auf mehrere Ollama-Server
+
+    Bevorzugt werden gesunde Endpunkte, die das Modell bereits geladen und
+    einen freien Slot haben; sonst der mit den wenigsten offenen Anfragen,
+    auch wenn er das Modell erst laden muss. Ein Endpunkt, der mit
+    Timeout oder Verbindungsfehler ausfällt, gilt bis zum nächsten
+    erfolgreichen Health-Check als ungesund.
+    """
+
+    def __init__(self, hosts=None, slots=1, request_timeout=DEFAULT_REQUEST_TIMEOUT,
+                 health_interval=HEALTH_CHECK_INTERVAL):
+        hosts = [host for host in (hosts or []) if host] or default_hosts()
+        self.endpoints = [Endpoint(host) for host in dict.fromkeys(hosts)]
+        # Gleichzeitige Anfragen, die ein Endpunkt ohne Warten bearbeitet
+        self.slots = slots
+        self.request_timeout = request_timeout
+        self.health_interval = health_interval
+        # Zähler werden aus den Event-Loops mehrerer Worker-Threads geändert
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.endpoints)
+
+    def acquire(self, model, exclude=(), candidates=None):
+        """Wählt einen Endpunkt für model und zählt die Anfrage als offen; None, wenn keiner übrig ist"""
+        model = model_key(model)
+        with self._lock:
+            candidates = [endpoint for endpoint in candidates or self.endpoints if endpoint not in exclude]
+            # Sind alle ungesund, wird trotzdem einer versucht
+            candidates = [endpoint for endpoint in candidates if endpoint.healthy] or candidates
+            if not candidates:
+                return None
+            endpoint = min(candidates, key=lambda e: (
+                not (model in e.loaded_models and e.outstanding < self.slots),
+                e.outstanding, model not in e.loaded_models, e.requests
+            ))
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint, model=None, loaded=True, error=None):
+        """Beendet eine offene Anfrage; error markiert den Endpunkt als ungesund"""
+        model = model_key(model)
+        with self._lock:
+            endpoint.outstanding -= 1
+            if error is not None:
+                endpoint.failures += 1
+                endpoint.healthy = False
+                endpoint.last_error = str(error) or type(error).__name__
+            elif model:
+                endpoint.healthy = True
+                if loaded:
+                    endpoint.loaded_models.add(model)
+                else:
+                    endpoint.loaded_models.discard(model)
+
+    def needs_check(self):
+        """Prüft, ob ein Health-Check fällig ist (nur bei mehreren Endpunkten sinnvoll)"""
+        now = time.time()
+        return len(self.endpoints) > 1 and any(
+            now - endpoint.last_check >= self.health_interval for endpoint in self.endpoints
+        )
+
+    async def check_health(self, clients):
+        """Fragt /api/ps aller Endpunkte ab: erreichbar und geladene Modelle"""
+        async def check(endpoint):
+            try:
+                response = await asyncio.wait_for(clients[endpoint.host].ps(), CONNECT_TIMEOUT)
+                models = {model_key(model["model"] or model["name"]) for model in response["models"]}
+            except Exception as e:
+                with self._lock:
+                    endpoint.healthy = False
+                    endpoint.last_error = str(e) or type(e).__name__
+            else:
+                with self._lock:
+                    endpoint.healthy = True
+                    endpoint.loaded_models = models
+            endpoint.last_check = time.time()
+
+        await asyncio.gather(*(check(endpoint) for endpoint in self.endpoints))
+
+    def stats(self):
+        """Zustand aller Endpunkte für Anzeige und Export"""
+        with self._lock:
+            return [
+                {
+                    "endpoint": endpoint.name,
+                    "healthy": endpoint.healthy,
+                    "outstanding": endpoint.outstanding,
+                    "requests": endpoint.requests,
+                    "failures": endpoint.failures,
+                    "loaded_models": sorted(endpoint.loaded_models),
+                    "last_error": endpoint.last_error,
+                }
+                for endpoint in self.endpoints
+            ]
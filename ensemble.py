@@ -0,0 +1,94 @@
+DEFAULT_MODELS = ("llama3",)
+# Modelle bleiben zwischen den Batches einer Gruppe geladen
+DEFAULT_KEEP_ALIVE = "10m"
+# Gleichzeitig geladene Modelle; 1 = strikt nacheinander, kein Verdrängen
+DEFAULT_PARALLEL_MODELS = 1
+VOTE_METHODS = ("majority", "weighted")
+
+
+def model_groups(models, parallel_models=DEFAULT_PARALLEL_MODELS):
+    """Teilt die Modelle in Gruppen, die gemeinsam geladen sein dürfen"""
+    if parallel_models < 1:
+        raise ValueError("parallel_models muss mindestens 1 sein")
+    return [list(models[i:i + parallel_models]) for i in range(0, len(models), parallel_models)]
+
+
+def parse_model_weights(items):
+    """Liest Gewichte der Form 'modell=0.8' in ein Dictionary"""
+    weights = {}
+    for item in items or ():
+        model, separator, value = item.rpartition("=")
+        if not separator or not model:
+            raise ValueError(f"Gewicht {item!r} muss die Form modell=wert haben")
+        weights[model] = float(value)
+    return weights
+
+
+def combine_verdicts(model_verdicts, method="majority", weights=None):
+    """Führt die Bewertungen mehrerer Modelle pro Zeile zusammen
+
+    model_verdicts: Modell -> {Zeilen-ID -> Bewertung oder None}.
+    "majority" entscheidet nach Stimmen (Gleichstand nach Gewicht),
+    "weighted" nach der Summe aus Gewicht * Konfidenz. agreement ist der
+    Anteil der abgegebenen Stimmen, die dem Ergebnis entsprechen.
+    """
+    if method not in VOTE_METHODS:
+        raise ValueError(f"Unbekanntes Verfahren {method!r}, erlaubt: {', '.join(VOTE_METHODS)}")
+    weights = weights or {}
+    row_ids = sorted({row_id for verdicts in model_verdicts.values() for row_id in verdicts})
+    combined = {}
+    for row_id in row_ids:
+        votes = {
+            model: verdicts[row_id]
+            for model, verdicts in model_verdicts.items()
+            if verdicts.get(row_id) is not None
+        }
+        if not votes:
+            combined[row_id] = None
+            continue
+
+        counts = [0, 0]
+        scores = [0.0, 0.0]
+        for model, vote in votes.items():
+            counts[vote["verdict"]] += 1
+            scores[vote["verdict"]] += weights.get(model, 1.0) * vote["confidence"]
+
+        if method == "majority" and counts[0] != counts[1]:
+            verdict = int(counts[1] > counts[0])
+        else:
+            verdict = int(scores[1] > scores[0])
+        winners = [vote for vote in votes.values() if vote["verdict"] == verdict]
+        if method == "weighted":
+            total = scores[0] + scores[1]
+            confidence = scores[verdict] / total if total else 0.5
+        else:
+            confidence = sum(vote["confidence"] for vote in winners) / len(winners) if winners else 0.5
+
+        combined[row_id] = {
+            "verdict": verdict,
+            "confidence": confidence,
+            "agreement": len(winners) / len(votes),
+            "votes": {model: vote["verdict"] for model, vote in votes.items()},
+        }
+    return combined
+
+
+def agreement_summary(combined, models):
+    """Kennzahlen zur Übereinstimmung der Modelle
+
+    Liefert die mittlere Übereinstimmung, den Anteil einstimmiger Zeilen und
+    pro Modell den Anteil der Zeilen, in denen es mit dem Ergebnis übereinstimmt.
+    """
+    rated = [verdict for verdict in combined.values() if verdict is not None]
+    if not rated:
+        return {"mean_agreement": 0.0, "unanimous": 0.0, "per_model": {model: 0.0 for model in models}}
+    per_model = {}
+    for model in models:
+        voted = [v for v in rated if model in v["votes"]]
+        matches = sum(1 for v in voted if v["votes"][model] == v["verdict"])
+        per_model[model] = matches / len(voted) if voted else 0.0
+    return {
+        "mean_agreement": sum(v["agreement"] for v in rated) / len(rated),
+        "unanimous": sum(1 for v in rated if v["agreement"] == 1.0) / len(rated),
+        "per_model": per_model,
+    }
@@ -0,0 +1,108 @@
+import os
+
+# Spalten, die ins Prompt gehen: Zielname -> mögliche Spaltennamen der Quelle
+PROMPT_COLUMNS = {
+    "Title": ("Title", "TI"),
+    "Abstract": ("Abstract", "AB"),
+    "Claims": ("Claims", "CL"),
+    "CPC Classifications": ("CPC Classifications", "CPC"),
+    "IPCR Classifications": ("IPCR Classifications", "IC"),
+}
+# Zusätzlich gelesene Spalten für die Duplikaterkennung (nicht im Prompt)
+KEY_COLUMNS = {
+    "Lens ID": ("Lens ID", "PN"),
+    "Simple Family Members": ("Simple Family Members",),
+}
+# Zeilen pro Block; begrenzt den Speicherbedarf unabhängig von der Dateigröße
+INGEST_CHUNK_ROWS = 5000
+SUPPORTED_EXTENSIONS = (".xlsx", ".xls", ".csv")
+
+
+def project_header(header, columns=None):
+    """Ordnet die Spalten der Quelle den gewünschten Zielnamen zu
+
+    Liefert Zielname -> Spaltenindex. Enthält die Quelle keine der
+    Prompt-Spalten, werden alle Spalten unverändert übernommen.
+    """
+    columns = {**(columns or PROMPT_COLUMNS), **KEY_COLUMNS}
+    positions = {str(name).strip(): i for i, name in enumerate(header) if name is not None}
+    projection = {}
+    for target, aliases in columns.items():
+        position = next((positions[alias] for alias in aliases if alias in positions), None)
+        if position is not None:
+            projection[target] = position
+    if not any(target in projection for target in (columns.keys() - KEY_COLUMNS.keys())):
+        return positions
+    return projection
+
+
+def _chunks_xlsx(file_path, columns, chunk_rows):
+    """Liest .xlsx zeilenweise im Read-only-Modus von openpyxl"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        projection = project_header(header, columns)
+        chunk = []
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            chunk.append({
+                target: values[position] if position < len(values) else None
+                for target, position in projection.items()
+            })
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+    finally:
+        workbook.close()
+
+
+def _chunks_pandas(file_path, columns, chunk_rows):
+    """Liest CSV blockweise und .xls (ohne Streaming-Leser) mit pandas, jeweils nur die projizierten Spalten"""
+    import pandas as pd
+
+    is_csv = file_path.lower().endswith(".csv")
+    options = {"dtype": str, "keep_default_na": False}
+    if is_csv:
+        header = pd.read_csv(file_path, nrows=0, encoding="utf-8-sig").columns
+    else:
+        header = pd.read_excel(file_path, nrows=0).columns
+    projection = project_header(list(header), columns)
+    usecols = sorted(projection.values())
+    names = {header[position]: target for target, position in projection.items()}
+
+    if is_csv:
+        frames = pd.read_csv(file_path, usecols=usecols, chunksize=chunk_rows,
+                             encoding="utf-8-sig", **options)
+    else:
+        frames = [pd.read_excel(file_path, usecols=usecols, **options)]
+    for frame in frames:
+        frame = frame.rename(columns=names)
+        for start in range(0, len(frame), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows].to_dict("records")
+
+
+def iter_chunks(file_path, columns=None, chunk_rows=INGEST_CHUNK_ROWS):
+    """Liefert die Zeilen einer Arbeitsmappe oder eines Lens-CSV-Exports blockweise
+
+    Jede Zeile ist ein Dictionary der projizierten Spalten (Zielnamen).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise ValueError(f"Nicht unterstütztes Format {extension!r}, erlaubt: {', '.join(SUPPORTED_EXTENSIONS)}")
+    if extension == ".xlsx":
+        return _chunks_xlsx(file_path, columns, chunk_rows)
+    return _chunks_pandas(file_path, columns, chunk_rows)
+
+
+def prompt_fields(record, columns=None):
+    """Die Felder einer Zeile, die ins Prompt gehen"""
+    columns = columns or PROMPT_COLUMNS
+    return {name: value for name, value in record.items() if name not in KEY_COLUMNS or name in columns}
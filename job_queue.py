@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+
+# Gleichzeitig bearbeitete Dateien; Ollama-Anfragen begrenzt zusätzlich die RequestEngine
+DEFAULT_JOB_WORKERS = 1
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITIES = {"hoch": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "niedrig": PRIORITY_LOW}
+# Zustände eines Jobs und ihre Anzeige in der GUI
+STATE_LABELS = {
+    "queued": "wartend",
+    "running": "läuft",
+    "done": "fertig",
+    "cancelled": "abgebrochen",
+    "failed": "fehlgeschlagen",
+}
+
+
+class JobCancelled(Exception):
+    """Der Job wurde abgebrochen"""
+
+
+class Job:
+    """Eine zu analysierende Datei in der Warteschlange"""
+
+    def __init__(self, job_id, file_path, priority=PRIORITY_NORMAL):
+        self.id = job_id
+        self.file_path = file_path
+        self.priority = priority
+        self.state = "queued"
+        # Fertige und insgesamt erwartete Batches
+        self.completed = 0
+        self.total = 0
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        # Sekunden vom Einreihen bis zum ersten fertigen Batch
+        self.first_result = None
+        # Wird beim Abbrechen gesetzt; laufende Ollama-Anfragen prüfen es
+        self.cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Bricht zwischen zwei Verarbeitungsschritten ab, wenn der Job abgebrochen wurde"""
+        if self.cancelled:
+            raise JobCancelled(self.file_path)
+
+    def progress(self):
+        """Anteil der fertigen Batches (0 bis 1)"""
+        if self.state == "done":
+            return 1.0
+        return self.completed / self.total if self.total else 0.0
+
+
+class JobQueue:
+    """Warteschlange mit Prioritäten und begrenzter Anzahl Worker-Threads
+
+    run_job(job) verarbeitet einen Job im Worker-Thread und meldet den
+    Fortschritt über report_progress(). on_change(job) wird bei jeder
+    Zustandsänderung aufgerufen, auch aus Worker-Threads.
+    """
+
+    def __init__(self, run_job, workers=DEFAULT_JOB_WORKERS, on_change=None):
+        if workers < 1:
+            raise ValueError("workers muss mindestens 1 sein")
+        self.run_job = run_job
+        self.on_change = on_change
+        self.jobs = {}
+        # Einträge (Priorität, Reihenfolge, Job-ID); veraltete werden beim Entnehmen übersprungen
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, file_path, priority=PRIORITY_NORMAL):
+        """Reiht eine Datei ein und liefert den Job"""
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Die Warteschlange ist geschlossen")
+            job = Job(len(self.jobs) + 1, file_path, priority)
+            self.jobs[job.id] = job
+            heapq.heappush(self._heap, (priority, next(self._order), job.id))
+            self._condition.notify()
+        self._changed(job)
+        return job
+
+    def set_priority(self, job_id, priority):
+        """Ändert die Priorität eines wartenden Jobs"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state != "queued" or job.priority == priority:
+                return False
+            job.priority = priority
+            heapq.heappush(self._heap, (priority, next(self._order), job.id))
+        self._changed(job)
+        return True
+
+    def cancel(self, job_id):
+        """Bricht einen wartenden oder laufenden Job ab"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in ("queued", "running"):
+                return False
+            job.cancel_event.set()
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.finished = time.time()
+        self._changed(job)
+        return True
+
+    def report_progress(self, job, completed, total):
+        """Aktualisiert die fertigen und erwarteten Batches eines Jobs"""
+        job.completed = completed
+        job.total = total
+        if completed and job.first_result is None:
+            job.first_result = time.time() - job.submitted
+        self._changed(job)
+
+    def snapshot(self):
+        """Alle Jobs in Einreihungsreihenfolge"""
+        with self._condition:
+            return list(self.jobs.values())
+
+    def active(self):
+        """Prüft, ob noch Jobs warten oder laufen"""
+        with self._condition:
+            return any(job.state in ("queued", "running") for job in self.jobs.values())
+
+    def shutdown(self):
+        """Schließt die Warteschlange und bricht alle offenen Jobs ab"""
+        with self._condition:
+            self._closed = True
+            pending = [job.id for job in self.jobs.values() if job.state in ("queued", "running")]
+            self._condition.notify_all()
+        for job_id in pending:
+            self.cancel(job_id)
+
+    def _next_job(self):
+        """Entnimmt den wartenden Job mit der höchsten Priorität (blockierend)"""
+        with self._condition:
+            while True:
+                while self._heap:
+                    priority, _, job_id = heapq.heappop(self._heap)
+                    job = self.jobs[job_id]
+                    if job.state == "queued" and job.priority == priority:
+                        job.state = "running"
+                        job.started = time.time()
+                        return job
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+    def _work(self):
+        """Schleife eines Worker-Threads"""
+        while (job := self._next_job()) is not None:
+            self._changed(job)
+            try:
+                self.run_job(job)
+                job.state = "cancelled" if job.cancelled else "done"
+            except (JobCancelled, asyncio.CancelledError):
+                job.state = "cancelled"
+            except Exception as e:
+                job.state = "failed"
+                job.error = str(e)
+            job.finished = time.time()
+            self._changed(job)
+
+    def _changed(self, job):
+        if self.on_change is not None:
+            self.on_change(job)
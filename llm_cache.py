@@ -0,0 +1,110 @@
+import hashlib
+import json
+import time
+
+from sqlite_store import SqliteStore
+
+DEFAULT_CACHE_PATH = "llm_cache.sqlite"
+# Obergrenze für die gespeicherten Antworten (Bytes)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Maximales Alter eines Eintrags (Sekunden), hier 30 Tage
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+
+# Parameter, die das Ergebnis einer Anfrage nicht beeinflussen
+_IGNORED_KEYS = {"stream", "keep_alive"}
+
+
+def cache_key(request):
+    """Bildet einen stabilen Hash aus Modell, Prompt und Generierungsoptionen"""
+    relevant = {k: v for k, v in request.items() if k not in _IGNORED_KEYS and v is not None}
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def response_to_dict(response):
+    """Wandelt eine Ollama-Antwort in ein JSON-serialisierbares Dictionary um"""
+    if hasattr(response, "model_dump"):
+        return response.model_dump(mode="json")
+    return dict(response)
+
+
+class ResponseCache(SqliteStore):
+    """Persistenter SQLite-Cache für Ollama-Antworten mit LRU-Verdrängung"""
+
+    TABLE = "responses"
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            model TEXT,
+            response TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)",
+    )
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES,
+                 max_age=DEFAULT_MAX_AGE, enabled=True):
+        # Bypass-Schalter: bei False wird weder gelesen noch geschrieben und keine Datei angelegt
+        super().__init__(path, enabled)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, request):
+        """Liefert die gespeicherte Antwort oder None"""
+        if not self.enabled:
+            return None
+        key = cache_key(request)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, request, response):
+        """Speichert eine Antwort und verdrängt bei Bedarf alte Einträge"""
+        if not self.enabled:
+            return
+        payload = json.dumps(response_to_dict(response), ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (cache_key(request), request.get("model"), payload,
+                 len(payload.encode("utf-8")), now, now)
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        """Entfernt abgelaufene Einträge und danach die am längsten unbenutzten"""
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.max_age,))
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ):
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+
+    def stats(self):
+        """Liefert Treffer, Fehlgriffe, Anzahl Einträge und Größe in Bytes"""
+        entries, size = self._aggregate("COUNT(*), COALESCE(SUM(size), 0)", (0, 0))
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
@@ -0,0 +1,263 @@
+import asyncio
+import contextlib
+import contextvars
+import time
+
+from endpoint_pool import CONNECT_TIMEOUT, EndpointPool
+from llm_cache import response_to_dict
+
+# Maximale Anzahl gleichzeitig laufender Ollama-Anfragen
+DEFAULT_MAX_CONCURRENCY = 4
+# Intervall, in dem ein Abbruchsignal geprüft wird
+CANCEL_POLL_SECONDS = 0.1
+
+# Clients (Host -> AsyncClient) und Slots der aktuell laufenden Event-Loop
+_session = contextvars.ContextVar("ollama_session")
+
+
+class EndpointSlots:
+    """Freie Slots pro Endpunkt innerhalb einer run()-Sitzung
+
+    Eine Anfrage wartet, bis ein gesunder Endpunkt weniger als per_endpoint
+    laufende Anfragen hat; ungesunde Endpunkte zählen nur, wenn kein
+    gesunder übrig ist.
+    """
+
+    def __init__(self, pool, per_endpoint):
+        self.pool = pool
+        self.per_endpoint = per_endpoint
+        self.active = {endpoint: 0 for endpoint in pool.endpoints}
+        self._changed = asyncio.Event()
+
+    async def acquire(self, model, exclude=(), candidates=None):
+        """Belegt einen Slot und liefert den gewählten Endpunkt; None, wenn keiner übrig ist"""
+        while True:
+            usable = [endpoint for endpoint in candidates or self.pool.endpoints if endpoint not in exclude]
+            usable = [endpoint for endpoint in usable if endpoint.healthy] or usable
+            if not usable:
+                return None
+            free = [endpoint for endpoint in usable if self.active[endpoint] < self.per_endpoint]
+            if free:
+                endpoint = self.pool.acquire(model, candidates=free)
+                self.active[endpoint] += 1
+                return endpoint
+            # Zwischen Prüfung und Warten liegt kein await, daher geht keine Freigabe verloren
+            self._changed.clear()
+            await self._changed.wait()
+
+    def release(self, endpoint, model=None, loaded=True, error=None):
+        """Gibt den Slot frei und meldet das Ergebnis an den Pool"""
+        self.pool.release(endpoint, model=model, loaded=loaded, error=error)
+        self.active[endpoint] -= 1
+        self._changed.set()
+
+
+class RequestEngine:
+    """Führt Ollama-Anfragen asynchron mit begrenzter Parallelität aus
+
+    Die Anfragen werden über einen EndpointPool auf einen oder mehrere
+    Ollama-Server verteilt; max_concurrency gilt pro Endpunkt.
+    """
+
+    def __init__(self, max_concurrency=DEFAULT_MAX_CONCURRENCY, host=None, cache=None,
+                 telemetry=None, hosts=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency muss mindestens 1 sein")
+        self.max_concurrency = max_concurrency
+        self.host = host
+        self.pool = EndpointPool(hosts or [host], slots=max_concurrency)
+        # Optionaler ResponseCache für vollständige Antworten
+        self.cache = cache
+        # Optionale Telemetry, die jede Antwort mit Warte- und Laufzeiten erfasst
+        self.telemetry = telemetry
+
+    def run(self, coro, cancel_event=None):
+        """Führt eine Coroutine in einer eigenen Event-Loop aus (blockierend)
+
+        Gedacht für Worker-Threads: jeder Aufruf bekommt eigene AsyncClients
+        und eigene Slots pro Endpunkt, sodass parallele Threads sich nicht
+        gegenseitig beeinflussen. Wird cancel_event (threading.Event)
+        gesetzt, werden alle laufenden Anfragen abgebrochen und
+        asyncio.CancelledError ausgelöst.
+        """
+        return asyncio.run(self._run(coro, cancel_event))
+
+    async def _run(self, coro, cancel_event=None):
+        # Erst bei der ersten Anfrage importieren, das verkürzt den Programmstart
+        import httpx
+        import ollama
+
+        timeout = httpx.Timeout(self.pool.request_timeout, connect=CONNECT_TIMEOUT)
+        async with contextlib.AsyncExitStack() as stack:
+            clients = {
+                endpoint.host: await stack.enter_async_context(
+                    ollama.AsyncClient(host=endpoint.host, timeout=timeout)
+                )
+                for endpoint in self.pool.endpoints
+            }
+            if self.pool.needs_check():
+                await self.pool.check_health(clients)
+            token = _session.set((clients, EndpointSlots(self.pool, self.max_concurrency)))
+            try:
+                if cancel_event is None:
+                    return await coro
+                return await _cancellable(coro, cancel_event)
+            finally:
+                _session.reset(token)
+
+    async def generate(self, on_token=None, label="generate", **kwargs):
+        """Sendet eine generate-Anfrage, sobald ein Slot frei ist
+
+        Mit on_token wird die Antwort gestreamt: jedes Textfragment geht sofort
+        an den Callback, zurückgegeben wird die zusammengesetzte Antwort.
+        label benennt den Aufruf in der Telemetrie.
+        """
+        use_cache = self.cache is not None
+        if use_cache:
+            cached = self.cache.get(kwargs)
+            if cached is not None:
+                if on_token is not None:
+                    on_token(cached["response"])
+                self._record(label, kwargs, cached, 0.0, 0.0, cached=True)
+                return cached
+        queued = time.perf_counter()
+        if on_token is None:
+            response, endpoint, started = await self._dispatch(
+                kwargs.get("model"), lambda client: client.generate(**kwargs)
+            )
+        else:
+            response, endpoint, started = await self._dispatch(
+                kwargs.get("model"), lambda client: self._stream(client, on_token, kwargs)
+            )
+        finished = time.perf_counter()
+        self._record(label, kwargs, response, started - queued, finished - started, endpoint=endpoint)
+        if use_cache:
+            self.cache.put(kwargs, response)
+        return response
+
+    async def load_model(self, model, keep_alive, label="load"):
+        """Lädt ein Modell ohne Generierung bzw. entlädt es mit keep_alive=0
+
+        Läuft am Cache vorbei, da nur der Nebeneffekt im Server zählt.
+        """
+        request = {"model": model, "prompt": "", "keep_alive": keep_alive}
+        unload = keep_alive in (0, "0", "0s")
+        queued = time.perf_counter()
+        if unload:
+            # Entladen betrifft jeden Endpunkt, der das Modell geladen haben könnte
+            results = await asyncio.gather(*(
+                self._dispatch(model, lambda client: client.generate(**request), unload=True, endpoint=endpoint)
+                for endpoint in self.pool.endpoints
+            ), return_exceptions=True)
+            response, endpoint, started = next(
+                (result for result in results if not isinstance(result, BaseException)), ({}, None, queued)
+            )
+        else:
+            response, endpoint, started = await self._dispatch(model, lambda client: client.generate(**request))
+        finished = time.perf_counter()
+        self._record(label, request, response, started - queued, finished - started, endpoint=endpoint)
+        return response
+
+    async def embed(self, label="embed", **kwargs):
+        """Berechnet Embeddings, sobald ein Slot frei ist"""
+        queued = time.perf_counter()
+        response, endpoint, started = await self._dispatch(
+            kwargs.get("model"), lambda client: client.embed(**kwargs)
+        )
+        finished = time.perf_counter()
+        self._record(label, kwargs, response, started - queued, finished - started, endpoint=endpoint)
+        return response
+
+    async def _dispatch(self, model, call, unload=False, endpoint=None):
+        """Führt call(client) auf dem gewählten Endpunkt aus, bei Ausfall auf dem nächsten
+
+        Wartet auf einen freien Slot und liefert (Antwort, Endpunkt, Zeitpunkt
+        des ersten Slots). Mit endpoint wird genau dieser Endpunkt verwendet,
+        ohne Ausweichen.
+        """
+        clients, slots = _current_session()
+        candidates = [endpoint] if endpoint is not None else None
+        tried = []
+        last_error = None
+        started = None
+        while True:
+            chosen = await slots.acquire(model, exclude=tried, candidates=candidates)
+            if chosen is None:
+                raise last_error
+            started = started or time.perf_counter()
+            tried.append(chosen)
+            try:
+                response = await call(clients[chosen.host])
+            except Exception as e:
+                if not _is_failover_error(e):
+                    slots.release(chosen)
+                    raise
+                slots.release(chosen, error=e)
+                last_error = e
+                continue
+            except BaseException:
+                # Abbruch (CancelledError): nur die offene Anfrage freigeben
+                slots.release(chosen)
+                raise
+            slots.release(chosen, model=model, loaded=not unload)
+            return response, chosen, started
+
+    def _record(self, label, request, response, queue_seconds, wall_seconds, cached=False,
+                endpoint=None):
+        """Gibt die Metriken eines Aufrufs an die Telemetrie weiter"""
+        if self.telemetry is not None:
+            self.telemetry.record_call(
+                label, request, response, queue_seconds, wall_seconds, cached=cached,
+                endpoint=endpoint.name if endpoint is not None else None
+            )
+
+    async def _stream(self, client, on_token, request):
+        """Liest eine Streaming-Antwort und setzt sie zu einer Antwort zusammen"""
+        parts = []
+        last_chunk = None
+        try:
+            async for chunk in await client.generate(**dict(request, stream=True)):
+                if chunk["response"]:
+                    parts.append(chunk["response"])
+                    on_token(chunk["response"])
+                last_chunk = chunk
+        except Exception as e:
+            if parts and _is_failover_error(e):
+                # Bereits gestreamte Tokens lassen sich nicht zurücknehmen, daher kein Ausweichen
+                raise RuntimeError(f"Stream abgebrochen nach {len(parts)} Fragmenten: {e}") from e
+            raise
+        # Der letzte Chunk trägt die Metriken (eval_count, durations, context)
+        response = response_to_dict(last_chunk) if last_chunk is not None else {}
+        response["response"] = "".join(parts)
+        return response
+
+
+async def _cancellable(coro, cancel_event):
+    """Führt coro aus und bricht sie ab, sobald cancel_event gesetzt ist"""
+    # Der Task übernimmt den Kontext samt Sitzung
+    task = asyncio.ensure_future(coro)
+    while not task.done():
+        if cancel_event.is_set():
+            # Schließt die offenen HTTP-Verbindungen, Ollama beendet die Generierung
+            task.cancel()
+            break
+        await asyncio.wait({task}, timeout=CANCEL_POLL_SECONDS)
+    return await task
+
+
+def _is_failover_error(error):
+    """Fehler, bei denen die Anfrage auf einem anderen Endpunkt wiederholt wird"""
+    import httpx
+    import ollama
+
+    if isinstance(error, (httpx.TransportError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    return isinstance(error, ollama.ResponseError) and error.status_code >= 500
+
+
+def _current_session():
+    """Liefert Clients und Slots der laufenden RequestEngine.run()-Sitzung"""
+    try:
+        return _session.get()
+    except LookupError:
+        raise RuntimeError("Anfragen müssen innerhalb von RequestEngine.run() laufen")
@@ -0,0 +1,371 @@
+import argparse
+import json
+import os
+import re
+import time
+from array import array
+
+import numpy as np
+
+DEFAULT_STORE_DIR = "patent_store"
+# Trennzeichen mehrwertiger Felder im Lens-Export
+MULTI_VALUE_SEPARATOR = ";;"
+# Zeilen pro eingelesenem CSV-Block, begrenzt den Speicherbedarf beim Import
+IMPORT_CHUNK_ROWS = 50000
+
+# Mehrwertige Spalten -> Vokabular, in das ihre Werte interniert werden
+MULTI_VALUED_COLUMNS = {
+    "CPC Classifications": "classification",
+    "IPCR Classifications": "classification",
+    "US Classifications": "us_classification",
+    "Simple Family Members": "lens_id",
+    "Extended Family Members": "lens_id",
+    "Simple Family Member Jurisdictions": "jurisdiction",
+    "Extended Family Member Jurisdictions": "jurisdiction",
+    "Applicants": "party",
+    "Inventors": "party",
+    "Owners": "party",
+    "Priority Numbers": "priority",
+    "NPL Resolved Lens ID(s)": "npl_lens_id",
+}
+# Einwertige Spalten mit wenigen Ausprägungen
+CATEGORICAL_COLUMNS = {
+    "Jurisdiction": "jurisdiction",
+    "Kind": "kind",
+    "Document Type": "document_type",
+    "Legal Status": "legal_status",
+    "Has Full Text": "flag",
+}
+INTEGER_COLUMNS = (
+    "Publication Year", "Cites Patent Count", "Cited by Patent Count",
+    "Simple Family Size", "Extended Family Size", "Sequence Count",
+    "NPL Citation Count", "NPL Resolved Citation Count",
+)
+# Fehlende Werte in Integer- und Kategorie-Spalten
+MISSING = -1
+
+_SCHEMA_FILE = "schema.json"
+
+
+def _slug(column):
+    """Dateiname für eine Spalte"""
+    return re.sub(r"[^0-9a-z]+", "_", column.lower()).strip("_") or "col"
+
+
+def split_values(value):
+    """Zerlegt ein mehrwertiges Lens-Feld; Duplikate entfallen, Reihenfolge bleibt"""
+    if not value:
+        return []
+    parts = (part.strip() for part in value.split(MULTI_VALUE_SEPARATOR))
+    return list(dict.fromkeys(part for part in parts if part))
+
+
+def _parse_int(value):
+    """Liest eine Zahl; leere oder verrutschte Felder gelten als fehlend"""
+    try:
+        return int(float(value))
+    except (ValueError, OverflowError):
+        # OverflowError: "inf" lässt sich als float lesen, aber nicht als int
+        return MISSING
+
+
+def write_strings(path, values):
+    """Schreibt Zeichenketten als UTF-8-Blob (path.bin) mit Offsets (path.offsets.npy)"""
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    with open(f"{path}.bin", "wb") as f:
+        for number, value in enumerate(values, start=1):
+            encoded = value.encode("utf-8")
+            f.write(encoded)
+            offsets[number] = offsets[number - 1] + len(encoded)
+    np.save(f"{path}.offsets.npy", offsets)
+
+
+class StringTable:
+    """Memory-gemappte Zeichenketten aus write_strings; dekodiert wird erst beim Zugriff"""
+
+    def __init__(self, path):
+        self.offsets = np.load(f"{path}.offsets.npy", mmap_mode="r")
+        blob = f"{path}.bin"
+        self.data = (np.memmap(blob, dtype=np.uint8, mode="r") if os.path.getsize(blob)
+                     else np.empty(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.data[self.offsets[i]:self.offsets[i + 1]]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _Vocabulary:
+    """Interniert Zeichenketten zu fortlaufenden Integer-IDs"""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+
+    def intern(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+def import_csv(csv_path, store_dir=DEFAULT_STORE_DIR, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Konvertiert einen Lens-CSV-Export in einen spaltenorientierten Store
+
+    Textspalten landen als UTF-8-Blob mit Offsets, Kategorien und mehrwertige
+    Felder als internierte IDs (mehrwertige mit Offset-Array pro Zeile).
+    """
+    import pandas as pd
+
+    os.makedirs(store_dir, exist_ok=True)
+    vocabularies = {}
+    columns = {}
+    rows = 0
+
+    # Spaltenzustand wird beim ersten Block angelegt und dann fortgeschrieben
+    text_files = {}
+    buffers = {}
+
+    def vocabulary(domain):
+        return vocabularies.setdefault(domain, _Vocabulary())
+
+    reader = pd.read_csv(
+        csv_path, dtype=str, keep_default_na=False, encoding="utf-8-sig", chunksize=chunk_rows
+    )
+    try:
+        for chunk in reader:
+            if not columns:
+                for column in chunk.columns:
+                    slug = _slug(column)
+                    if column in MULTI_VALUED_COLUMNS:
+                        columns[column] = {"kind": "multi", "file": slug,
+                                           "domain": MULTI_VALUED_COLUMNS[column]}
+                        buffers[column] = (array("i"), array("q", [0]))
+                    elif column in CATEGORICAL_COLUMNS:
+                        columns[column] = {"kind": "category", "file": slug,
+                                           "domain": CATEGORICAL_COLUMNS[column]}
+                        buffers[column] = array("i")
+                    elif column in INTEGER_COLUMNS:
+                        columns[column] = {"kind": "int", "file": slug}
+                        buffers[column] = array("q")
+                    else:
+                        columns[column] = {"kind": "text", "file": slug}
+                        text_files[column] = open(os.path.join(store_dir, f"{slug}.bin"), "wb")
+                        buffers[column] = array("q", [0])
+
+            for column, spec in columns.items():
+                values = chunk[column].tolist()
+                kind = spec["kind"]
+                if kind == "multi":
+                    ids, offsets = buffers[column]
+                    vocab = vocabulary(spec["domain"])
+                    for value in values:
+                        ids.extend(vocab.intern(v) for v in split_values(value))
+                        offsets.append(len(ids))
+                elif kind == "category":
+                    vocab = vocabulary(spec["domain"])
+                    buffers[column].extend(
+                        vocab.intern(v.strip()) if v.strip() else MISSING for v in values
+                    )
+                elif kind == "int":
+                    buffers[column].extend(_parse_int(v) for v in values)
+                else:
+                    offsets = buffers[column]
+                    blob = bytearray()
+                    for value in values:
+                        encoded = value.encode("utf-8")
+                        blob += encoded
+                        offsets.append(offsets[-1] + len(encoded))
+                    text_files[column].write(blob)
+            rows += len(chunk)
+    finally:
+        for f in text_files.values():
+            f.close()
+
+    for column, spec in columns.items():
+        path = os.path.join(store_dir, spec["file"])
+        if spec["kind"] == "multi":
+            ids, offsets = buffers[column]
+            np.save(f"{path}.ids.npy", np.frombuffer(ids, dtype=np.int32))
+            np.save(f"{path}.offsets.npy", np.frombuffer(offsets, dtype=np.int64))
+        elif spec["kind"] == "category":
+            np.save(f"{path}.npy", np.frombuffer(buffers[column], dtype=np.int32))
+        elif spec["kind"] == "int":
+            np.save(f"{path}.npy", np.frombuffer(buffers[column], dtype=np.int64))
+        else:
+            np.save(f"{path}.offsets.npy", np.frombuffer(buffers[column], dtype=np.int64))
+
+    # Vokabulare (bei Familienmitgliedern und Anmeldern Millionen Werte) liegen neben dem Schema
+    vocabulary_files = {}
+    for domain, vocab in vocabularies.items():
+        vocabulary_files[domain] = f"vocab_{_slug(domain)}"
+        write_strings(os.path.join(store_dir, vocabulary_files[domain]), vocab.values)
+    schema = {
+        "rows": rows,
+        "source": os.path.basename(csv_path),
+        "columns": columns,
+        "vocabularies": vocabulary_files,
+    }
+    with open(os.path.join(store_dir, _SCHEMA_FILE), "w", encoding="utf-8") as f:
+        json.dump(schema, f, ensure_ascii=False)
+    return PatentStore.load(store_dir)
+
+
+class PatentStore:
+    """Lesender Zugriff auf einen importierten Lens-Export
+
+    Alle Arrays werden memory-gemappt; Zeichenketten werden erst beim Zugriff
+    dekodiert, auch die der Vokabulare. Mehrwertige Felder liefern
+    internierte IDs oder deren Werte.
+    """
+
+    def __init__(self, store_dir, schema):
+        self.store_dir = store_dir
+        self.schema = schema
+        self.columns = schema["columns"]
+        # Domäne -> Dateiname des Vokabulars, geöffnet beim ersten Zugriff
+        self.vocabularies = schema["vocabularies"]
+        self._arrays = {}
+        self._tables = {}
+
+    @classmethod
+    def load(cls, store_dir=DEFAULT_STORE_DIR):
+        """Öffnet einen Store; geladen wird zunächst nur das Schema"""
+        with open(os.path.join(store_dir, _SCHEMA_FILE), encoding="utf-8") as f:
+            return cls(store_dir, json.load(f))
+
+    @classmethod
+    def exists(cls, store_dir=DEFAULT_STORE_DIR):
+        """Prüft, ob unter store_dir ein Store liegt"""
+        return os.path.exists(os.path.join(store_dir, _SCHEMA_FILE))
+
+    def __len__(self):
+        return self.schema["rows"]
+
+    def _array(self, name, dtype=None):
+        """Lädt ein Array einmalig als Memory-Map"""
+        array_ = self._arrays.get(name)
+        if array_ is None:
+            path = os.path.join(self.store_dir, name)
+            if dtype is None:
+                array_ = np.load(path, mmap_mode="r")
+            elif os.path.getsize(path) == 0:
+                array_ = np.empty(0, dtype=dtype)
+            else:
+                array_ = np.memmap(path, dtype=dtype, mode="r")
+            self._arrays[name] = array_
+        return array_
+
+    def _spec(self, column, kind):
+        spec = self.columns.get(column)
+        if spec is None:
+            raise KeyError(f"Spalte {column!r} nicht im Store")
+        if spec["kind"] != kind:
+            raise TypeError(f"Spalte {column!r} ist vom Typ {spec['kind']}, nicht {kind}")
+        return spec
+
+    def has_column(self, column):
+        """Prüft, ob der Export die Spalte enthält"""
+        return column in self.columns
+
+    def text(self, column, row):
+        """Liefert den Text einer Zeile"""
+        spec = self._spec(column, "text")
+        offsets = self._array(f"{spec['file']}.offsets.npy")
+        data = self._array(f"{spec['file']}.bin", dtype=np.uint8)
+        return bytes(data[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def ids(self, column, row):
+        """Liefert die internierten IDs eines mehrwertigen Feldes"""
+        spec = self._spec(column, "multi")
+        offsets = self._array(f"{spec['file']}.offsets.npy")
+        return self._array(f"{spec['file']}.ids.npy")[offsets[row]:offsets[row + 1]]
+
+    def multi_arrays(self, column):
+        """Liefert (IDs, Offsets) eines mehrwertigen Feldes für vektorisierte Auswertungen"""
+        spec = self._spec(column, "multi")
+        return (self._array(f"{spec['file']}.ids.npy"),
+                self._array(f"{spec['file']}.offsets.npy"))
+
+    def values(self, column, row):
+        """Liefert die Werte eines mehrwertigen Feldes als Zeichenketten"""
+        vocabulary = self.vocabulary(column)
+        return [vocabulary[i] for i in self.ids(column, row)]
+
+    def codes(self, column):
+        """Liefert das Integer-Array einer Kategorie- oder Integer-Spalte"""
+        spec = self.columns[column]
+        if spec["kind"] not in ("category", "int"):
+            raise TypeError(f"Spalte {column!r} ist vom Typ {spec['kind']}")
+        return self._array(f"{spec['file']}.npy")
+
+    def category(self, column, row):
+        """Liefert den Wert einer Kategorie-Spalte oder None"""
+        code = self.codes(column)[row]
+        return None if code == MISSING else self.vocabulary(column)[code]
+
+    def vocabulary(self, column):
+        """Liefert das Vokabular einer internierten Spalte (ID -> Wert)"""
+        domain = self.columns[column]["domain"]
+        table = self._tables.get(domain)
+        if table is None:
+            table = self._tables[domain] = StringTable(os.path.join(self.store_dir, self.vocabularies[domain]))
+        return table
+
+    def row(self, row):
+        """Liefert eine Zeile als Dictionary"""
+        record = {}
+        for column, spec in self.columns.items():
+            if spec["kind"] == "text":
+                record[column] = self.text(column, row)
+            elif spec["kind"] == "multi":
+                record[column] = self.values(column, row)
+            elif spec["kind"] == "category":
+                record[column] = self.category(column, row)
+            else:
+                value = int(self.codes(column)[row])
+                record[column] = None if value == MISSING else value
+        return record
+
+    def to_dataframe(self, columns=None, rows=None):
+        """Baut ein DataFrame aus ausgewählten Spalten und Zeilen"""
+        import pandas as pd
+
+        columns = [c for c in (columns or self.columns) if c in self.columns]
+        rows = range(len(self)) if rows is None else rows
+        data = {column: [] for column in columns}
+        for row in rows:
+            for column in columns:
+                kind = self.columns[column]["kind"]
+                if kind == "text":
+                    data[column].append(self.text(column, row))
+                elif kind == "multi":
+                    data[column].append(MULTI_VALUE_SEPARATOR.join(self.values(column, row)))
+                elif kind == "category":
+                    data[column].append(self.category(column, row))
+                else:
+                    value = int(self.codes(column)[row])
+                    data[column].append(None if value == MISSING else value)
+        return pd.DataFrame(data, columns=columns)
+
+
+def main():
+    """Importiert einen Lens-CSV-Export in den spaltenorientierten Store"""
+    parser = argparse.ArgumentParser(description="Lens-Export in einen spaltenorientierten Store importieren")
+    parser.add_argument("csv", help="Lens-Export, z.B. patentdb.csv")
+    parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=IMPORT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = import_csv(args.csv, args.store_dir, args.chunk_rows)
+    print(f"{len(store)} Patente in {time.perf_counter() - started:.1f} s importiert nach '{args.store_dir}'")
+
+
+if __name__ == "__main__":
+    main()
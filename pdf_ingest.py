@@ -0,0 +1,253 @@
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from batching import truncate_to_tokens
+from classification_index import extract_codes
+from patent_store import MULTI_VALUE_SEPARATOR
+from sqlite_store import SqliteStore
+
+DEFAULT_PDF_CACHE_PATH = "pdf_text.sqlite"
+PDF_EXTENSIONS = (".pdf",)
+# Seiten pro Aufgabe im Prozesspool; lange Patentschriften verteilen sich auf mehrere Kerne
+PAGES_PER_TASK = 8
+# Gelesene PDFs pro Analyse-Block; die LLM-Stufe beginnt mit dem ersten Block
+PDF_CHUNK_FILES = 20
+# Gelesene Blöcke beim Hashen einer Datei
+HASH_BLOCK_BYTES = 1024 * 1024
+# Längen der Abschnitte im Prompt; von den Ansprüchen zählt vor allem der erste
+TITLE_CHARS = 300
+ABSTRACT_TOKENS = 300
+CLAIMS_TOKENS = 600
+
+# INID-Codes der Titelseite, z.B. "(54) Titel" oder "(57) Zusammenfassung"
+_INID_PATTERN = re.compile(r"^\s*\((\d{2})\)\s*", re.MULTILINE)
+_ABSTRACT_HEADING = re.compile(r"^\s*(?:abstract|zusammenfassung)(?: of the disclosure)?\s*:?\s*$",
+                               re.IGNORECASE | re.MULTILINE)
+_CLAIMS_HEADING = re.compile(
+    r"^\s*(?:claims|what is claimed is|we claim|i claim|patentansprüche|ansprüche|revendications)\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+_DESCRIPTION_HEADING = re.compile(
+    r"^\s*(?:description|beschreibung|technical field|background(?: of the invention)?)\s*:?\s*$",
+    re.IGNORECASE | re.MULTILINE
+)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def file_hash(path):
+    """SHA-256 über den Dateiinhalt; Schlüssel des Text-Caches"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def count_pages(path):
+    """Seitenzahl einer PDF-Datei; läuft im Prozesspool"""
+    from PyPDF2 import PdfReader
+
+    return len(PdfReader(path).pages)
+
+
+def extract_pages(path, start, stop):
+    """Extrahiert den Text der Seiten start bis stop (exklusiv); läuft im Prozesspool"""
+    from PyPDF2 import PdfReader
+
+    reader = PdfReader(path)
+    return [reader.pages[number].extract_text() or "" for number in range(start, stop)]
+
+
+def _clean(text):
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def _inid_fields(text):
+    """INID-Code -> Text bis zum nächsten Code"""
+    parts = _INID_PATTERN.split(text)
+    return {code: _clean(value) for code, value in zip(parts[1::2], parts[2::2])}
+
+
+def _section(text, heading, end_headings):
+    """Text nach der ersten Überschrift bis zur nächsten der end_headings, leer ohne Überschrift"""
+    match = heading.search(text)
+    if match is None:
+        return ""
+    rest = text[match.end():]
+    ends = [found.start() for pattern in end_headings if (found := pattern.search(rest))]
+    return _clean(rest[:min(ends)] if ends else rest)
+
+
+def patent_record(pages, path):
+    """Zerlegt den Text einer Patentschrift in die Prompt-Spalten (wie ingest.PROMPT_COLUMNS)"""
+    first_page = pages[0] if pages else ""
+    text = "\n".join(pages)
+    inid = _inid_fields(first_page)
+
+    title = inid.get("54") or next((_clean(line) for line in first_page.splitlines() if line.strip()), "")
+    abstract = inid.get("57") or _section(text, _ABSTRACT_HEADING, (_CLAIMS_HEADING, _DESCRIPTION_HEADING))
+    claims = _section(text, _CLAIMS_HEADING, (_DESCRIPTION_HEADING, _ABSTRACT_HEADING))
+    codes = extract_codes(inid.get("51") or first_page, "subgroup")
+    return {
+        "Title": title[:TITLE_CHARS] or os.path.splitext(os.path.basename(path))[0],
+        "Abstract": truncate_to_tokens(abstract, ABSTRACT_TOKENS),
+        "Claims": truncate_to_tokens(claims, CLAIMS_TOKENS),
+        "IPCR Classifications": MULTI_VALUE_SEPARATOR.join(codes),
+        # Veröffentlichungsnummer für die Duplikaterkennung, sonst der Dateiname
+        "Lens ID": _clean(inid.get("11", "")) or os.path.splitext(os.path.basename(path))[0],
+    }
+
+
+def collect_pdfs(paths):
+    """PDF-Dateien aus Dateipfaden und Verzeichnissen (nicht rekursiv), sortiert und eindeutig"""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(os.path.join(path, name) for name in sorted(os.listdir(path)))
+        else:
+            found.append(path)
+    return list(dict.fromkeys(
+        path for path in found if path.lower().endswith(PDF_EXTENSIONS) and os.path.isfile(path)
+    ))
+
+
+class PdfTextCache(SqliteStore):
+    """Persistenter SQLite-Cache des extrahierten Textes pro Dateihash
+
+    Eine erneut abgelegte oder umbenannte Datei wird nicht noch einmal
+    gelesen; die Zerlegung in Abschnitte läuft auf dem gespeicherten Text.
+    """
+
+    TABLE = "pdf_text"
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS pdf_text (
+            hash TEXT PRIMARY KEY,
+            pages TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )""",
+    )
+
+    def __init__(self, path=DEFAULT_PDF_CACHE_PATH, enabled=True):
+        # Bei False wird weder gelesen noch geschrieben
+        super().__init__(path, enabled)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, digest):
+        """Liefert die Seitentexte zu einem Dateihash oder None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT pages FROM pdf_text WHERE hash = ?", (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, digest, pages):
+        """Speichert die Seitentexte einer Datei"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pdf_text VALUES (?, ?, ?)",
+                (digest, json.dumps(pages, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """Liefert Treffer, Fehlgriffe und Anzahl gespeicherter Dateien"""
+        (entries,) = self._aggregate("COUNT(*)", (0,))
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+def iter_pdf_records(paths, executor, cache=None, pages_per_task=PAGES_PER_TASK, cancel_event=None):
+    """Liest PDFs parallel und liefert (Pfad, Datensatz, Fehler) in Fertigstellungsreihenfolge
+
+    Jede Datei wird im executor (ProcessPoolExecutor) gehasht; nur ohne
+    Cache-Treffer wird sie geöffnet und in Seitenbereiche zu pages_per_task
+    Seiten zerlegt. Ein Hilfsthread plant die Aufgaben ab dem Aufruf
+    unabhängig vom Verbraucher, sodass die Kerne weiterlesen, während die
+    ersten Datensätze schon analysiert werden. Bei einem Fehler ist der
+    Datensatz None; jede Datei wird höchstens einmal gemeldet. Ein Fehler
+    der Planung selbst wird beim Weiterlesen ausgelöst. cancel_event beendet
+    die Planung.
+    """
+    results = queue.Queue()
+    finished = object()
+    pending = {}
+    # Pfad -> [Hash, Seitentexte pro Bereich, offene Bereiche]
+    files = {}
+
+    def handle(kind, path, position, value):
+        if kind == "hash":
+            pages = cache.get(value) if cache is not None else None
+            if pages is not None:
+                results.put((path, patent_record(pages, path), None))
+            else:
+                pending[executor.submit(count_pages, path)] = ("count", path, value)
+        elif kind == "count":
+            digest, page_count = position[0], value
+            if page_count == 0:
+                results.put((path, patent_record([], path), None))
+                return
+            ranges = range(0, page_count, pages_per_task)
+            files[path] = [digest, [None] * len(ranges), len(ranges)]
+            for number, start in enumerate(ranges):
+                stop = min(start + pages_per_task, page_count)
+                pending[executor.submit(extract_pages, path, start, stop)] = ("pages", path, number)
+        elif path in files:
+            entry = files[path]
+            entry[1][position[0]] = value
+            entry[2] -= 1
+            if entry[2] == 0:
+                del files[path]
+                pages = [page for part in entry[1] for page in part]
+                if cache is not None:
+                    cache.put(entry[0], pages)
+                results.put((path, patent_record(pages, path), None))
+
+    def schedule():
+        # Bereits gemeldete Dateien; ihre übrigen Aufgaben werden verworfen
+        failed = set()
+        try:
+            pending.update({executor.submit(file_hash, path): ("hash", path) for path in paths})
+            while pending and not (cancel_event is not None and cancel_event.is_set()):
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, path, *position = pending.pop(future)
+                    if path in failed:
+                        continue
+                    try:
+                        # Auch Fehler bei Cache und Zerlegung gehören zur Datei
+                        handle(kind, path, position, future.result())
+                    except Exception as e:
+                        failed.add(path)
+                        files.pop(path, None)
+                        for other, (_, other_path, *_) in pending.items():
+                            if other_path == path:
+                                other.cancel()
+                        results.put((path, None, e))
+        except Exception as e:
+            # Fehler des Planers selbst: der Verbraucher bekommt ihn statt eines stillen Endes
+            results.put(e)
+        finally:
+            for future in pending:
+                future.cancel()
+            results.put(finished)
+
+    def drain():
+        while (item := results.get()) is not finished:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    threading.Thread(target=schedule, name="pdf-ingest", daemon=True).start()
+    return drain()
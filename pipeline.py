@@ -0,0 +1,630 @@
+import asyncio
+import json
+import re
+import threading
+import time
+
+from batching import (
+    DEFAULT_CONTEXT_TOKENS, RESERVED_OUTPUT_TOKENS, batch_budget, batch_content,
+    count_tokens, merge_verdicts, pack_rows, row_to_text, truncate_to_tokens
+)
+from bm25_index import DEFAULT_BM25_DIR, PRIOR_ART_HITS, BM25Index
+from cascade import (
+    DEFAULT_CALIBRATION_PATH, STAGE_MODEL, calibrated_band, screen, screening_probabilities
+)
+from classification_index import DEFAULT_CLASSIFICATION_DIR, ClassificationIndex
+from dedup import DuplicateFinder, collapse_rows, expand_verdicts
+from ensemble import (
+    DEFAULT_KEEP_ALIVE, DEFAULT_MODELS, DEFAULT_PARALLEL_MODELS, agreement_summary,
+    combine_verdicts, model_groups
+)
+from ingest import INGEST_CHUNK_ROWS, iter_chunks, prompt_fields
+from llm_cache import ResponseCache
+from llm_engine import DEFAULT_MAX_CONCURRENCY, RequestEngine
+from pdf_ingest import PDF_CHUNK_FILES, iter_pdf_records
+from result_store import (
+    DEFAULT_RESULT_MAX_AGE, DEFAULT_RESULT_STORE_PATH, ResultStore, analysis_version, row_fingerprint
+)
+from telemetry import Telemetry
+from vector_index import (
+    DEFAULT_INDEX_DIR, DEFAULT_TOP_K, MAX_EMBED_TOKENS, VectorIndex, candidate_context
+)
+
+# Prompt-Vorlagen; {content} wird durch die Tabellenzeilen ersetzt
+KEYWORD_PROMPT = "Return keywords for a database search to find patents like {content}. No explanation, nothing else, just give us some keywords back."
+CANDIDATE_PROMPT = "Each row below is a new invention, starting with its row_id in square brackets and followed by similar existing patents. Judge for every row whether the invention conflicts with one of its listed patents:\n{content}\nAnswer with exactly {count} entries, one per row_id: verdict 1 indicates a potential conflict, 0 indicates no conflict, confidence is your certainty between 0 and 1."
+PATENT_PROMPT = "Rate these patents and judge for every row whether it is a potential patent conflict. Each row starts with its row_id in square brackets:\n{content}\nAnswer with exactly {count} entries, one per row_id: verdict 1 indicates a potential conflict, 0 indicates no conflict, confidence is your certainty between 0 and 1."
+
+# JSON-Schema für Ollamas strukturierte Ausgabe der Konfliktbewertung
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "verdicts": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "row_id": {"type": "integer"},
+                    "verdict": {"type": "integer", "enum": [0, 1]},
+                    "confidence": {"type": "number", "minimum": 0, "maximum": 1}
+                },
+                "required": ["row_id", "verdict", "confidence"]
+            }
+        }
+    },
+    "required": ["verdicts"]
+}
+# Ungefähre Antwortlänge pro Zeile; begrenzt die Zeilen pro Batch
+TOKENS_PER_VERDICT = 20
+# Wiederholungen nur für Zeilen ohne gültige Bewertung
+MAX_VERDICT_RETRIES = 2
+# Abschluss des statischen Prompt-Anfangs, wenn er vorab ausgewertet wird
+PREFIX_ACK = "\nReply with OK and wait for the rows."
+# Antwortlänge auf den Prompt-Anfang
+PREFIX_PREDICT_TOKENS = 2
+
+
+def load_rows(file_path, columns=None, chunk_rows=INGEST_CHUNK_ROWS):
+    """Liest eine Arbeitsmappe oder einen Lens-CSV-Export blockweise ein
+
+    Nur die projizierten Spalten werden gelesen und serialisiert; die
+    Duplikatsuche läuft pro Block mit. Liefert (Zeilen, Duplikate) mit
+    Duplikate = Zeilen-ID -> Repräsentant. Bewusst als Modulfunktion, damit
+    sie in einem Prozesspool laufen kann.
+    """
+    rows = []
+    finder = DuplicateFinder()
+    for chunk in iter_chunks(file_path, columns, chunk_rows):
+        for record in chunk:
+            row_id = len(rows) + 1
+            finder.add(row_id, record)
+            rows.append((row_id, row_to_text(row_id, prompt_fields(record, columns))))
+    return rows, finder.duplicates()
+
+
+def iter_pdf_rows(paths, executor, cache=None, chunk_files=PDF_CHUNK_FILES, on_error=None,
+                  cancel_event=None):
+    """Liest PDFs im Prozesspool und liefert die Zeilen blockweise wie load_rows
+
+    Ein Block entsteht, sobald chunk_files Dateien gelesen sind; die
+    Zeilen-IDs laufen über alle Blöcke weiter. Liefert (Zeilen, Duplikate,
+    Quellen) mit Quellen = Zeilen-ID -> PDF-Pfad. Duplikate werden über alle
+    Blöcke erkannt, enthalten aber nur Zeilen des Blocks; ihr Repräsentant
+    kann in einem früheren Block liegen, dessen Urteile analyze() dann als
+    known_verdicts braucht. on_error(Pfad, Fehler) meldet nicht lesbare
+    Dateien. Das Lesen beginnt schon beim Aufruf.
+    """
+    records = iter_pdf_records(paths, executor, cache, cancel_event=cancel_event)
+
+    # Ein Finder für alle Blöcke, damit Familien über Blockgrenzen zusammenfallen
+    finder = DuplicateFinder()
+
+    def chunks():
+        next_id = 1
+        pending = []
+        for path, record, error in records:
+            if error is not None:
+                if on_error is not None:
+                    on_error(path, error)
+                continue
+            pending.append((path, record))
+            if len(pending) < chunk_files:
+                continue
+            yield rows_from(pending, next_id)
+            next_id += len(pending)
+            pending = []
+        if pending:
+            yield rows_from(pending, next_id)
+
+    def rows_from(items, first_id):
+        rows = []
+        sources = {}
+        for row_id, (path, record) in enumerate(items, start=first_id):
+            finder.add(row_id, record)
+            rows.append((row_id, row_to_text(row_id, prompt_fields(record))))
+            sources[row_id] = path
+        # Repräsentant ist die kleinste Zeilen-ID, also dieser oder ein früherer Block
+        duplicates = {row_id: representative for row_id, representative in finder.duplicates().items()
+                      if row_id >= first_id}
+        return rows, duplicates, sources
+
+    return chunks()
+
+
+class PatentPipeline:
+    """Analyse-Pipeline ohne GUI: Vorauswahl, Batching, Keywords und Bewertung"""
+
+    def __init__(self, context_tokens=DEFAULT_CONTEXT_TOKENS,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True,
+                 index_dir=DEFAULT_INDEX_DIR, top_k=DEFAULT_TOP_K, on_status=None,
+                 host=None, classification_dir=DEFAULT_CLASSIFICATION_DIR,
+                 models=DEFAULT_MODELS, vote="majority", model_weights=None,
+                 parallel_models=DEFAULT_PARALLEL_MODELS, keep_alive=DEFAULT_KEEP_ALIVE,
+                 reuse_prefix=True, incremental=True, result_path=DEFAULT_RESULT_STORE_PATH,
+                 bm25_dir=DEFAULT_BM25_DIR, hosts=None, cascade=True, cascade_band=None,
+                 calibration_path=DEFAULT_CALIBRATION_PATH, use_index=True,
+                 result_max_age=DEFAULT_RESULT_MAX_AGE):
+        # Kontextfenster pro Anfrage, nach dem die Zeilen in Batches gepackt werden
+        self.context_tokens = context_tokens
+        # Persistenter Antwort-Cache; use_cache=False umgeht ihn vollständig
+        self.cache = ResponseCache(enabled=use_cache)
+        # Metriken aller Aufrufe (Ollama-Antworten, Warte- und Parse-Zeiten)
+        self.telemetry = Telemetry()
+        # Asynchrone Ausführung unabhängiger Ollama-Anfragen; mit hosts verteilt auf mehrere Server
+        self.engine = RequestEngine(
+            max_concurrency=max_concurrency, host=host, cache=self.cache,
+            telemetry=self.telemetry, hosts=hosts
+        )
+        # Referenzindex für die Vorauswahl; ohne Index oder mit use_index=False wird ohne Vorauswahl bewertet
+        self.reference_index = (
+            VectorIndex.load(index_dir) if use_index and VectorIndex.exists(index_dir) else None
+        )
+        # Klassifikationsindex: Kandidaten nur bei überlappenden CPC-/IPCR-Codes
+        self.classification_index = (
+            ClassificationIndex.load(classification_dir)
+            if use_index and ClassificationIndex.exists(classification_dir) else None
+        )
+        self.top_k = top_k
+        # Lokale Volltextsuche für die Recherche mit den extrahierten Keywords
+        self.keyword_index = BM25Index.load(bm25_dir) if BM25Index.exists(bm25_dir) else None
+        # Ensemble: alle Modelle bewerten dieselben Batches, Keywords liefert das erste
+        self.models = list(models)
+        self.vote = vote
+        self.model_weights = model_weights or {}
+        self.parallel_models = parallel_models
+        self.keep_alive = keep_alive
+        # Kennzahlen des letzten Laufs pro Thread, damit parallele Jobs sich nicht überschreiben
+        self._last_run = threading.local()
+        # Statischer Prompt-Anfang wird pro Modell einmal ausgewertet, die Batches
+        # setzen Ollamas context fort: (Modell, Prompt-Anfang, num_ctx) -> Tokens
+        self.reuse_prefix = reuse_prefix
+        self.prefix_contexts = {}
+        # Kaskade: eindeutige Zeilen entscheidet die Vorauswahl, nur unsichere gehen an das Modell
+        self.cascade = cascade
+        self.cascade_band = cascade_band or calibrated_band(calibration_path, self.models[0])
+        # Urteile früherer Analysen pro Zeile; incremental=False bewertet alles neu,
+        # nach result_max_age Sekunden ohne Nutzung verfallen sie
+        self.results = ResultStore(result_path, max_age=result_max_age, enabled=incremental)
+        # Callback für Statusmeldungen (z.B. die Status Bar der GUI)
+        self.on_status = on_status
+
+    @property
+    def last_agreement(self):
+        """Übereinstimmung der Modelle im letzten Lauf dieses Threads (nur bei mehreren Modellen)"""
+        return getattr(self._last_run, "agreement", None)
+
+    @last_agreement.setter
+    def last_agreement(self, value):
+        self._last_run.agreement = value
+
+    @property
+    def last_stored(self):
+        """Aus dem Ergebnis-Speicher übernommene Bewertungen im letzten Lauf dieses Threads"""
+        return getattr(self._last_run, "stored", 0)
+
+    @last_stored.setter
+    def last_stored(self, value):
+        self._last_run.stored = value
+
+    @property
+    def last_screened(self):
+        """Zeilen, die im letzten Lauf dieses Threads ohne Modell entschieden wurden"""
+        return getattr(self._last_run, "screened", 0)
+
+    @last_screened.setter
+    def last_screened(self, value):
+        self._last_run.screened = value
+
+    def warm_up(self):
+        """Lädt das erste Modell und pandas vorab, damit die erste Analyse nicht darauf wartet"""
+        import pandas  # noqa: F401
+
+        self.engine.run(self.engine.load_model(self.models[0], self.keep_alive, label="warmup"))
+
+    def update_status(self, message):
+        """Meldet einen Zwischenstand an den Status-Callback"""
+        if self.on_status is not None:
+            self.on_status(message)
+
+    def analysis_version(self):
+        """Kennung aller Einstellungen, von denen ein gespeichertes Urteil abhängt"""
+        # Ein neu gebauter Referenzindex liefert andere Kandidaten
+        references = [
+            len(index) if index is not None else None
+            for index in (self.reference_index, self.classification_index)
+        ]
+        return analysis_version(
+            self.patent_prompt(), VERDICT_SCHEMA, self.models, self.vote, self.model_weights,
+            references, self.top_k, self.cascade_band if self.cascade else None
+        )
+
+    def fingerprints(self, rows):
+        """Zeilen-ID -> Fingerabdruck des normalisierten Zeileninhalts"""
+        version = self.analysis_version()
+        return {row_id: row_fingerprint(text, version) for row_id, text in rows}
+
+    def prepare(self, rows, duplicates=None, cancel_event=None):
+        """Ergänzt Vergleichspatente und packt die Zeilen in Batches
+
+        Zeilen aus duplicates werden nicht bewertet, sondern übernehmen in
+        analyze() das Urteil ihres Repräsentanten. Zeilen mit gespeichertem
+        Urteil aus einer früheren Analyse kommen in keinen Batch, ebenso
+        Zeilen, die die Vorauswahl außerhalb des Unsicherheitsbands
+        entscheidet. Liefert (Zeilen, Batches); die Zeilen enthalten auch die
+        bereits bewerteten. cancel_event bricht die Kandidatensuche ab (siehe
+        RequestEngine.run).
+        """
+        started = time.perf_counter()
+        if duplicates:
+            rows = collapse_rows(rows, duplicates)
+            self.update_status(f"🧬 {len(duplicates)} Familienmitglieder/Duplikate zusammengefasst")
+        # Nur neue oder geänderte Zeilen gehen an das Modell
+        fingerprints = self.fingerprints(rows)
+        known = self.results.get_many(list(fingerprints.values()))
+        pending = [row for row in rows if fingerprints[row[0]] not in known]
+        if len(pending) < len(rows):
+            self.update_status(f"🗂️ {len(rows) - len(pending)} Zeilen bereits bewertet, {len(pending)} neu")
+        # Vorauswahl: nur die k ähnlichsten Referenzpatente gehen ins Prompt
+        self._last_run.screened_verdicts = {}
+        if self.has_reference() and pending:
+            self.update_status("🧭 Ähnliche Patente werden gesucht...")
+            hits, kinds = self.engine.run(self.find_candidates(pending), cancel_event)
+            if self.cascade:
+                pending, hits = self.screen_rows(pending, hits, kinds)
+            pending = self.with_candidates(pending, hits)
+
+        budget = batch_budget(self.patent_prompt(), self.context_tokens)
+        if self.reuse_prefix:
+            # Der vorab ausgewertete Anfang samt Antwort liegt mit im Kontext
+            budget -= count_tokens(PREFIX_ACK) + PREFIX_PREDICT_TOKENS
+        max_rows = RESERVED_OUTPUT_TOKENS // TOKENS_PER_VERDICT
+        batches = pack_rows(pending, budget, max_rows=max_rows)
+        self.telemetry.observe("prepare", time.perf_counter() - started)
+        return rows, batches
+
+    def analyze(self, rows, batches, stream_callback=None, duplicates=None, on_progress=None,
+                cancel_event=None, known_verdicts=None):
+        """Führt die Analyse blockierend aus und liefert (Keywords, Bericht, Bewertungen)
+
+        Neue Bewertungen werden im Ergebnis-Speicher abgelegt; Zeilen ohne
+        Batch erhalten ihr gespeichertes Urteil mit "from_store". Duplikate,
+        deren Repräsentant schon früher bewertet wurde, übernehmen dessen
+        Urteil aus known_verdicts.
+        on_progress(fertig, gesamt) meldet jeden fertigen Batch über alle
+        Modelle; cancel_event bricht die laufenden Anfragen ab.
+        """
+        keywords, (patent_analysis, verdicts) = self.engine.run(
+            self.run_analysis(rows, batches, stream_callback, on_progress), cancel_event
+        )
+        for verdict in verdicts.values():
+            if verdict is not None:
+                verdict["stage"] = STAGE_MODEL
+        # Urteile der Vorauswahl aus prepare() in diesem Thread
+        screened = getattr(self._last_run, "screened_verdicts", {})
+        verdicts.update(screened)
+        self.last_screened = len(screened)
+        fingerprints = self.fingerprints(rows)
+        self.results.put_many(
+            ((fingerprints[row_id], verdict) for row_id, verdict in verdicts.items()
+             if row_id in fingerprints),
+            self.analysis_version()
+        )
+
+        analyzed = {row_id for batch in batches for row_id, _ in batch} | set(screened)
+        skipped = {row_id: fingerprints[row_id] for row_id, _ in rows if row_id not in analyzed}
+        stored = self.results.get_many(list(skipped.values()))
+        for row_id, fingerprint in skipped.items():
+            verdict = stored.get(fingerprint)
+            verdicts[row_id] = {**verdict, "from_store": True} if verdict else None
+        verdicts = dict(sorted(verdicts.items()))
+        self.last_stored = sum(1 for verdict in verdicts.values() if verdict and verdict.get("from_store"))
+        if self.last_stored:
+            patent_analysis = (
+                f"{self.last_stored} Bewertungen aus früheren Analysen übernommen.\n\n{patent_analysis}"
+            ).strip()
+        if self.last_screened:
+            patent_analysis = (
+                f"{self.last_screened} Zeilen durch die Vorauswahl entschieden "
+                f"(Band {self.cascade_band[0]:.2f}-{self.cascade_band[1]:.2f}).\n\n{patent_analysis}"
+            ).strip()
+        if duplicates:
+            verdicts = expand_verdicts(verdicts, duplicates, known_verdicts)
+        return keywords, patent_analysis, verdicts
+
+    async def run_analysis(self, rows, batches, stream_callback=None, on_progress=None):
+        """Startet Keyword-Extraktion und Patent-Analyse parallel
+
+        stream_callback(section) liefert für "keywords" bzw. die Batch-Nummer
+        einen Token-Callback oder None.
+        """
+        stream_callback = stream_callback or (lambda section: None)
+        total = len(batches) * len(self.models)
+        completed = 0
+
+        def batch_done():
+            nonlocal completed
+            completed += 1
+            if on_progress is not None:
+                on_progress(completed, total)
+
+        return await asyncio.gather(
+            self.extract_keywords(batch_content(rows), stream_callback("keywords")),
+            self.analyze_ensemble(batches, stream_callback, batch_done)
+        )
+
+    def has_reference(self):
+        """Prüft, ob ein Referenzindex für die Vorauswahl geladen ist"""
+        return self.reference_index is not None or self.classification_index is not None
+
+    def patent_prompt(self):
+        """Liefert die Prompt-Vorlage für die Konfliktbewertung"""
+        return CANDIDATE_PROMPT if self.has_reference() else PATENT_PROMPT
+
+    async def find_candidates(self, rows, batch_size=32):
+        """Sucht pro Zeile die k ähnlichsten Patente aus den Referenzindizes
+
+        Zeilen mit Klassifikationscodes erhalten Kandidaten aus dem
+        Klassifikationsindex; die übrigen Zeilen werden per Embedding gesucht.
+        Liefert (Treffer, Herkunft) pro Zeile, Herkunft ist "classification"
+        oder "vector".
+        """
+        results = [[] for _ in rows]
+        kinds = ["classification"] * len(rows)
+        if self.classification_index is not None:
+            results = self.classification_index.search(
+                [self.classification_index.query_codes(text) for _, text in rows], self.top_k
+            )
+
+        missing = [i for i, hits in enumerate(results) if not hits]
+        if self.reference_index is not None and missing:
+            texts = [truncate_to_tokens(rows[i][1], MAX_EMBED_TOKENS) for i in missing]
+            responses = await asyncio.gather(*(
+                self.engine.embed(label="embed", model=self.reference_index.model, input=texts[start:start + batch_size])
+                for start in range(0, len(texts), batch_size)
+            ))
+            embeddings = [vector for response in responses for vector in response["embeddings"]]
+            for i, hits in zip(missing, self.reference_index.search(embeddings, self.top_k)):
+                results[i] = hits
+                kinds[i] = "vector"
+        return results, kinds
+
+    def with_candidates(self, rows, hits):
+        """Hängt die gefundenen Vergleichspatente an die Zeilen an"""
+        return [
+            (row_id, f"{text}\n{candidate_context(row_hits)}" if row_hits else text)
+            for (row_id, text), row_hits in zip(rows, hits)
+        ]
+
+    def screen_rows(self, rows, hits, kinds):
+        """Entscheidet eindeutige Zeilen ohne Modell und liefert die unsicheren samt Treffern
+
+        Zeilen ohne Vergleichspatent bietet die Vorauswahl keine Grundlage,
+        sie gehen immer an das Modell. Die Urteile der Vorauswahl übernimmt
+        analyze() im selben Thread.
+        """
+        started = time.perf_counter()
+        scored = [i for i, row_hits in enumerate(hits) if row_hits]
+        probabilities = screening_probabilities(
+            [rows[i] for i in scored], [hits[i] for i in scored], [kinds[i] for i in scored]
+        ) if scored else []
+        decided, _ = screen([rows[i] for i in scored], probabilities, self.cascade_band)
+        self._last_run.screened_verdicts = decided
+        keep = [i for i, (row_id, _) in enumerate(rows) if row_id not in decided]
+        uncertain = [rows[i] for i in keep]
+        hits = [hits[i] for i in keep]
+        self.telemetry.observe("screening", time.perf_counter() - started)
+        self.update_status(f"🪜 Vorauswahl: {len(decided)} Zeilen entschieden, {len(uncertain)} gehen an das Modell")
+        return uncertain, hits
+
+    def prior_art(self, query, k=PRIOR_ART_HITS):
+        """Sucht zu einer Keyword-Anfrage ("A OR B OR C") lokal ähnliche Patente
+
+        Liefert (Dokument, Score)-Paare aus dem BM25-Index, leer ohne Index.
+        """
+        if self.keyword_index is None:
+            return []
+        started = time.perf_counter()
+        hits = self.keyword_index.search(query, k)
+        self.telemetry.observe("prior_art", time.perf_counter() - started)
+        return hits
+
+    async def extract_keywords(self, content, on_token=None):
+        """Extrahiert Keywords mit Ollama"""
+        # Inhalt auf das Kontextfenster begrenzen statt still abschneiden zu lassen
+        content = truncate_to_tokens(content, batch_budget(KEYWORD_PROMPT, self.context_tokens))
+        prompt = KEYWORD_PROMPT.format(content=content)
+
+        try:
+            response = await self.engine.generate(
+                label="keywords",
+                model=self.models[0],
+                prompt=prompt,
+                options={"num_ctx": self.context_tokens},
+                keep_alive=self.keep_alive,
+                on_token=on_token
+            )
+            return response["response"]
+        except Exception as e:
+            return f"Fehler bei Keyword-Extraktion: {str(e)}"
+
+    async def prefix_context(self, model):
+        """Wertet den statischen Prompt-Anfang einmal pro Modell aus
+
+        Liefert Ollamas context-Tokens, mit denen die Batches als Fortsetzung
+        gesendet werden, oder None, wenn der Server keinen context liefert.
+        """
+        template = self.patent_prompt()
+        prefix = template[:template.index("{content}")]
+        key = (model, prefix, self.context_tokens)
+        if key not in self.prefix_contexts:
+            try:
+                response = await self.engine.generate(
+                    label="prefix",
+                    model=model,
+                    prompt=prefix + PREFIX_ACK,
+                    options={"num_ctx": self.context_tokens, "num_predict": PREFIX_PREDICT_TOKENS},
+                    keep_alive=self.keep_alive
+                )
+                self.prefix_contexts[key] = response.get("context") or None
+            except Exception:
+                # Ohne context wird einfach der vollständige Prompt gesendet
+                self.prefix_contexts[key] = None
+        return self.prefix_contexts[key]
+
+    async def analyze_patents(self, content, count, on_token=None, attempt=0, model=None,
+                              context=None):
+        """Analysiert Patente auf Konflikte (JSON-Antwort nach VERDICT_SCHEMA)
+
+        Mit context wird nur der Teil ab den Zeilen gesendet; Ollama setzt
+        den bereits ausgewerteten Prompt-Anfang fort.
+        """
+        try:
+            template = self.patent_prompt()
+            if context:
+                template = template[template.index("{content}"):]
+            prompt = template.format(content=content, count=count)
+            options = {"num_ctx": self.context_tokens}
+            if attempt:
+                # Anderer Seed, damit Wiederholungen nicht dieselbe Antwort liefern
+                options["seed"] = attempt
+
+            request = {
+                "model": model or self.models[0],
+                "prompt": prompt,
+                "format": VERDICT_SCHEMA,
+                "options": options,
+                "keep_alive": self.keep_alive,
+            }
+            if context:
+                request["context"] = context
+            response = await self.engine.generate(
+                label="patents_retry" if attempt else "patents",
+                on_token=on_token,
+                **request
+            )
+            return response["response"]
+        except Exception as e:
+            return f"Fehler bei Patent-Analyse: {str(e)}"
+
+    async def analyze_ensemble(self, batches, stream_callback=None, batch_done=None):
+        """Bewertet die Batches mit allen Modellen und führt die Urteile zusammen
+
+        Die Modelle laufen gruppenweise (parallel_models pro Gruppe): eine
+        Gruppe wird geladen, bewertet alle Batches und wird danach entladen,
+        damit sich die Modelle nicht gegenseitig aus dem Speicher verdrängen.
+        Gestreamt wird nur das erste Modell.
+        """
+        if not batches:
+            # Alle Zeilen sind bereits bewertet
+            return "", {}
+        if len(self.models) == 1:
+            return await self.analyze_batches(batches, stream_callback, self.models[0], batch_done)
+
+        groups = model_groups(self.models, self.parallel_models)
+        reports = {}
+        model_verdicts = {}
+        for number, group in enumerate(groups, start=1):
+            self.update_status(f"🧠 Modelle {', '.join(group)} ({number}/{len(groups)}) werden geladen...")
+            await asyncio.gather(*(self.engine.load_model(model, self.keep_alive) for model in group))
+            results = await asyncio.gather(*(
+                self.analyze_batches(
+                    batches, stream_callback if model == self.models[0] else None, model, batch_done
+                )
+                for model in group
+            ))
+            for model, (report, verdicts) in zip(group, results):
+                reports[model] = report
+                model_verdicts[model] = verdicts
+            if number < len(groups):
+                # Platz für die nächste Gruppe schaffen
+                await asyncio.gather(*(self.engine.load_model(model, 0, label="unload") for model in group))
+
+        verdicts = combine_verdicts(model_verdicts, self.vote, self.model_weights)
+        self.last_agreement = agreement_summary(verdicts, self.models)
+        report = "\n\n".join(f"=== {model} ===\n{reports[model]}" for model in self.models)
+        return report, verdicts
+
+    async def analyze_batches(self, batches, stream_callback=None, model=None, batch_done=None):
+        """Bewertet alle Batches parallel und führt die Ergebnisse zusammen
+
+        batch_done() wird nach jedem fertigen Batch aufgerufen.
+        """
+        stream_callback = stream_callback or (lambda section: None)
+        model = model or self.models[0]
+        context = await self.prefix_context(model) if self.reuse_prefix else None
+        completed = 0
+
+        async def analyze_batch(index, batch):
+            nonlocal completed
+            response = await self.analyze_patents(
+                batch_content(batch), len(batch), stream_callback(index), model=model,
+                context=context
+            )
+            verdicts = self.parse_verdicts(response, [row_id for row_id, _ in batch])
+
+            # Nur fehlerhafte oder fehlende Zeilen erneut anfragen
+            for attempt in range(1, MAX_VERDICT_RETRIES + 1):
+                pending = [row for row in batch if row[0] not in verdicts]
+                if not pending:
+                    break
+                retry = await self.analyze_patents(
+                    batch_content(pending), len(pending), attempt=attempt, model=model,
+                    context=context
+                )
+                verdicts.update(self.parse_verdicts(retry, [row_id for row_id, _ in pending]))
+
+            completed += 1
+            self.update_status(f"⚖️ Patent-Analyse ({model}): {completed}/{len(batches)} Batches fertig")
+            if batch_done is not None:
+                batch_done()
+            return response, verdicts
+
+        # gather liefert die Antworten in Batch-Reihenfolge
+        results = await asyncio.gather(
+            *(analyze_batch(index, batch) for index, batch in enumerate(batches, start=1))
+        )
+        responses = [response for response, _ in results]
+
+        report = "\n\n".join(
+            f"Batch {index} (Zeilen {batch[0][0]}-{batch[-1][0]}):\n{response}"
+            for index, (batch, response) in enumerate(zip(batches, responses), start=1)
+        )
+        return report, merge_verdicts(batches, [verdicts for _, verdicts in results])
+
+    def parse_verdicts(self, text, row_ids):
+        """Validiert eine JSON-Antwort und liefert Zeilen-ID -> Bewertung
+
+        Berücksichtigt werden nur erwartete Zeilen-IDs mit Urteil 0/1 und
+        Konfidenz in [0, 1]; alles andere gilt als fehlend.
+        """
+        started = time.perf_counter()
+        try:
+            entries = json.loads(text)["verdicts"]
+        except (ValueError, KeyError, TypeError):
+            entries = None
+        verdicts = self._validate_verdicts(entries, row_ids) if isinstance(entries, list) else {}
+        self.telemetry.observe("parse", time.perf_counter() - started)
+        return verdicts
+
+    def _validate_verdicts(self, entries, row_ids):
+        """Behält nur gültige Einträge für erwartete Zeilen-IDs"""
+        expected = set(row_ids)
+        verdicts = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            row_id = entry.get("row_id")
+            verdict = entry.get("verdict")
+            confidence = entry.get("confidence")
+            if row_id not in expected or row_id in verdicts:
+                continue
+            if verdict not in (0, 1) or isinstance(verdict, bool):
+                continue
+            if not isinstance(confidence, (int, float)) or not 0 <= confidence <= 1:
+                continue
+            verdicts[row_id] = {"verdict": int(verdict), "confidence": float(confidence)}
+        return verdicts
+
+    def extract_partial_binary_list(self, text):
+        """Extrahiert die bereits gestreamten Urteile einer unfertigen JSON-Antwort"""
+        return [int(v) for v in re.findall(r'"verdict"\s*:\s*([01])\b', text)]
@@ -1,20 +1,88 @@
+import time
+
+# Startzeitpunkt für die Messung der Zeit bis zum Fenster
+PROCESS_STARTED = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import pandas as pd
-import ollama
+from tkinter import ttk, messagebox, scrolledtext, filedialog
 import threading
 import os
-from tkinterdnd2 import DND_FILES, TkinterDnD
-import time
-import re
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.patches as mpatches
-from matplotlib.figure import Figure
-import numpy as np
+# tkinterdnd2, matplotlib, pandas und ollama werden erst bei Bedarf importiert
+from batching import DEFAULT_CONTEXT_TOKENS
+from classification_index import DEFAULT_CLASSIFICATION_DIR
+from ensemble import DEFAULT_MODELS
+from ingest import SUPPORTED_EXTENSIONS
+from job_queue import DEFAULT_JOB_WORKERS, PRIORITIES, PRIORITY_HIGH, STATE_LABELS, JobQueue
+from llm_engine import DEFAULT_MAX_CONCURRENCY
+from pdf_ingest import PDF_EXTENSIONS, PdfTextCache, collect_pdfs
+from pipeline import PatentPipeline, iter_pdf_rows, load_rows
+from result_views import (
+    TABLE_COLUMNS, TABLE_FILTERS, ConflictChart, VerdictTable, row_title, verdict_records
+)
+from vector_index import DEFAULT_INDEX_DIR, DEFAULT_TOP_K
+
+# Intervalle für gebündelte GUI-Aktualisierungen im Streaming-Modus
+STREAM_FLUSH_INTERVAL_MS = 100
+CHART_REFRESH_INTERVAL_MS = 500
+# Urteile, die der Textbericht auflistet; alle weiteren stehen in der Tabelle
+REPORT_PREVIEW_VERDICTS = 100
+METRICS_REFRESH_INTERVAL_MS = 1000
 
 class OllamaExcelAnalyzer:
-    def __init__(self):
+    def __init__(self, context_tokens=DEFAULT_CONTEXT_TOKENS,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, use_cache=True,
+                 stream_output=True, index_dir=DEFAULT_INDEX_DIR, top_k=DEFAULT_TOP_K,
+                 classification_dir=DEFAULT_CLASSIFICATION_DIR, models=DEFAULT_MODELS,
+                 vote="majority", incremental=True, job_workers=DEFAULT_JOB_WORKERS,
+                 cascade=True):
+        # Analyse-Pipeline, die auch ohne GUI (batch_cli.py) nutzbar ist
+        self.pipeline = PatentPipeline(
+            context_tokens=context_tokens,
+            max_concurrency=max_concurrency,
+            use_cache=use_cache,
+            index_dir=index_dir,
+            top_k=top_k,
+            classification_dir=classification_dir,
+            models=models,
+            vote=vote,
+            incremental=incremental,
+            cascade=cascade,
+            on_status=self.update_status
+        )
+        
+        # Streaming-Zustand: Worker-Threads füllen den Puffer, die Tk-Loop leert ihn
+        self.stream_output = stream_output
+        self.stream_lock = threading.Lock()
+        self.stream_buffer = []
+        self.stream_text = {}
+        self.stream_sections = []
+        self.streaming = False
+        self.last_chart_refresh = 0.0
+        self.last_partial_verdicts = []
+        # Bereits ausgewertete Urteile pro Abschnitt; neu ausgewertet werden nur geänderte
+        self.partial_verdicts = {}
+        self.dirty_sections = set()
+        
+        # Dauerhaftes Diagramm, beim ersten Ergebnis erstellt (matplotlib lädt erst dann)
+        self.chart = None
+        
+        # Job, dem Textfeld und Diagramm gerade gehören; fertige Berichte pro Job
+        self.view_job = None
+        self.reports = {}
+        self.reported_jobs = set()
+        # Schützt extracted_keywords.txt vor gleichzeitig fertigen Jobs
+        self.report_lock = threading.Lock()
+        
+        # Prozesspool für PDF-Seitenbereiche, beim ersten PDF-Job erstellt
+        self.pdf_pool = None
+        self.pdf_cache = PdfTextCache()
+        
+        # Zeit vom Programmstart bis zum sichtbaren Fenster
+        self.processing = False
+        self.time_to_window = None
+
+        # Erst hier importiert, damit die Abhängigkeitsprüfung beim Start greift
+        from tkinterdnd2 import TkinterDnD
         self.root = TkinterDnD.Tk()
         self.root.title("Patent Scnner")
         self.root.geometry("1200x1000")
@@ -38,6 +106,9 @@ class OllamaExcelAnalyzer:
         
         self.setup_ui()
         
+        # Warteschlange für abgelegte Dateien mit begrenzter Anzahl Worker
+        self.jobs = JobQueue(self.analyze_file, workers=job_workers, on_change=self.on_job_change)
+        
     def setup_ui(self):
         # Hauptcontainer mit Padding
         main_container = tk.Frame(self.root, bg=self.colors['bg'])
@@ -49,9 +120,15 @@ class OllamaExcelAnalyzer:
         # Drop Zone
         self.create_drop_zone(main_container)
         
+        # Warteschlange der abgelegten Dateien
+        self.create_queue_panel(main_container)
+        
         # Progress Section
         self.create_progress_section(main_container)
         
+        # Live-Metriken der Ollama-Aufrufe
+        self.create_metrics_panel(main_container)
+        
         # Results Section mit zwei Spalten
         self.create_results_section(main_container)
         
@@ -130,7 +207,7 @@ class OllamaExcelAnalyzer:
         # Drop Text
         drop_label = tk.Label(
             self.drop_frame,
-            text="Excel-Datei hier ablegen",
+            text="Excel-Dateien, PDFs oder Ordner hier ablegen",
             font=('Helvetica', 18, 'bold'),
             bg=self.colors['bg_light'],
             fg=self.colors['text']
@@ -140,7 +217,7 @@ class OllamaExcelAnalyzer:
         # Unterstützte Formate
         formats_label = tk.Label(
             self.drop_frame,
-            text="Unterstützte Formate: .xlsx, .xls",
+            text=f"Unterstützte Formate: {', '.join(SUPPORTED_EXTENSIONS + PDF_EXTENSIONS)} (Lens-Export, Patentschriften)",
             font=('Helvetica', 11),
             bg=self.colors['bg_light'],
             fg=self.colors['text_light']
@@ -148,6 +225,7 @@ class OllamaExcelAnalyzer:
         formats_label.pack(pady=(8, 0))
         
         # Drag & Drop Setup
+        from tkinterdnd2 import DND_FILES
         self.drop_frame.drop_target_register(DND_FILES)
         self.drop_frame.dnd_bind('<<Drop>>', self.drop_file)
         
@@ -175,10 +253,11 @@ class OllamaExcelAnalyzer:
         progress_bar_container = tk.Frame(self.progress_container, bg=self.colors['bg'])
         progress_bar_container.pack()
         
-        # Moderne Progress Bar
+        # Moderne Progress Bar, gefüllt nach fertigen Batches
         self.progress_bar = ttk.Progressbar(
             progress_bar_container,
-            mode='indeterminate',
+            mode='determinate',
+            maximum=1.0,
             length=500,
             style='Modern.Horizontal.TProgressbar'
         )
@@ -187,6 +266,143 @@ class OllamaExcelAnalyzer:
         # Initialer Zustand: versteckt
         self.progress_container.pack_forget()
         
+    def create_queue_panel(self, parent):
+        """Erstellt die Liste der wartenden und laufenden Dateien"""
+        queue_frame = tk.Frame(parent, bg=self.colors['bg'])
+        queue_frame.pack(fill='x', pady=(0, 20))
+        
+        self.queue_tree = ttk.Treeview(
+            queue_frame,
+            columns=('file', 'priority', 'state', 'progress'),
+            show='headings',
+            height=4,
+            selectmode='browse'
+        )
+        for column, title, width in (('file', "Datei", 420), ('priority', "Priorität", 90),
+                                     ('state', "Status", 120), ('progress', "Batches", 100)):
+            self.queue_tree.heading(column, text=title)
+            self.queue_tree.column(column, width=width, anchor='w' if column == 'file' else 'center')
+        self.queue_tree.pack(side='left', fill='x', expand=True)
+        # Doppelklick zeigt den Bericht eines fertigen Jobs
+        self.queue_tree.bind('<Double-1>', lambda e: self.show_selected_report())
+        
+        controls = tk.Frame(queue_frame, bg=self.colors['bg'])
+        controls.pack(side='right', fill='y', padx=(10, 0))
+        
+        tk.Label(
+            controls,
+            text="Priorität neuer Dateien",
+            font=('Helvetica', 9),
+            fg=self.colors['text_light'],
+            bg=self.colors['bg']
+        ).pack(anchor='w')
+        self.priority_var = tk.StringVar(value="normal")
+        ttk.Combobox(
+            controls,
+            textvariable=self.priority_var,
+            values=list(PRIORITIES),
+            state='readonly',
+            width=10
+        ).pack(anchor='w', pady=(0, 6))
+        
+        for text, command in (("⬆ Vorziehen", self.prioritize_selected_job),
+                              ("✖ Abbrechen", self.cancel_selected_job)):
+            tk.Button(
+                controls,
+                text=text,
+                command=command,
+                font=('Helvetica', 9),
+                bg=self.colors['bg_light'],
+                fg=self.colors['primary'],
+                relief='flat',
+                bd=0,
+                padx=8
+            ).pack(fill='x', pady=(0, 4))
+        
+    def create_metrics_panel(self, parent):
+        """Erstellt das Panel mit Live-Metriken und Export-Buttons"""
+        metrics_frame = tk.Frame(
+            parent,
+            bg=self.colors['bg_light'],
+            highlightbackground=self.colors['border'],
+            highlightthickness=1
+        )
+        metrics_frame.pack(fill='x', pady=(0, 20))
+        
+        self.metrics_var = tk.StringVar(value="📏 Noch keine Ollama-Aufrufe")
+        metrics_label = tk.Label(
+            metrics_frame,
+            textvariable=self.metrics_var,
+            font=('Consolas', 9),
+            fg=self.colors['text'],
+            bg=self.colors['bg_light'],
+            anchor='w',
+            justify='left'
+        )
+        metrics_label.pack(side='left', fill='x', expand=True, padx=10, pady=6)
+        
+        for text, command in (("Prometheus", self.export_metrics_prometheus),
+                              ("CSV", self.export_metrics_csv)):
+            tk.Button(
+                metrics_frame,
+                text=f"⤓ {text}",
+                command=command,
+                font=('Helvetica', 9),
+                bg=self.colors['white'],
+                fg=self.colors['primary'],
+                relief='flat',
+                bd=0,
+                padx=8
+            ).pack(side='right', padx=(0, 8), pady=6)
+        
+        self.root.after(METRICS_REFRESH_INTERVAL_MS, self.refresh_metrics)
+        
+    def refresh_metrics(self):
+        """Aktualisiert das Metrik-Panel periodisch (Tk-Loop)"""
+        summary = self.pipeline.telemetry.summary()
+        if summary["calls"] or summary["cached"]:
+            parse_count, parse_seconds = summary["stages"].get("parse", (0, 0.0))
+            text = (
+                f"📏 Aufrufe: {summary['calls']} (+{summary['cached']} Cache)   "
+                f"Prompt: {summary['prompt_tokens_per_second']:.0f} tok/s   "
+                f"Generierung: {summary['eval_tokens_per_second']:.1f} tok/s   "
+                f"Prompt-Anteil: {summary['prompt_eval_share'] * 100:.0f}%   "
+                f"Laden: {summary['load_seconds']:.1f} s   "
+                f"Warteschlange: {summary['queue_seconds']:.1f} s   "
+                f"Parsen: {parse_seconds * 1000:.1f} ms/{parse_count}"
+            )
+            if summary["truncations"]:
+                text += f"   ⚠️ Abgeschnitten: {summary['truncations']}"
+            if len(self.pipeline.engine.pool) > 1:
+                # Auslastung und Durchsatz je Ollama-Endpunkt
+                for endpoint in self.pipeline.engine.pool.stats():
+                    throughput = summary["endpoints"].get(endpoint["endpoint"], {}).get("tokens_per_second", 0.0)
+                    state = "" if endpoint["healthy"] else " ❌"
+                    text += (f"\n🖥️ {endpoint['endpoint']}{state}: {endpoint['outstanding']} offen, "
+                             f"{endpoint['requests']} Anfragen, {throughput:.1f} tok/s")
+            self.metrics_var.set(text)
+        self.root.after(METRICS_REFRESH_INTERVAL_MS, self.refresh_metrics)
+        
+    def export_metrics_csv(self):
+        """Exportiert die Aufruf-Metriken als CSV"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv", initialfile="ollama_metrics.csv",
+            filetypes=[("CSV", "*.csv")]
+        )
+        if path:
+            self.pipeline.telemetry.export_csv(path)
+            self.status_var.set(f"Metriken gespeichert: {os.path.basename(path)}")
+        
+    def export_metrics_prometheus(self):
+        """Exportiert die Metriken im Prometheus-Textformat"""
+        path = filedialog.asksaveasfilename(
+            defaultextension=".prom", initialfile="ollama_metrics.prom",
+            filetypes=[("Prometheus", "*.prom"), ("Text", "*.txt")]
+        )
+        if path:
+            self.pipeline.telemetry.export_prometheus(path)
+            self.status_var.set(f"Metriken gespeichert: {os.path.basename(path)}")
+        
     def create_results_section(self, parent):
         """Erstellt den Ergebnisbereich mit zwei Spalten"""
         results_container = tk.Frame(parent, bg=self.colors['bg'])
@@ -209,23 +425,16 @@ class OllamaExcelAnalyzer:
         main_results_frame = tk.Frame(results_container, bg=self.colors['bg'])
         main_results_frame.pack(fill='both', expand=True)
         
-        # Linke Spalte: Text Results
+        # Linke Spalte: Bericht und Tabelle der Bewertungen als Reiter
         left_frame = tk.Frame(main_results_frame, bg=self.colors['bg'])
         left_frame.pack(side='left', fill='both', expand=True, padx=(0, 15))
         
-        # Text Results Header
-        text_header = tk.Label(
-            left_frame,
-            text="📄 Textuelle Ergebnisse",
-            font=('Helvetica', 12, 'bold'),
-            fg=self.colors['primary'],
-            bg=self.colors['bg']
-        )
-        text_header.pack(anchor='w', pady=(0, 10))
+        self.results_tabs = ttk.Notebook(left_frame)
+        self.results_tabs.pack(fill='both', expand=True)
         
         # Results Text Area
-        text_container = tk.Frame(left_frame, bg=self.colors['border'], relief='solid', bd=1)
-        text_container.pack(fill='both', expand=True)
+        text_container = tk.Frame(self.results_tabs, bg=self.colors['border'], relief='solid', bd=1)
+        self.results_tabs.add(text_container, text="📄 Bericht")
         
         self.results_text = scrolledtext.ScrolledText(
             text_container,
@@ -242,6 +451,8 @@ class OllamaExcelAnalyzer:
         )
         self.results_text.pack(fill='both', expand=True, padx=1, pady=1)
         
+        self.create_verdict_table(self.results_tabs)
+        
         # Rechte Spalte: Grafische Darstellung
         right_frame = tk.Frame(main_results_frame, bg=self.colors['bg'])
         right_frame.pack(side='right', fill='both', expand=True, padx=(15, 0))
@@ -267,6 +478,103 @@ class OllamaExcelAnalyzer:
         self.results_text.insert('1.0', "Hier werden die Analyseergebnisse angezeigt...\n\n• Keyword-Extraktion\n• Patent-Konflikt-Bewertung\n• Detaillierte Auswertung")
         self.results_text.config(state='disabled')
         
+    def create_verdict_table(self, notebook):
+        """Erstellt die seitenweise Tabelle der Bewertungen mit Filter und Sortierung"""
+        self.verdict_table = VerdictTable()
+        table_frame = tk.Frame(notebook, bg=self.colors['bg'])
+        notebook.add(table_frame, text="📋 Bewertungen")
+        
+        # Filter nach Urteil und Suche im Titel
+        filter_bar = tk.Frame(table_frame, bg=self.colors['bg'])
+        filter_bar.pack(fill='x', pady=(6, 6))
+        self.table_filter_var = tk.StringVar(value="alle")
+        filter_box = ttk.Combobox(
+            filter_bar,
+            textvariable=self.table_filter_var,
+            values=list(TABLE_FILTERS),
+            state='readonly',
+            width=14
+        )
+        filter_box.pack(side='left')
+        filter_box.bind('<<ComboboxSelected>>', lambda e: self.apply_table_filter())
+        self.table_search_var = tk.StringVar()
+        search_entry = tk.Entry(filter_bar, textvariable=self.table_search_var, font=('Helvetica', 10))
+        search_entry.pack(side='left', fill='x', expand=True, padx=(8, 0))
+        search_entry.bind('<Return>', lambda e: self.apply_table_filter())
+        
+        # Treeview mit höchstens einer Seite an Einträgen
+        self.table_tree = ttk.Treeview(
+            table_frame,
+            columns=list(TABLE_COLUMNS),
+            show='headings',
+            selectmode='browse'
+        )
+        for column, title in TABLE_COLUMNS.items():
+            self.table_tree.heading(column, text=title, command=lambda c=column: self.sort_table(c))
+            self.table_tree.column(
+                column, width=320 if column == 'title' else 80,
+                anchor='w' if column == 'title' else 'center', stretch=column == 'title'
+            )
+        scrollbar = ttk.Scrollbar(table_frame, orient='vertical', command=self.table_tree.yview)
+        self.table_tree.configure(yscrollcommand=scrollbar.set)
+        
+        # Blättern
+        page_bar = tk.Frame(table_frame, bg=self.colors['bg'])
+        page_bar.pack(side='bottom', fill='x', pady=(6, 0))
+        self.table_page_var = tk.StringVar(value="")
+        for text, step in (("◀", -1), ("▶", 1)):
+            tk.Button(
+                page_bar,
+                text=text,
+                command=lambda s=step: self.show_table_page(self.verdict_table.page_number + s),
+                font=('Helvetica', 9),
+                bg=self.colors['bg_light'],
+                fg=self.colors['primary'],
+                relief='flat',
+                bd=0,
+                padx=8
+            ).pack(side='left' if step < 0 else 'right')
+        tk.Label(
+            page_bar,
+            textvariable=self.table_page_var,
+            font=('Helvetica', 9),
+            fg=self.colors['text_light'],
+            bg=self.colors['bg']
+        ).pack()
+        
+        scrollbar.pack(side='right', fill='y')
+        self.table_tree.pack(side='left', fill='both', expand=True)
+        
+    def show_table_page(self, number=None):
+        """Füllt die Treeview mit einer Seite der gefilterten, sortierten Bewertungen"""
+        records = self.verdict_table.page(number)
+        self.table_tree.delete(*self.table_tree.get_children())
+        for record in records:
+            self.table_tree.insert('', 'end', values=(
+                record["row_id"],
+                record["title"],
+                {1: "Konflikt", 0: "kein Konflikt"}.get(record["verdict"], "–"),
+                f"{record['confidence']:.2f}" if record["confidence"] is not None else "–",
+                record["source"],
+            ))
+        table = self.verdict_table
+        self.table_page_var.set(
+            f"Seite {table.page_number + 1}/{table.page_count} · {len(table.view)} von {len(table.records)} Patenten"
+        )
+        
+    def sort_table(self, column):
+        """Sortiert die Tabelle nach einer Spalte (erneuter Klick kehrt die Richtung um)"""
+        self.verdict_table.sort(column)
+        for name, title in TABLE_COLUMNS.items():
+            arrow = (" ▼" if self.verdict_table.descending else " ▲") if name == column else ""
+            self.table_tree.heading(name, text=title + arrow)
+        self.show_table_page()
+        
+    def apply_table_filter(self):
+        """Übernimmt Filter und Suchtext in die Tabelle"""
+        self.verdict_table.filter(self.table_filter_var.get(), self.table_search_var.get())
+        self.show_table_page()
+        
     def create_placeholder_chart(self):
         """Erstellt einen Platzhalter für das Chart"""
         placeholder = tk.Label(
@@ -319,149 +627,353 @@ class OllamaExcelAnalyzer:
             self.drop_frame.configure(highlightbackground=self.colors['border'])
     
     def drop_file(self, event):
-        """Behandelt Drag & Drop von Dateien"""
+        """Behandelt Drag & Drop von Dateien und Ordnern; alle gültigen Dateien werden eingereiht
+
+        Die PDFs eines Ordners bilden zusammen einen Job, Arbeitsmappen je einen.
+        """
         files = self.root.tk.splitlist(event.data)
-        if files:
-            file_path = files[0]
-            if file_path.lower().endswith(('.xlsx', '.xls')):
+        rejected = []
+        for file_path in files:
+            if os.path.isdir(file_path):
+                workbooks = [
+                    os.path.join(file_path, name) for name in sorted(os.listdir(file_path))
+                    if name.lower().endswith(SUPPORTED_EXTENSIONS)
+                ]
+                for workbook in workbooks:
+                    self.process_file(workbook)
+                if collect_pdfs([file_path]):
+                    self.process_file(file_path)
+                elif not workbooks:
+                    rejected.append(os.path.basename(file_path))
+            elif file_path.lower().endswith(SUPPORTED_EXTENSIONS + PDF_EXTENSIONS):
                 self.process_file(file_path)
             else:
-                messagebox.showerror(
-                    "Ungültiges Format", 
-                    "Bitte nur Excel-Dateien (.xlsx, .xls) verwenden!"
-                )
+                rejected.append(os.path.basename(file_path))
+        if rejected:
+            messagebox.showerror(
+                "Ungültiges Format", 
+                f"Nicht eingereiht: {', '.join(rejected)}\n\n"
+                f"Bitte nur Excel-Dateien, Lens-CSV-Exporte oder Patent-PDFs "
+                f"({', '.join(SUPPORTED_EXTENSIONS + PDF_EXTENSIONS)}) verwenden!"
+            )
                 
     def process_file(self, file_path):
-        """Startet die Dateiverarbeitung"""
+        """Reiht eine Datei in die Warteschlange ein"""
+        self.processing = True
+        self.jobs.submit(file_path, PRIORITIES[self.priority_var.get()])
         self.show_progress("Datei wird verarbeitet...")
-        self.clear_results()
         
-        # Thread für Verarbeitung starten
-        thread = threading.Thread(target=self.analyze_file, args=(file_path,))
-        thread.daemon = True
-        thread.start()
+    def selected_job(self):
+        """Der in der Warteschlange ausgewählte Job oder None"""
+        selection = self.queue_tree.selection()
+        return self.jobs.jobs.get(int(selection[0])) if selection else None
+        
+    def cancel_selected_job(self):
+        """Bricht den ausgewählten Job samt laufender Ollama-Anfragen ab"""
+        job = self.selected_job()
+        if job is not None and self.jobs.cancel(job.id):
+            self.status_var.set(f"⏹️ {os.path.basename(job.file_path)} wird abgebrochen...")
+        
+    def prioritize_selected_job(self):
+        """Setzt einen wartenden Job an den Anfang der Warteschlange"""
+        job = self.selected_job()
+        if job is not None:
+            self.jobs.set_priority(job.id, PRIORITY_HIGH)
+        
+    def show_selected_report(self):
+        """Zeigt den Bericht des ausgewählten fertigen Jobs"""
+        job = self.selected_job()
+        if job is not None and job.id in self.reports and self.view_job is None:
+            self.show_report(job.id)
+        
+    def on_job_change(self, job):
+        """Meldet Zustandsänderungen der Warteschlange an die Tk-Loop (beliebiger Thread)"""
+        self.root.after(0, lambda: self.refresh_queue(job))
+        
+    def refresh_queue(self, job):
+        """Aktualisiert Warteschlange und Fortschrittsbalken (Tk-Loop)"""
+        values = (
+            os.path.basename(job.file_path),
+            next(name for name, value in PRIORITIES.items() if value == job.priority),
+            STATE_LABELS[job.state],
+            f"{job.completed}/{job.total}" if job.total else "–",
+        )
+        item = str(job.id)
+        if self.queue_tree.exists(item):
+            self.queue_tree.item(item, values=values)
+        else:
+            self.queue_tree.insert('', 'end', iid=item, values=values)
+        
+        # Fortschritt über alle laufenden Jobs, gemessen an fertigen Batches
+        running = [j for j in self.jobs.snapshot() if j.state == "running"]
+        total = sum(j.total for j in running)
+        self.progress_bar['value'] = sum(j.completed for j in running) / total if total else 0.0
+        if not self.jobs.active():
+            self.finish_processing()
         
-    def analyze_file(self, file_path):
-        """Analysiert die Excel-Datei mit Ollama"""
+        # Abbruch und Fehler nur einmal pro Job melden
+        if job.state in ("failed", "cancelled") and job.id not in self.reported_jobs:
+            self.reported_jobs.add(job.id)
+            self.status_var.set(f"⏹️ {os.path.basename(job.file_path)} {STATE_LABELS[job.state]}")
+            if job.state == "failed":
+                messagebox.showerror(
+                    "Verarbeitungsfehler", 
+                    f"Fehler bei der Verarbeitung von {os.path.basename(job.file_path)}:\n{job.error}"
+                )
+        
+    def claim_view(self, job):
+        """Reserviert Textfeld und Diagramm für einen Job, falls kein anderer sie belegt"""
+        with self.stream_lock:
+            if self.view_job is None:
+                self.view_job = job.id
+            return self.view_job == job.id
+        
+    def release_view(self, job):
+        """Gibt Textfeld und Diagramm nach Ende eines Jobs frei (Tk-Loop)"""
+        if self.view_job == job.id:
+            self.stop_stream_view()
+            with self.stream_lock:
+                self.view_job = None
+        
+    def analyze_file(self, job):
+        """Analysiert eine Datei mit Ollama (Worker-Thread der Warteschlange)"""
+        file_path = job.file_path
+        if os.path.isdir(file_path) or file_path.lower().endswith(PDF_EXTENSIONS):
+            return self.analyze_pdfs(job)
+        # Nur ein Job streamt gleichzeitig ins Textfeld
+        owns_view = self.claim_view(job)
         try:
-            # Excel einlesen
-            self.update_status("📖 Excel-Datei wird gelesen...")
-            df = pd.read_excel(file_path)
-            content = df.to_string()
+            if owns_view:
+                self.root.after(0, self.clear_results)
             
-            # Erste Analyse: Keywords extrahieren
-            self.update_status("🔍 Keywords werden extrahiert...")
-            keywords = self.extract_keywords(content)
+            # Excel einlesen
+            self.update_status(f"📖 {os.path.basename(file_path)} wird gelesen...")
+            started = time.perf_counter()
+            rows, duplicates = load_rows(file_path)
+            self.pipeline.telemetry.observe("ingest", time.perf_counter() - started)
+            titles = {row_id: row_title(text) for row_id, text in rows}
+            job.check_cancelled()
+            rows, batches = self.pipeline.prepare(rows, duplicates, cancel_event=job.cancel_event)
+            job.check_cancelled()
+            self.jobs.report_progress(job, 0, len(batches) * len(self.pipeline.models))
+            if self.stream_output and owns_view:
+                self.root.after(0, lambda: self.start_stream_view(batches))
             
-            # Zweite Analyse: Patent-Konflikt-Bewertung
-            self.update_status("⚖️ Patent-Analyse wird durchgeführt...")
-            patent_analysis = self.analyze_patents(content)
+            # Keyword-Extraktion und Patent-Bewertung laufen gleichzeitig
+            self.update_status("🔍 Keywords und ⚖️ Patent-Analyse werden durchgeführt...")
+            keywords, patent_analysis, verdicts = self.pipeline.analyze(
+                rows, batches, self.stream_callback if owns_view else None, duplicates,
+                on_progress=lambda completed, total: self.jobs.report_progress(job, completed, total),
+                cancel_event=job.cancel_event
+            )
             
             # Ergebnisse anzeigen
-            self.display_results(keywords, patent_analysis, file_path)
-            
-        except Exception as e:
-            self.root.after(0, lambda: messagebox.showerror(
-                "Verarbeitungsfehler", 
-                f"Fehler bei der Verarbeitung:\n{str(e)}"
-            ))
+            self.display_results(keywords, patent_analysis, verdicts, file_path, job, titles)
         finally:
-            self.root.after(0, self.finish_processing)
+            self.root.after(0, lambda: self.release_view(job))
             
-    def extract_keywords(self, content):
-        """Extrahiert Keywords mit Ollama"""
-        prompt = f"Return keywords for a database search to find patents like {content}. No explanation, nothing else, just give us some keywords back."
-        
-        try:
-            response = ollama.generate(model="llama3", prompt=prompt)
-            return response["response"]
-        except Exception as e:
-            return f"Fehler bei Keyword-Extraktion: {str(e)}"
-    
-    def analyze_patents(self, content):
-        """Analysiert Patente auf Konflikte"""
+    def analyze_pdfs(self, job):
+        """Analysiert ein PDF oder die PDFs eines Ordners blockweise (Worker-Thread der Warteschlange)
+
+        Die Seiten werden im Prozesspool gelesen; jeder fertige Block geht
+        sofort in die Analyse, während die übrigen Dateien weiter gelesen werden.
+        """
+        paths = collect_pdfs([job.file_path])
+        if not paths:
+            raise ValueError(f"Keine PDF-Dateien in {job.file_path}")
+        owns_view = self.claim_view(job)
+        keywords = []
+        analyses = []
+        verdicts = {}
+        titles = {}
+        unreadable = []
+        # done: fertige Batches früherer Blöcke
+        stored = screened = read = done = 0
         try:
-            prompt = f"Rate these patterns and judge about the quality {content}. Return a list where 1 indicates a potential conflict and 0 indicates no conflict. Just Print the Final Answer as list other integers than 0,1 are not valid"
+            if owns_view:
+                self.root.after(0, self.clear_results)
+            self.update_status(f"📄 {len(paths)} PDF-Dateien werden gelesen...")
+            if self.pdf_pool is None:
+                from concurrent.futures import ProcessPoolExecutor
+                self.pdf_pool = ProcessPoolExecutor()
+            started = time.perf_counter()
+            chunks = iter_pdf_rows(
+                paths, self.pdf_pool, self.pdf_cache,
+                on_error=lambda path, error: unreadable.append(os.path.basename(path)),
+                cancel_event=job.cancel_event
+            )
+            for rows, duplicates, sources in chunks:
+                job.check_cancelled()
+                read += len(sources)
+                titles.update((row_id, row_title(text)) for row_id, text in rows)
+                rows, batches = self.pipeline.prepare(rows, duplicates, cancel_event=job.cancel_event)
+                job.check_cancelled()
+                if self.stream_output and owns_view:
+                    self.root.after(0, lambda batches=batches: self.start_stream_view(batches))
+                self.update_status(f"⚖️ {read}/{len(paths)} PDFs gelesen, Analyse läuft...")
+                # Batches aller Dateien, hochgerechnet aus den bisher gelesenen
+                chunk_total = len(batches) * len(self.pipeline.models)
+                expected = -(-(done + chunk_total) * len(paths) // read)
+                self.jobs.report_progress(job, done, expected)
+                chunk_keywords, analysis, chunk_verdicts = self.pipeline.analyze(
+                    rows, batches, self.stream_callback if owns_view else None, duplicates,
+                    on_progress=lambda completed, total, done=done, expected=expected:
+                        self.jobs.report_progress(job, done + completed, expected),
+                    cancel_event=job.cancel_event, known_verdicts=verdicts
+                )
+                done += chunk_total
+                keywords.append(chunk_keywords)
+                analyses.append(analysis)
+                verdicts.update(chunk_verdicts)
+                stored += self.pipeline.last_stored
+                screened += self.pipeline.last_screened
+            job.check_cancelled()
+            self.jobs.report_progress(job, done, done)
+            self.pipeline.telemetry.observe("ingest_pdf", time.perf_counter() - started)
             
-            response = ollama.generate(model="llama3", prompt=prompt)
-            return response["response"]
-        except Exception as e:
-            return f"Fehler bei Patent-Analyse: {str(e)}"
+            # Kennzahlen über alle Blöcke für den Bericht
+            self.pipeline.last_stored = stored
+            self.pipeline.last_screened = screened
+            if unreadable:
+                analyses.append(f"Nicht lesbare PDFs: {', '.join(unreadable)}")
+            self.display_results(
+                ", ".join(keywords), "\n\n".join(analyses), verdicts, job.file_path, job, titles
+            )
+        finally:
+            self.root.after(0, lambda: self.release_view(job))
+            
+    def stream_callback(self, section):
+        """Liefert den Token-Callback für einen Abschnitt oder None ohne Streaming"""
+        if not self.stream_output:
+            return None
+        return lambda text: self.append_stream(section, text)
     
-    def extract_binary_list(self, text):
-        """Extrahiert die Liste mit 0en und 1en aus dem Text"""
-        # Verschiedene Patterns für Listen
-        patterns = [
-            r'\[([0-9,\s]+)\]',  # [0, 1, 0, 1]
-            r'\[([01\s,]+)\]',   # [0, 1, 0, 1] nur 0 und 1
-            r'([01\s,]+)',       # 0, 1, 0, 1 ohne Klammern
-            r'([0-9\s,]+)'       # Zahlen mit Kommas
+    def append_stream(self, section, text):
+        """Puffert gestreamte Tokens (aufrufbar aus beliebigen Threads)"""
+        with self.stream_lock:
+            self.stream_buffer.append((section, text))
+    
+    def start_stream_view(self, batches):
+        """Legt für Keywords und jeden Batch einen Live-Abschnitt im Textfeld an"""
+        self.stream_text = {}
+        self.stream_sections = list(range(1, len(batches) + 1))
+        self.last_partial_verdicts = []
+        self.partial_verdicts = {}
+        self.dirty_sections = set()
+        
+        self.results_text.config(state='normal')
+        self.results_text.delete('1.0', tk.END)
+        headers = [("keywords", "🔍 KEYWORD-EXTRAKTION (live):")]
+        headers += [
+            (index, f"⚖️ BATCH {index} (Zeilen {batch[0][0]}-{batch[-1][0]}):")
+            for index, batch in enumerate(batches, start=1)
         ]
+        for section, header in headers:
+            self.results_text.insert(tk.END, f"{header}\n")
+            position = self.results_text.index(tk.END + "-1c")
+            self.results_text.insert(tk.END, "\n\n")
+            # Marke mit rechter Gravität wandert mit dem eingefügten Text mit
+            self.results_text.mark_set(f"stream_{section}", position)
+            self.results_text.mark_gravity(f"stream_{section}", 'right')
+        self.results_text.config(state='disabled')
         
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                # Erste Übereinstimmung nehmen
-                list_str = matches[0]
-                # Zahlen extrahieren
-                numbers = re.findall(r'\d+', list_str)
-                # Nur 0 und 1 behalten
-                binary_list = [int(n) for n in numbers if n in ['0', '1']]
-                if binary_list:
-                    return binary_list
-        
-        # Falls keine Liste gefunden, zufällige Demo-Daten generieren
-        return [0, 1, 0, 1, 1, 0, 1, 0, 0, 1, 1, 0, 1, 1, 0]
+        if not self.streaming:
+            self.streaming = True
+            self.root.after(STREAM_FLUSH_INTERVAL_MS, self.flush_stream)
+    
+    def flush_stream(self):
+        """Überträgt gepufferte Tokens gebündelt ins Textfeld (Tk-Loop)"""
+        if not self.streaming:
+            return
+        with self.stream_lock:
+            pending, self.stream_buffer = self.stream_buffer, []
+        
+        if pending:
+            self.results_text.config(state='normal')
+            for section, text in pending:
+                self.stream_text[section] = self.stream_text.get(section, "") + text
+                self.dirty_sections.add(section)
+                self.results_text.insert(f"stream_{section}", text)
+            self.results_text.config(state='disabled')
+            self.refresh_partial_chart()
+        
+        self.root.after(STREAM_FLUSH_INTERVAL_MS, self.flush_stream)
+    
+    def refresh_partial_chart(self):
+        """Zeichnet das Diagramm aus den bisher gestreamten Bewertungen neu (gedrosselt)"""
+        now = time.monotonic()
+        if (now - self.last_chart_refresh) * 1000 < CHART_REFRESH_INTERVAL_MS:
+            return
+        # Nur Abschnitte mit neuen Tokens erneut auswerten
+        for section in self.dirty_sections & set(self.stream_sections):
+            self.partial_verdicts[section] = self.pipeline.extract_partial_binary_list(self.stream_text[section])
+        self.dirty_sections.clear()
+        verdicts = []
+        for section in self.stream_sections:
+            verdicts.extend(self.partial_verdicts.get(section, ()))
+        if verdicts and verdicts != self.last_partial_verdicts:
+            self.last_partial_verdicts = verdicts
+            self.last_chart_refresh = now
+            self.create_visualization(verdicts)
+    
+    def stop_stream_view(self):
+        """Beendet das Live-Streaming und verwirft restliche Tokens"""
+        self.streaming = False
+        with self.stream_lock:
+            self.stream_buffer = []
     
     def create_visualization(self, binary_list):
-        """Erstellt nur ein Kreisdiagramm der Patent-Konflikte"""
-        # Alte Widgets entfernen
-        for widget in self.chart_container.winfo_children():
-            widget.destroy()
-
-        # Matplotlib Figure erstellen
-        fig = Figure(figsize=(6, 6), dpi=100)
-        fig.patch.set_facecolor('white')
-        ax = fig.add_subplot(111)
+        """Aktualisiert das Kreisdiagramm der Patent-Konflikte
 
-        # Werte berechnen
-        conflict_count = sum(binary_list)
-        no_conflict_count = len(binary_list) - conflict_count
-        sizes = [no_conflict_count, conflict_count]
-        labels = ['Kein Konflikt', 'Konflikt']
-        colors = ['#10b981', '#ef4444']  # grün, rot
-
-        if sum(sizes) > 0:
-            ax.pie(
-                sizes,
-                labels=labels,
-                colors=colors,
-                autopct='%1.1f%%',
-                startangle=90,
-                shadow=True,
-                explode=(0.05, 0.05)
-            )
-            ax.set_title('Konflikt-Verteilung', fontsize=14, fontweight='bold')
-        else:
-            ax.text(0.5, 0.5, 'Keine Daten verfügbar', ha='center', va='center', fontsize=12)
-            ax.set_title('Konflikt-Verteilung', fontsize=14, fontweight='bold')
-
-        # In Tkinter einbetten
-        canvas = FigureCanvasTkAgg(fig, self.chart_container)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill='both', expand=True, padx=1, pady=1)
-
-        return fig
+        Das Diagramm wird einmal erstellt und danach nur noch per Blitting
+        aktualisiert.
+        """
+        if self.chart is None:
+            # Platzhalter durch die dauerhafte Zeichenfläche ersetzen
+            for widget in self.chart_container.winfo_children():
+                widget.destroy()
+            self.chart = ConflictChart(self.chart_container)
+        self.chart.update(binary_list)
     
-    def display_results(self, keywords, patent_analysis, file_path):
-        """Zeigt die Ergebnisse in der GUI an"""
+    def display_results(self, keywords, patent_analysis, verdicts, file_path, job, titles=None):
+        """Erstellt den Bericht eines Jobs und zeigt ihn an, sofern der Job die Anzeige besitzt"""
         filename = os.path.basename(file_path)
         
-        # Binäre Liste aus Patent-Analyse extrahieren
-        binary_list = self.extract_binary_list(patent_analysis)
+        # Binäre Liste in Zeilenreihenfolge, Zeilen ohne Bewertung ausgenommen
+        rated = [v for v in verdicts.values() if v is not None]
+        binary_list = [v["verdict"] for v in rated]
+        unrated_count = len(verdicts) - len(binary_list)
+        conflict_rate = sum(binary_list) / len(binary_list) * 100 if binary_list else 0.0
+        mean_confidence = sum(v["confidence"] for v in rated) / len(rated) if rated else 0.0
+        duplicate_count = sum(1 for v in rated if "duplicate_of" in v)
+        agreement = self.pipeline.last_agreement
+        agreement_line = (
+            f"\n• Modell-Übereinstimmung: {agreement['mean_agreement']:.0%} "
+            f"(einstimmig: {agreement['unanimous']:.0%}; "
+            + ", ".join(f"{m}: {share:.0%}" for m, share in agreement["per_model"].items()) + ")"
+            if agreement else ""
+        )
+        cache_stats = self.pipeline.cache.stats()
+        
+        time_to_first_result = self.record_first_result(job)
         
-        # Grafische Darstellung erstellen
-        self.root.after(0, lambda: self.create_visualization(binary_list))
+        # Lokale Recherche mit den Keywords, ohne Netzwerkzugriff
+        query = extract_keywords_from_ollama_response(keywords)
+        prior_art = self.pipeline.prior_art(query)
+        prior_art_section = (
+            f"\n🔎 LOKALE RECHERCHE (BM25): {query}\n" + "\n".join(
+                f"{rank}. {document['display_key'] or document['lens_id']} – {document['title']} ({score:.2f})"
+                for rank, (document, score) in enumerate(prior_art, start=1)
+            ) + "\n"
+            if prior_art else ""
+        )
+        
+        # Datensätze für die Tabelle; Titel aus den eingelesenen Zeilen
+        records = verdict_records(verdicts, titles)
+        preview = (
+            f"{binary_list[:REPORT_PREVIEW_VERDICTS]} … (alle {len(binary_list)} im Reiter 'Bewertungen')"
+            if len(binary_list) > REPORT_PREVIEW_VERDICTS else binary_list
+        )
         
         results = f"""
 ╔══════════════════════════════════════════════════════════════════════════════════╗
@@ -475,7 +987,7 @@ class OllamaExcelAnalyzer:
 
 🔍 KEYWORD-EXTRAKTION:
 {keywords}
-
+{prior_art_section}
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 ⚖️ PATENT-KONFLIKT-ANALYSE:
@@ -484,13 +996,20 @@ class OllamaExcelAnalyzer:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
 📊 EXTRAHIERTE BINÄRLISTE:
-{binary_list}
+{preview}
 
 📈 STATISTIKEN:
-• Gesamtanzahl Patente: {len(binary_list)}
+• Gesamtanzahl Patente: {len(verdicts)}
 • Konflikte erkannt: {sum(binary_list)}
 • Keine Konflikte: {len(binary_list) - sum(binary_list)}
-• Konfliktrate: {(sum(binary_list) / len(binary_list) * 100):.1f}%
+• Ohne Bewertung: {unrated_count}
+• Von Familienmitglied/Duplikat übernommen: {duplicate_count}
+• Aus früheren Analysen übernommen: {self.pipeline.last_stored}
+• Durch Vorauswahl entschieden: {self.pipeline.last_screened}
+• Konfliktrate: {conflict_rate:.1f}%
+• Ø Konfidenz: {mean_confidence:.2f}{agreement_line}
+• Cache: {cache_stats['hits']} Treffer, {cache_stats['misses']} Fehlgriffe ({cache_stats['entries']} Einträge)
+• Start: Fenster nach {self.time_to_window or 0:.2f} s, erstes Ergebnis {time_to_first_result:.1f} s nach dem Einreihen
 
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 
@@ -503,12 +1022,14 @@ class OllamaExcelAnalyzer:
 ✅ ANALYSE ERFOLGREICH ABGESCHLOSSEN
 """
         
-        # Ergebnisse in GUI anzeigen
-        self.root.after(0, lambda: self.update_results_text(results))
+        # Bericht aufbewahren; angezeigt wird er nur, wenn der Job die Anzeige besitzt
+        self.reports[job.id] = (results, binary_list, records)
+        if self.view_job == job.id:
+            self.root.after(0, lambda: self.show_report(job.id))
         
         # Ergebnisse in Datei speichern
         try:
-            with open("extracted_keywords.txt", "w", encoding="utf-8") as f:
+            with self.report_lock, open("extracted_keywords.txt", "w", encoding="utf-8") as f:
                 f.write(f"Ollama Analysis Results - {filename}\n")
                 f.write(f"Generated: {time.strftime('%d.%m.%Y %H:%M:%S')}\n\n")
                 f.write("Keywords:\n")
@@ -517,13 +1038,27 @@ class OllamaExcelAnalyzer:
                 f.write(patent_analysis)
                 f.write(f"\n\nExtracted Binary List:\n{binary_list}")
                 f.write(f"\n\nStatistics:\n")
-                f.write(f"Total Patents: {len(binary_list)}\n")
+                f.write(f"Total Patents: {len(verdicts)}\n")
                 f.write(f"Conflicts: {sum(binary_list)}\n")
                 f.write(f"No Conflicts: {len(binary_list) - sum(binary_list)}\n")
-                f.write(f"Conflict Rate: {(sum(binary_list) / len(binary_list) * 100):.1f}%\n")
+                f.write(f"Unrated: {unrated_count}\n")
+                f.write(f"From Earlier Analyses: {self.pipeline.last_stored}\n")
+                f.write(f"Decided by Screening: {self.pipeline.last_screened}\n")
+                f.write(f"Conflict Rate: {conflict_rate:.1f}%\n")
+                f.write(f"Mean Confidence: {mean_confidence:.2f}\n")
         except Exception as e:
             print(f"Fehler beim Speichern: {e}")
     
+    def show_report(self, job_id):
+        """Zeigt Bericht und Diagramm eines fertigen Jobs (Tk-Loop)"""
+        results, binary_list, records = self.reports[job_id]
+        # Live-Ansicht beenden, bevor Abschlussbericht und Diagramm sie ersetzen
+        self.stop_stream_view()
+        self.create_visualization(binary_list)
+        self.update_results_text(results)
+        self.verdict_table.set_records(records)
+        self.show_table_page()
+    
     def update_results_text(self, text):
         """Aktualisiert den Results Text"""
         self.results_text.config(state='normal')
@@ -538,21 +1073,24 @@ class OllamaExcelAnalyzer:
         self.results_text.insert('1.0', "Analyse läuft...")
         self.results_text.config(state='disabled')
         
-        # Chart-Bereich zurücksetzen
-        for widget in self.chart_container.winfo_children():
-            widget.destroy()
-        self.create_placeholder_chart()
+        # Chart und Tabelle zurücksetzen
+        if self.chart is not None:
+            self.chart.update([])
+        self.verdict_table.set_records([])
+        self.show_table_page()
     
     def show_progress(self, message):
         """Zeigt Progress Bar an"""
-        self.root.after(0, lambda: self.progress_container.pack(fill='x', pady=(0, 30)))
+        self.root.after(0, lambda: self.progress_container.pack(
+            fill='x', pady=(0, 30), after=self.queue_tree.master
+        ))
         self.root.after(0, lambda: self.progress_var.set(message))
-        self.root.after(0, lambda: self.progress_bar.start(10))
     
     def finish_processing(self):
-        """Versteckt Progress Bar nach Verarbeitung"""
-        self.progress_bar.stop()
+        """Versteckt Progress Bar, sobald keine Jobs mehr warten oder laufen"""
+        self.progress_bar['value'] = 0.0
         self.progress_container.pack_forget()
+        self.processing = False
         self.status_var.set("Analyse abgeschlossen")
     
     def update_status(self, message):
@@ -560,8 +1098,53 @@ class OllamaExcelAnalyzer:
         self.root.after(0, lambda: self.status_var.set(message))
         self.root.after(0, lambda: self.progress_var.set(message))
     
+    def on_window_ready(self):
+        """Misst die Zeit bis zum Fenster und startet das Vorladen des Modells"""
+        self.time_to_window = time.perf_counter() - PROCESS_STARTED
+        self.pipeline.telemetry.observe("time_to_window", self.time_to_window)
+        self.status_var.set(f"Bereit (Fenster nach {self.time_to_window:.2f} s)")
+        
+        thread = threading.Thread(target=self.warm_up)
+        thread.daemon = True
+        thread.start()
+    
+    def warm_up(self):
+        """Lädt das erste Modell im Hintergrund (Worker-Thread)"""
+        model = self.pipeline.models[0]
+        self.root.after(0, lambda: self.status_var.set(f"🔥 Modell {model} wird vorgeladen..."))
+        started = time.perf_counter()
+        try:
+            self.pipeline.warm_up()
+        except Exception as e:
+            message = f"⚠️ Modell {model} konnte nicht vorgeladen werden: {e}"
+        else:
+            message = f"✅ Modell {model} bereit ({time.perf_counter() - started:.1f} s)"
+        # Laufende Analysen melden ihren Status selbst
+        self.root.after(0, lambda: self.processing or self.status_var.set(message))
+    
+    def record_first_result(self, job):
+        """Erfasst die Zeit vom Einreihen des Jobs bis zu seinem ersten Ergebnis
+
+        Maßgeblich ist der erste fertige Batch; ohne Ollama-Aufruf (alles aus
+        früheren Analysen übernommen) der fertige Bericht.
+        """
+        seconds = job.first_result
+        if seconds is None:
+            seconds = job.first_result = time.time() - job.submitted
+        self.pipeline.telemetry.observe("time_to_first_result", seconds)
+        return seconds
+    
+    def on_close(self):
+        """Bricht offene Jobs ab und schließt das Fenster"""
+        self.jobs.shutdown()
+        if self.pdf_pool is not None:
+            self.pdf_pool.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+    
     def run(self):
         """Startet die Anwendung"""
+        self.root.after_idle(self.on_window_ready)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.mainloop()
 
 # Hilfsfunktion für extract_keywords_from_ollama_response falls benötigt
@@ -572,17 +1155,17 @@ def extract_keywords_from_ollama_response(response):
     return ' OR '.join([kw.strip() for kw in keywords if kw.strip()])
 
 if __name__ == "__main__":
-    # Abhängigkeiten prüfen
-    try:
-        import tkinterdnd2
-        import ollama
-        import pandas as pd
-        import matplotlib.pyplot as plt
-        import numpy as np
-    except ImportError as e:
-        print(f"Fehlende Abhängigkeit: {e}")
+    # Abhängigkeiten prüfen, ohne sie schon zu importieren
+    import importlib.util
+    import sys
+    missing = [
+        name for name in ("tkinterdnd2", "ollama", "pandas", "openpyxl", "matplotlib", "numpy")
+        if importlib.util.find_spec(name) is None
+    ]
+    if missing:
+        print(f"Fehlende Abhängigkeit: {', '.join(missing)}")
         print("Installieren Sie: pip install tkinterdnd2 ollama pandas openpyxl matplotlib numpy")
-        exit(1)
+        sys.exit(1)
     
     # Anwendung starten
     app = OllamaExcelAnalyzer()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import re
+import time
+
+from sqlite_store import SqliteStore
+
+DEFAULT_RESULT_STORE_PATH = "verdicts.sqlite"
+# Urteile, die so lange (Sekunden) nicht genutzt wurden, werden entfernt; hier 90 Tage
+DEFAULT_RESULT_MAX_AGE = 90 * 24 * 3600
+
+# Zeilen-ID am Zeilenanfang, z.B. "[12] "; sie ändert sich beim Einfügen von Zeilen
+_ROW_ID_PREFIX = re.compile(r"^\[\d+\]\s*")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_row(text):
+    """Normalisiert eine serialisierte Zeile: ohne Zeilen-ID, Leerraum vereinheitlicht"""
+    return _WHITESPACE.sub(" ", _ROW_ID_PREFIX.sub("", text)).strip()
+
+
+def analysis_version(*parts):
+    """Hash über alles, was ein Urteil beeinflusst (Prompt, Schema, Modelle, Abstimmung)"""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def row_fingerprint(text, version):
+    """Fingerabdruck einer Zeile für eine bestimmte Analyse-Version"""
+    return hashlib.sha256(f"{version}\n{normalize_row(text)}".encode("utf-8")).hexdigest()
+
+
+class ResultStore(SqliteStore):
+    """Persistente SQLite-Ablage der Urteile pro Zeile
+
+    Schlüssel ist der Fingerabdruck aus normalisiertem Zeileninhalt und
+    Analyse-Version; unveränderte Zeilen müssen so nicht erneut bewertet
+    werden. Urteile, die max_age Sekunden nicht genutzt wurden (etwa die
+    alter Analyse-Versionen), entfernt der Store beim Öffnen und Schreiben;
+    max_age=None behält alles.
+    """
+
+    TABLE = "results"
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS results (
+            fingerprint TEXT PRIMARY KEY,
+            version TEXT NOT NULL,
+            verdict TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_access REAL NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)",
+    )
+
+    def __init__(self, path=DEFAULT_RESULT_STORE_PATH, max_age=DEFAULT_RESULT_MAX_AGE, enabled=True):
+        # Bei False wird weder gelesen noch geschrieben
+        super().__init__(path, enabled)
+        self.max_age = max_age
+        self.prune()
+
+    def get_many(self, fingerprints):
+        """Liefert Fingerabdruck -> gespeichertes Urteil für alle bekannten Zeilen"""
+        if not self.enabled or not fingerprints:
+            return {}
+        fingerprints = list(dict.fromkeys(fingerprints))
+        found = {}
+        now = time.time()
+        with self._lock:
+            # SQLite begrenzt die Anzahl der Parameter pro Anfrage
+            for start in range(0, len(fingerprints), 500):
+                chunk = fingerprints[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.update(self._conn.execute(
+                    f"SELECT fingerprint, verdict FROM results WHERE fingerprint IN ({placeholders})",
+                    chunk
+                ).fetchall())
+                self._conn.execute(
+                    f"UPDATE results SET last_access = ? WHERE fingerprint IN ({placeholders})",
+                    [now, *chunk]
+                )
+            self._conn.commit()
+        return {fingerprint: json.loads(verdict) for fingerprint, verdict in found.items()}
+
+    def put_many(self, items, version):
+        """Speichert (Fingerabdruck, Urteil)-Paare; fehlende Urteile werden nicht gespeichert"""
+        if not self.enabled:
+            return
+        now = time.time()
+        records = [
+            (fingerprint, version, json.dumps(verdict, ensure_ascii=False), now, now)
+            for fingerprint, verdict in items if verdict is not None
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", records)
+            self._expire(now)
+            self._conn.commit()
+
+    def prune(self):
+        """Entfernt Urteile, die länger als max_age Sekunden nicht genutzt wurden"""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._expire(time.time())
+            self._conn.commit()
+
+    def _expire(self, now):
+        """Löscht die abgelaufenen Urteile (Sperre wird vom Aufrufer gehalten)"""
+        if self.max_age is not None:
+            self._conn.execute("DELETE FROM results WHERE last_access < ?", (now - self.max_age,))
+
+    def stats(self):
+        """Liefert die Anzahl gespeicherter Urteile und Analyse-Versionen"""
+        entries, versions = self._aggregate("COUNT(*), COUNT(DISTINCT version)", (0, 0))
+        return {"entries": entries, "versions": versions}
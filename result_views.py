@@ -0,0 +1,202 @@
+import math
+import re
+
+from cascade import STAGE_SCREENING
+
+# Einträge pro Seite der Ergebnistabelle; die Treeview enthält nie mehr Zeilen
+TABLE_PAGE_ROWS = 200
+# Spalten der Ergebnistabelle: Schlüssel -> Überschrift
+TABLE_COLUMNS = {
+    "row_id": "Zeile",
+    "title": "Titel",
+    "verdict": "Urteil",
+    "confidence": "Konfidenz",
+    "source": "Herkunft",
+}
+# Filter der Ergebnistabelle: Name -> Bedingung auf einen Datensatz
+TABLE_FILTERS = {
+    "alle": lambda record: True,
+    "Konflikt": lambda record: record["verdict"] == 1,
+    "kein Konflikt": lambda record: record["verdict"] == 0,
+    "ohne Bewertung": lambda record: record["verdict"] is None,
+}
+CHART_LABELS = ("Kein Konflikt", "Konflikt")
+CHART_COLORS = ("#10b981", "#ef4444")  # grün, rot
+
+_TITLE_PATTERN = re.compile(r"(?:^\[\d+\] |\| )Title: (.*?)(?= \| |$)")
+
+
+def row_title(text):
+    """Titel aus einer serialisierten Zeile (row_to_text), leer ohne Titel"""
+    match = _TITLE_PATTERN.search(text)
+    return match.group(1) if match else ""
+
+
+def verdict_records(verdicts, titles=None):
+    """Wandelt Zeilen-ID -> Bewertung in Datensätze für die Ergebnistabelle um"""
+    titles = titles or {}
+    records = []
+    for row_id, verdict in verdicts.items():
+        if verdict is None:
+            source = ""
+        elif "duplicate_of" in verdict:
+            source = f"Duplikat von {verdict['duplicate_of']}"
+        elif verdict.get("from_store"):
+            source = "frühere Analyse"
+        elif verdict.get("stage") == STAGE_SCREENING:
+            source = "Vorauswahl"
+        else:
+            source = "Modell"
+        records.append({
+            "row_id": row_id,
+            "title": titles.get(row_id, ""),
+            "verdict": verdict["verdict"] if verdict else None,
+            "confidence": verdict["confidence"] if verdict else None,
+            "source": source,
+        })
+    return records
+
+
+class VerdictTable:
+    """Sortier- und filterbare Sicht auf die Bewertungen, seitenweise abrufbar
+
+    Sortieren und Filtern laufen auf den Datensätzen; angezeigt wird immer
+    nur eine Seite, sodass der Aufwand in der GUI nicht mit der Anzahl der
+    Bewertungen wächst.
+    """
+
+    def __init__(self, records=(), page_rows=TABLE_PAGE_ROWS):
+        self.page_rows = page_rows
+        self.sort_column = "row_id"
+        self.descending = False
+        self.filter_name = "alle"
+        self.search = ""
+        self.page_number = 0
+        self.set_records(records)
+
+    def set_records(self, records):
+        """Ersetzt alle Datensätze und springt auf die erste Seite"""
+        self.records = list(records)
+        self._refresh()
+
+    def sort(self, column):
+        """Sortiert nach einer Spalte; erneutes Sortieren kehrt die Richtung um"""
+        if column not in TABLE_COLUMNS:
+            raise ValueError(f"Unbekannte Spalte {column!r}, erlaubt: {', '.join(TABLE_COLUMNS)}")
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        self._refresh()
+
+    def filter(self, name="alle", search=""):
+        """Filtert nach Urteil und Suchtext im Titel"""
+        if name not in TABLE_FILTERS:
+            raise ValueError(f"Unbekannter Filter {name!r}, erlaubt: {', '.join(TABLE_FILTERS)}")
+        self.filter_name = name
+        self.search = search.strip().lower()
+        self._refresh()
+
+    def _refresh(self):
+        """Berechnet die gefilterte und sortierte Sicht neu"""
+        condition = TABLE_FILTERS[self.filter_name]
+        view = [
+            record for record in self.records
+            if condition(record) and (not self.search or self.search in record["title"].lower())
+        ]
+        # Fehlende Werte stehen unabhängig von der Richtung am Ende
+        present = [record for record in view if record[self.sort_column] is not None]
+        missing = [record for record in view if record[self.sort_column] is None]
+        present.sort(key=lambda record: record[self.sort_column], reverse=self.descending)
+        self.view = present + missing
+        self.page_number = 0
+
+    @property
+    def page_count(self):
+        return max(math.ceil(len(self.view) / self.page_rows), 1)
+
+    def page(self, number=None):
+        """Liefert die Datensätze einer Seite (Standard: aktuelle Seite)"""
+        if number is not None:
+            self.page_number = min(max(number, 0), self.page_count - 1)
+        start = self.page_number * self.page_rows
+        return self.view[start:start + self.page_rows]
+
+
+class ConflictChart:
+    """Kreisdiagramm der Konflikt-Verteilung auf einer dauerhaften Zeichenfläche
+
+    Figure und Canvas entstehen einmal; Aktualisierungen ändern nur Winkel
+    und Beschriftungen der vorhandenen Artists und zeichnen per Blitting
+    ausschließlich diese neu.
+    """
+
+    def __init__(self, parent):
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        from matplotlib.figure import Figure
+        from matplotlib.patches import Patch, Wedge
+
+        self.figure = Figure(figsize=(6, 6), dpi=100)
+        self.figure.patch.set_facecolor('white')
+        self.ax = self.figure.add_subplot(111)
+        self.ax.set_xlim(-1.3, 1.3)
+        self.ax.set_ylim(-1.3, 1.3)
+        self.ax.set_aspect('equal')
+        self.ax.axis('off')
+        self.ax.set_title('Konflikt-Verteilung', fontsize=14, fontweight='bold')
+
+        # Veränderliche Artists sind "animated" und fehlen im gespeicherten Hintergrund
+        self.wedges = [
+            self.ax.add_patch(Wedge((0, 0), 1, 90, 90, facecolor=color, edgecolor='white', animated=True))
+            for color in CHART_COLORS
+        ]
+        self.percentages = [
+            self.ax.text(0, 0, "", ha='center', va='center', fontsize=11, animated=True)
+            for _ in CHART_COLORS
+        ]
+        self.summary = self.ax.text(0, -1.2, "", ha='center', va='center', fontsize=11, animated=True)
+        self.empty = self.ax.text(0, 0, 'Keine Daten verfügbar', ha='center', va='center',
+                                  fontsize=12, animated=True)
+        # Eigene Legenden-Symbole, damit die Legende zum statischen Hintergrund gehört
+        self.ax.legend([Patch(facecolor=color) for color in CHART_COLORS], CHART_LABELS,
+                       loc='upper right', frameon=False)
+
+        self.canvas = FigureCanvasTkAgg(self.figure, parent)
+        self.canvas.get_tk_widget().pack(fill='both', expand=True, padx=1, pady=1)
+        self.background = None
+        # Nach jedem vollständigen Zeichnen (z.B. Größenänderung) Hintergrund neu sichern
+        self.canvas.mpl_connect('draw_event', self._on_draw)
+        self.canvas.draw()
+
+    def _artists(self):
+        return [*self.wedges, *self.percentages, self.summary, self.empty]
+
+    def _on_draw(self, event):
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        for artist in self._artists():
+            self.ax.draw_artist(artist)
+
+    def update(self, binary_list):
+        """Zeigt die Verteilung einer Liste von 0/1-Urteilen"""
+        conflicts = sum(binary_list)
+        counts = (len(binary_list) - conflicts, conflicts)
+        total = len(binary_list)
+        self.empty.set_visible(total == 0)
+
+        angle = 90.0
+        for wedge, label, count in zip(self.wedges, self.percentages, counts):
+            share = count / total if total else 0.0
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + 360.0 * share)
+            wedge.set_visible(count > 0)
+            middle = math.radians(angle + 180.0 * share)
+            label.set_position((0.6 * math.cos(middle), 0.6 * math.sin(middle)))
+            label.set_text(f"{share:.1%}" if count else "")
+            angle += 360.0 * share
+        self.summary.set_text(f"{conflicts} von {total} mit Konflikt" if total else "")
+
+        if self.background is None:
+            self.canvas.draw_idle()
+            return
+        self.canvas.restore_region(self.background)
+        for artist in self._artists():
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)
@@ -0,0 +1,49 @@
+import sqlite3
+import threading
+
+
+class SqliteStore:
+    """Gemeinsame Grundlage der persistenten SQLite-Ablagen
+
+    Eine Verbindung pro Datei, von mehreren Threads über eine Sperre genutzt.
+    Mit enabled=False wird keine Datei angelegt, Lesen liefert nichts und
+    Schreiben entfällt. Unterklassen setzen TABLE und SCHEMA.
+    """
+
+    # Tabelle der Einträge und CREATE-Anweisungen für Tabelle und Indizes
+    TABLE = None
+    SCHEMA = ()
+
+    def __init__(self, path, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        if not enabled:
+            return
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        for statement in self.SCHEMA:
+            self._conn.execute(statement)
+        self._conn.commit()
+
+    def _aggregate(self, expression, default):
+        """Wertet Aggregate über die Tabelle aus, z.B. "COUNT(*)"; ohne Datenbank default"""
+        if self._conn is None:
+            return default
+        with self._lock:
+            return self._conn.execute(f"SELECT {expression} FROM {self.TABLE}").fetchone()
+
+    def clear(self):
+        """Löscht alle Einträge"""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.TABLE}")
+            self._conn.commit()
+
+    def close(self):
+        """Schließt die Datenbankverbindung"""
+        if self._conn is None:
+            return
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,197 @@
+import csv
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Dauerfelder der Ollama-Antwort (Nanosekunden)
+DURATION_FIELDS = ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")
+COUNT_FIELDS = ("prompt_eval_count", "eval_count")
+
+CSV_COLUMNS = (
+    "timestamp", "label", "model", "endpoint", "cached", "queue_seconds", "wall_seconds",
+    "total_seconds", "load_seconds", "prompt_eval_seconds", "eval_seconds",
+    "prompt_eval_count", "eval_count", "prompt_tokens_per_second",
+    "eval_tokens_per_second", "truncated",
+)
+# Summenfelder je (Stufe, Modell, Endpunkt, Cache) für Anzeige und Prometheus
+TOTAL_FIELDS = (
+    "prompt_eval_count", "eval_count", "total_seconds", "prompt_eval_seconds", "eval_seconds",
+    "load_seconds", "queue_seconds", "wall_seconds",
+)
+# Einzelaufrufe, die für den CSV-Export vorgehalten werden
+DEFAULT_RECENT_CALLS = 10000
+
+
+def _rate(count, seconds):
+    """Tokens pro Sekunde, 0 bei fehlender Dauer"""
+    return count / seconds if seconds else 0.0
+
+
+class Telemetry:
+    """Sammelt Metriken aller Ollama-Aufrufe sowie eigene Stufen-Timings
+
+    Aufrufe gehen als laufende Summen ein, der Speicher bleibt bei langen
+    Läufen konstant; nur die letzten recent_calls Einzelaufrufe bleiben für
+    den CSV-Export erhalten.
+    """
+
+    def __init__(self, recent_calls=DEFAULT_RECENT_CALLS):
+        self._lock = threading.Lock()
+        self.recent = deque(maxlen=recent_calls)
+        # (Stufe, Modell, Endpunkt, Cache) -> Anzahl und Summen der TOTAL_FIELDS
+        self.totals = {}
+        # Stufe -> [Anzahl, Summe Sekunden], z.B. "parse" oder "ingest"
+        self.stages = {}
+        self.truncations = 0
+
+    def record_call(self, label, request, response, queue_seconds, wall_seconds, cached=False,
+                    endpoint=None):
+        """Erfasst die Metriken einer Ollama-Antwort (endpoint: bedienender Server)"""
+        durations = {
+            field.replace("_duration", "_seconds"): (response.get(field) or 0) / 1e9
+            for field in DURATION_FIELDS
+        }
+        counts = {field: response.get(field) or 0 for field in COUNT_FIELDS}
+        num_ctx = (request.get("options") or {}).get("num_ctx")
+        # Ollama kappt den Prompt still auf num_ctx Tokens; ein fortgesetzter context
+        # belegt das Fenster mit, wird aber nicht in prompt_eval_count gezählt
+        context_tokens = len(request.get("context") or [])
+        truncated = bool(num_ctx) and counts["prompt_eval_count"] + context_tokens >= num_ctx
+
+        record = {
+            "timestamp": time.time(),
+            "label": label,
+            "model": request.get("model"),
+            "endpoint": endpoint,
+            "cached": cached,
+            "queue_seconds": queue_seconds,
+            "wall_seconds": wall_seconds,
+            **durations,
+            **counts,
+            "prompt_tokens_per_second": _rate(counts["prompt_eval_count"], durations["prompt_eval_seconds"]),
+            "eval_tokens_per_second": _rate(counts["eval_count"], durations["eval_seconds"]),
+            "truncated": truncated,
+        }
+        key = (label, record["model"], endpoint, cached)
+        with self._lock:
+            self.recent.append(record)
+            entry = self.totals.get(key)
+            if entry is None:
+                entry = self.totals[key] = dict.fromkeys(("calls",) + TOTAL_FIELDS, 0)
+            entry["calls"] += 1
+            for field in TOTAL_FIELDS:
+                entry[field] += record[field]
+            if truncated:
+                self.truncations += 1
+        if truncated and not cached:
+            logger.warning(
+                "Prompt für %s vermutlich abgeschnitten: %d Tokens bei num_ctx=%d",
+                label, counts["prompt_eval_count"] + context_tokens, num_ctx
+            )
+        return record
+
+    def observe(self, stage, seconds):
+        """Erfasst die Dauer einer eigenen Verarbeitungsstufe"""
+        with self._lock:
+            entry = self.stages.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def summary(self):
+        """Fasst die bisherigen Aufrufe für die Anzeige zusammen"""
+        with self._lock:
+            totals = [(key, dict(entry)) for key, entry in self.totals.items()]
+            truncations = self.truncations
+            stages = {stage: tuple(values) for stage, values in self.stages.items()}
+        # Gezählt werden nur echte Aufrufe, Cache-Treffer getrennt
+        sums = dict.fromkeys(("calls",) + TOTAL_FIELDS, 0)
+        cached = 0
+        # Durchsatz je Endpunkt: Aufrufe, Tokens und Tokens pro Sekunde Laufzeit
+        endpoints = {}
+        for (_, _, endpoint, is_cached), entry in totals:
+            if is_cached:
+                cached += entry["calls"]
+                continue
+            for field in sums:
+                sums[field] += entry[field]
+            if endpoint is None:
+                continue
+            target = endpoints.setdefault(endpoint, {"calls": 0, "eval_tokens": 0, "wall_seconds": 0.0})
+            target["calls"] += entry["calls"]
+            target["eval_tokens"] += entry["eval_count"]
+            target["wall_seconds"] += entry["wall_seconds"]
+        prompt_tokens = sums["prompt_eval_count"]
+        eval_tokens = sums["eval_count"]
+        prompt_seconds = sums["prompt_eval_seconds"]
+        total_seconds = sums["total_seconds"]
+        for entry in endpoints.values():
+            entry["tokens_per_second"] = _rate(entry["eval_tokens"], entry["wall_seconds"])
+        return {
+            "calls": sums["calls"],
+            "cached": cached,
+            "truncations": truncations,
+            "prompt_tokens": prompt_tokens,
+            "eval_tokens": eval_tokens,
+            "prompt_tokens_per_second": _rate(prompt_tokens, prompt_seconds),
+            "eval_tokens_per_second": _rate(eval_tokens, sums["eval_seconds"]),
+            "load_seconds": sums["load_seconds"],
+            "prompt_eval_share": prompt_seconds / total_seconds if total_seconds else 0.0,
+            "queue_seconds": sums["queue_seconds"],
+            "stages": stages,
+            "endpoints": endpoints,
+        }
+
+    def export_csv(self, path):
+        """Schreibt die letzten Einzelaufrufe (höchstens recent_calls) als CSV"""
+        with self._lock:
+            calls = list(self.recent)
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(calls)
+
+    def to_prometheus(self):
+        """Liefert die Metriken im Prometheus-Textformat"""
+        with self._lock:
+            totals = {
+                (label, model, endpoint or "", "true" if cached else "false"): dict(entry)
+                for (label, model, endpoint, cached), entry in self.totals.items()
+            }
+            stages = {stage: tuple(values) for stage, values in self.stages.items()}
+            truncations = self.truncations
+
+        lines = []
+        metrics = (
+            ("ollama_calls_total", "counter", "Anzahl Ollama-Aufrufe", "calls"),
+            ("ollama_prompt_tokens_total", "counter", "Ausgewertete Prompt-Tokens", "prompt_eval_count"),
+            ("ollama_eval_tokens_total", "counter", "Generierte Tokens", "eval_count"),
+            ("ollama_total_seconds_total", "counter", "Gesamtdauer laut Ollama", "total_seconds"),
+            ("ollama_prompt_eval_seconds_total", "counter", "Dauer der Prompt-Auswertung", "prompt_eval_seconds"),
+            ("ollama_eval_seconds_total", "counter", "Dauer der Generierung", "eval_seconds"),
+            ("ollama_load_seconds_total", "counter", "Ladezeit des Modells", "load_seconds"),
+            ("ollama_queue_seconds_total", "counter", "Wartezeit auf einen freien Slot", "queue_seconds"),
+        )
+        for name, kind, help_text, field in metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (label, model, endpoint, cached), entry in sorted(totals.items(), key=lambda item: str(item[0])):
+                lines.append(
+                    f'{name}{{label="{label}",model="{model}",endpoint="{endpoint}",cached="{cached}"}} {entry[field]}'
+                )
+        lines.append("# HELP ollama_truncations_total Vermutlich abgeschnittene Prompts")
+        lines.append("# TYPE ollama_truncations_total counter")
+        lines.append(f"ollama_truncations_total {truncations}")
+        lines.append("# HELP pipeline_stage_seconds Dauer eigener Verarbeitungsstufen")
+        lines.append("# TYPE pipeline_stage_seconds summary")
+        for stage, (count, seconds) in sorted(stages.items()):
+            lines.append(f'pipeline_stage_seconds_sum{{stage="{stage}"}} {seconds}')
+            lines.append(f'pipeline_stage_seconds_count{{stage="{stage}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def export_prometheus(self, path):
+        """Schreibt die Metriken im Prometheus-Textformat in eine Datei"""
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
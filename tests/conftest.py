@@ -0,0 +1,51 @@
+import os
+import sys
+
+# Die Module liegen flach im Repository, die Benchmarks enthalten den Mock-Ollama
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def mock_ollama():
+    """Lokaler Mock-Ollama ohne simulierte Rechenzeit"""
+    from mock_ollama import MockOllamaServer
+
+    with MockOllamaServer(time_scale=0.0, parallel=4) as server:
+        yield server
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, request):
+    """Erzeugt Pipelines, deren Dateien im Testverzeichnis liegen
+
+    Ohne host wird der Mock-Ollama gestartet; Tests ohne Ollama-Aufrufe
+    geben einen eigenen host an und sparen sich den Server.
+    """
+    from pipeline import PatentPipeline
+
+    pipelines = []
+
+    def factory(**options):
+        settings = {
+            "use_cache": False,
+            "use_index": False,
+            "incremental": False,
+            "result_path": str(tmp_path / "verdicts.sqlite"),
+            "bm25_dir": str(tmp_path / "bm25"),
+            "calibration_path": str(tmp_path / "calibration.csv"),
+        }
+        settings.update(options)
+        if "host" not in settings and "hosts" not in settings:
+            settings["host"] = request.getfixturevalue("mock_ollama").url
+        pipeline = PatentPipeline(**settings)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield factory
+    for pipeline in pipelines:
+        pipeline.results.close()
+        pipeline.cache.close()
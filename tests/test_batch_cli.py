@@ -0,0 +1,65 @@
+import json
+import os
+
+import pytest
+
+import batch_cli
+from batch_cli import analyze_workbook, collect_workbooks
+from pipeline import load_rows
+
+CSV = (
+    "Lens ID,Title,Abstract\n"
+    "L1,Sauerstoffsensor,Sensor mit Elektrolyt und Membran\n"
+    "L2,Batterie,Zelle mit Separator und Anode\n"
+)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    path = tmp_path / "patente.csv"
+    path.write_text(CSV, encoding="utf-8")
+    return str(path)
+
+
+def test_collect_workbooks_from_dirs_globs_and_files(tmp_path):
+    for name in ("a.csv", "b.xlsx", "c.txt", "d.pdf"):
+        (tmp_path / name).write_text("x")
+    found = collect_workbooks([str(tmp_path), str(tmp_path / "*.csv"), str(tmp_path / "fehlt.csv")])
+    assert found == [str(tmp_path / "a.csv"), str(tmp_path / "b.xlsx")]
+    assert collect_workbooks([str(tmp_path)], (".pdf",)) == [str(tmp_path / "d.pdf")]
+
+
+def test_analyze_workbook_writes_one_header_per_file(make_pipeline, workbook):
+    records = analyze_workbook(make_pipeline(), workbook, *load_rows(workbook))
+    assert [record["type"] for record in records] == ["file", "patent", "patent"]
+    header, *patents = records
+    assert header["file"] == workbook and "keywords" in header and "prior_art" in header
+    assert [record["row_id"] for record in patents] == [1, 2]
+    assert all("keywords" not in record for record in patents)
+    assert all(record["verdict"] in (0, 1) for record in patents)
+
+
+def run_cli(tmp_path, workbook, host):
+    output = str(tmp_path / "results.jsonl")
+    code = batch_cli.main([
+        workbook, "-o", output, "--hosts", host, "--workers", "1",
+        "--no-index", "--no-cache", "--full", "--bm25-dir", str(tmp_path / "bm25"),
+    ])
+    with open(output, encoding="utf-8") as f:
+        return code, [json.loads(line) for line in f]
+
+
+def test_cli_succeeds_with_all_rows_rated(tmp_path, monkeypatch, mock_ollama, workbook):
+    monkeypatch.chdir(tmp_path)
+    code, records = run_cli(tmp_path, workbook, mock_ollama.url)
+    assert code == 0
+    assert sum(record["type"] == "patent" for record in records) == 2
+
+
+def test_cli_fails_when_no_row_was_rated(tmp_path, monkeypatch, workbook):
+    monkeypatch.chdir(tmp_path)
+    # Port 9 (discard) ist lokal nicht erreichbar
+    code, records = run_cli(tmp_path, workbook, "http://127.0.0.1:9")
+    assert code == 1
+    assert [record["verdict"] for record in records if record["type"] == "patent"] == [None, None]
+    assert not os.path.exists(tmp_path / "verdicts.sqlite")
@@ -0,0 +1,57 @@
+import pytest
+
+from batching import batch_budget, batch_content, count_tokens, merge_verdicts, pack_rows, row_to_text, truncate_to_tokens
+
+
+def test_count_tokens_splits_numbers_and_words():
+    # "123456" zählt als zwei Zifferngruppen, "ab" als ein Wortstück, "!" einzeln
+    assert count_tokens("123456") == 2
+    assert count_tokens("ab !") == 2
+    assert count_tokens("") == 0
+
+
+def test_truncate_to_tokens_respects_budget():
+    text = "word " * 100
+    truncated = truncate_to_tokens(text, 10)
+    assert count_tokens(truncated) <= 10
+    assert text.startswith(truncated)
+    assert truncate_to_tokens("short", 10) == "short"
+
+
+def test_row_to_text_skips_empty_cells():
+    row = {"Title": " Sensor ", "Abstract": float("nan"), "Claims": "", "PN": None}
+    assert row_to_text(3, row) == "[3] Title: Sensor"
+
+
+def test_batch_budget_rejects_too_small_context():
+    with pytest.raises(ValueError):
+        batch_budget("{content} {count}", context_tokens=100, reserved_output=100)
+
+
+def test_pack_rows_keeps_order_and_budget():
+    rows = [(i, f"[{i}] " + "word " * 20) for i in range(1, 11)]
+    budget = 60
+    batches = pack_rows(rows, budget)
+    assert [row_id for batch in batches for row_id, _ in batch] == list(range(1, 11))
+    for batch in batches:
+        assert sum(count_tokens(text) + 1 for _, text in batch) <= budget
+
+
+def test_pack_rows_truncates_oversized_row_into_own_batch():
+    rows = [(1, "short"), (2, "long " * 500), (3, "short")]
+    batches = pack_rows(rows, 50)
+    assert [[row_id for row_id, _ in batch] for batch in batches] == [[1], [2], [3]]
+    assert count_tokens(batches[1][0][1]) <= 49
+
+
+def test_pack_rows_max_rows():
+    rows = [(i, "x") for i in range(5)]
+    assert [len(batch) for batch in pack_rows(rows, 1000, max_rows=2)] == [2, 2, 1]
+
+
+def test_merge_verdicts_fills_missing_and_drops_foreign_ids():
+    batches = [[(2, "b"), (1, "a")], [(3, "c")]]
+    merged = merge_verdicts(batches, [{1: "x", 99: "foreign"}, {3: "z"}])
+    assert merged == {1: "x", 2: None, 3: "z"}
+    assert list(merged) == [1, 2, 3]
+    assert batch_content(batches[0]) == "b\na"
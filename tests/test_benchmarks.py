@@ -0,0 +1,66 @@
+import json
+
+import httpx
+import pandas as pd
+import pytest
+
+from dedup import DuplicateFinder
+from mock_ollama import MockOllamaServer
+from run_benchmarks import percentile, run_case, synthetic_workbook
+
+SOURCE = pd.DataFrame({
+    "Lens ID": ["L1", "L2"],
+    "Simple Family Members": ["F1;;F2", ""],
+    "Title": ["Sauerstoffsensor", "Batterie"],
+    "Abstract": [
+        "ein elektrochemischer sensor mit elektrolyt membran und zwei elektroden für sauerstoff",
+        "eine batteriezelle mit separator anode kathode und flüssigem elektrolyt im gehäuse",
+    ],
+})
+
+
+def test_percentile_interpolates():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([1, 2, 3, 4], 0.5) == 2.5
+    assert percentile([5], 0.95) == 5
+
+
+def test_synthetic_copies_are_not_duplicates():
+    df = synthetic_workbook(SOURCE, 5)
+    assert len(df) == 5
+    assert df["Lens ID"].tolist() == ["L1", "L2", "L1-1", "L2-1", "L1-2"]
+    assert df.loc[2, "Simple Family Members"] == "F1-1;;F2-1"
+    finder = DuplicateFinder()
+    for row_id, record in enumerate(df.to_dict("records"), start=1):
+        finder.add(row_id, record)
+    assert finder.duplicates() == {}
+
+
+def test_mock_server_tags_models_and_answers_every_row(mock_ollama):
+    prompt = "[3] Title: Sensor\n[7] Title: Batterie"
+    response = httpx.post(f"{mock_ollama.url}/api/generate", json={
+        "model": "llama3", "prompt": prompt, "format": {"type": "object"}, "stream": False,
+    }).json()
+    assert [entry["row_id"] for entry in json.loads(response["response"])["verdicts"]] == [3, 7]
+    assert mock_ollama.loaded_models == {"llama3:latest"}
+    assert mock_ollama.requests == 1
+
+
+def test_mock_server_drops_connections_after_fail_after():
+    with MockOllamaServer(time_scale=0.0, fail_after=1) as server:
+        request = {"model": "llama3", "prompt": "x", "stream": False}
+        assert httpx.post(f"{server.url}/api/generate", json=request).status_code == 200
+        with pytest.raises(httpx.TransportError):
+            httpx.post(f"{server.url}/api/generate", json=request)
+        assert server.posts == 2
+
+
+def test_run_case_measures_the_ingest_path(tmp_path, monkeypatch, mock_ollama):
+    monkeypatch.chdir(tmp_path)
+    workbook = str(tmp_path / "patente.csv")
+    synthetic_workbook(SOURCE, 4).to_csv(workbook, index=False)
+    result = run_case([mock_ollama.url], workbook, 2048, 2, repeats=1)
+    assert result["rows"] == 4
+    assert result["requests"] >= result["batches"] >= 1
+    assert result["failed_requests"] == 0
+    assert result["run_p50_s"] > 0
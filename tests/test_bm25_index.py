@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import bm25_index
+from bm25_index import BM25Index, code_terms, decode_varints, document_terms, encode_varints, parse_query
+
+PATENTS = pd.DataFrame({
+    "Lens ID": ["L1", "L2", "L3"],
+    "Display Key": ["D1", "D2", "D3"],
+    "Title": ["Oxygen sensor", "Lithium battery", "Sensor housing"],
+    "Abstract": ["An electrochemical oxygen sensor", "A battery with separator", "A housing for a gas sensor"],
+    "CPC Classifications": ["G01N27/404", "H01M50/40", "G01N27/416"],
+})
+
+
+def lens_ids(hits):
+    return [document["lens_id"] for document, _ in hits]
+
+
+@pytest.mark.parametrize("values", [[], [0], [127, 128, 16383, 16384], [2 ** 63 - 1, 5, 0]])
+def test_varint_round_trip(values):
+    encoded = encode_varints(values)
+    assert decode_varints(encoded).tolist() == values
+
+
+def test_varint_sizes():
+    assert len(encode_varints([127])) == 1
+    assert len(encode_varints([128])) == 2
+    assert encode_varints([300]).tolist() == [0xAC, 0x02]
+
+
+def test_query_parsing_and_code_terms():
+    assert code_terms("G01N27/404") == ["g01n", "g01n27", "g01n27/404"]
+    assert parse_query('"oxygen sensor" OR G01N27/404, the battery') == [
+        "oxygen", "sensor", "g01n", "g01n27", "g01n27/404", "404", "battery"
+    ]
+
+
+def test_document_terms_are_weighted_by_field():
+    counts, length = document_terms(PATENTS.iloc[0].to_dict())
+    assert counts["oxygen"] == 3 + 1
+    assert counts["g01n27"] == 2
+    assert length == sum(counts.values())
+
+
+def test_search_ranks_title_matches_first(tmp_path):
+    index = BM25Index.build(PATENTS, str(tmp_path / "bm25"))
+    assert lens_ids(index.search("oxygen sensor")) == ["L1", "L3"]
+    assert lens_ids(index.search("G01N27")) == ["L1", "L3"]
+    assert index.search("unbekannt") == []
+    assert lens_ids(BM25Index.load(str(tmp_path / "bm25")).search("battery")) == ["L2"]
+
+
+def test_reindexed_patents_replace_older_versions(tmp_path):
+    index = BM25Index.build(PATENTS, str(tmp_path / "bm25"))
+    update = pd.DataFrame({"Lens ID": ["L2"], "Title": ["Oxygen pump"], "Abstract": ["Pump"]})
+    index.add(update)
+    assert len(index) == 3 and len(index.segments) == 2
+    assert lens_ids(index.search("battery")) == []
+    assert set(lens_ids(index.search("oxygen"))) == {"L1", "L2"}
+
+
+def test_merge_keeps_results_and_drops_replaced_documents(tmp_path, monkeypatch):
+    index = BM25Index.build(PATENTS, str(tmp_path / "bm25"))
+    index.add(pd.DataFrame({"Lens ID": ["L2"], "Title": ["Oxygen pump"]}))
+    index.add(pd.DataFrame({"Lens ID": ["L4"], "Title": ["Gas sensor array"]}))
+    before = [(lens_ids(index.search(query)), [round(s, 4) for _, s in index.search(query)])
+              for query in ("sensor", "oxygen", "battery")]
+    index.merge()
+    assert len(index.segments) == 1 and len(index) == 4
+    after = [lens_ids(index.search(query)) for query in ("sensor", "oxygen", "battery")]
+    assert after == [ids for ids, _ in before]
+    # Nach dem Zusammenführen zählen ersetzte Fassungen nicht mehr in den Statistiken
+    assert sum(len(segment) for segment in index.segments) == 4
+    # Zu viele Segmente werden automatisch zusammengeführt
+    monkeypatch.setattr(bm25_index, "MAX_SEGMENTS", 1)
+    index.add(pd.DataFrame({"Lens ID": ["L5"], "Title": ["Valve"]}))
+    assert len(index.segments) == 1
+    assert np.array_equal(np.sort(lens_ids(index.search("valve"))), ["L5"])
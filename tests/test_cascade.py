@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from cascade import (
+    DEFAULT_BAND, STAGE_SCREENING, calibrated_band, lexical_overlap, row_words, screen, screening_probabilities
+)
+
+CALIBRATION = "Nr,llama,mistral\n1,0.9,0.6\n2,0.1,\n3,0.95,0.7\n"
+ROWS = [(1, "[1] Title: Sauerstoffsensor | Abstract: elektrochemischer Sensor")]
+
+
+def test_row_words_skip_row_ids_and_column_names():
+    assert row_words(ROWS[0][1]) == {"sauerstoffsensor", "elektrochemischer", "sensor"}
+
+
+def test_lexical_overlap_uses_the_best_hit():
+    hits = [({"text": "Batterie"}, 0.9), ({"text": "Sensor, Sauerstoffsensor"}, 0.1)]
+    assert lexical_overlap({"sensor", "sauerstoffsensor", "gehäuse"}, hits) == 1.0
+    assert lexical_overlap(set(), hits) == 0.0
+
+
+def test_calibrated_band_uses_the_matching_model_column(tmp_path):
+    path = tmp_path / "calibration.csv"
+    path.write_text(CALIBRATION, encoding="utf-8")
+    # Median der llama-Spalte 0.9 -> Band (0.1, 0.9)
+    assert calibrated_band(str(path), "llama3") == pytest.approx((0.1, 0.9))
+    # Ohne passende Spalte zählen alle Werte; leere Zellen entfallen
+    assert calibrated_band(str(path), "gemma") == pytest.approx((0.3, 0.7))
+
+
+def test_calibrated_band_defaults_without_measurements(tmp_path):
+    assert calibrated_band(str(tmp_path / "fehlt.csv"), "llama3") == DEFAULT_BAND
+    path = tmp_path / "leer.csv"
+    path.write_text("Nr,llama\n", encoding="utf-8")
+    assert calibrated_band(str(path), "llama3") == DEFAULT_BAND
+
+
+def test_screening_probabilities_grow_with_similarity():
+    rows = ROWS * 3
+    hits = [[({"text": "Batterie"}, score)] for score in (0.1, 0.5, 0.9)]
+    probabilities = screening_probabilities(rows, hits, ["classification"] * 3)
+    assert np.all(np.diff(probabilities) > 0)
+    # Kosinus-Werte unterhalb der Schwelle zählen als unähnlich
+    vector = screening_probabilities(ROWS * 2, [[({"text": ""}, 0.2)], [({"text": ""}, 0.5)]], ["vector"] * 2)
+    assert vector[0] == pytest.approx(vector[1])
+
+
+def test_screen_decides_only_outside_the_band():
+    rows = [(1, "a"), (2, "b"), (3, "c"), (4, "d")]
+    decided, uncertain = screen(rows, [0.05, 0.5, 0.95, 0.2], (0.2, 0.8))
+    assert decided == {
+        1: {"verdict": 0, "confidence": pytest.approx(0.95), "stage": STAGE_SCREENING},
+        3: {"verdict": 1, "confidence": pytest.approx(0.95), "stage": STAGE_SCREENING},
+        4: {"verdict": 0, "confidence": pytest.approx(0.8), "stage": STAGE_SCREENING},
+    }
+    assert uncertain == [(2, "b")]
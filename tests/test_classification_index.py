@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from classification_index import ClassificationIndex, classification_prefix, extract_codes
+from patent_store import import_csv
+
+DF = pd.DataFrame({
+    "Lens ID": ["L0", "L1", "L2"],
+    "Display Key": ["D0", "D1", "D2"],
+    "Title": ["Sensor", "Sensorgehäuse", "Batterie"],
+    "Abstract": ["Sauerstoff", "Gehäuse", "Separator"],
+    "CPC Classifications": ["G01N27/404;;G01N27/49", "G01N27/416;;G01N33/00", "H01M50/40"],
+    "IPCR Classifications": ["G01N27/404", None, "ungültig"],
+})
+
+
+@pytest.mark.parametrize("depth, expected", [("subclass", "G01N"), ("group", "G01N27"), ("subgroup", "G01N27/404")])
+def test_classification_prefix_depths(depth, expected):
+    assert classification_prefix("G01N 27/404", depth) == expected
+
+
+def test_classification_prefix_rejects_invalid_codes():
+    assert classification_prefix("kein Code") is None
+    with pytest.raises(ValueError):
+        classification_prefix("G01N27/404", "section")
+
+
+def test_extract_codes_deduplicates_prefixes():
+    assert extract_codes("[1] CPC: G01N27/404;;G01N27/49 | IPCR: H01M50/40") == ["G01N27", "H01M50"]
+
+
+def test_search_ranks_by_jaccard(tmp_path):
+    index = ClassificationIndex.build(DF, str(tmp_path / "index"))
+    hits = index.search([["G01N27"], ["B60L1"]], k=5)
+    # L0 hat nur G01N27 (1/1), L1 zusätzlich G01N33 (1/2); L2 teilt keinen Code
+    assert [(document["lens_id"], score) for document, score in hits[0]] == [("L0", 1.0), ("L1", 0.5)]
+    assert hits[1] == []
+
+
+def test_search_limits_to_k(tmp_path):
+    index = ClassificationIndex.build(DF, str(tmp_path / "index"), depth="subclass")
+    hits = index.search([["G01N"]], k=1)[0]
+    assert [document["lens_id"] for document, _ in hits] == ["L0"]
+
+
+def test_store_and_dataframe_build_the_same_index(tmp_path):
+    csv_path = tmp_path / "patente.csv"
+    DF.to_csv(csv_path, index=False)
+    store = import_csv(str(csv_path), str(tmp_path / "store"))
+    from_df = ClassificationIndex.build(DF, str(tmp_path / "df"))
+    from_store = ClassificationIndex.build(store, str(tmp_path / "store_index"))
+    query = [["G01N27", "G01N33"], ["H01M50"]]
+    assert ([[(d["lens_id"], s) for d, s in hits] for hits in from_df.search(query)]
+            == [[(d["lens_id"], s) for d, s in hits] for hits in from_store.search(query)])
+    assert ClassificationIndex.exists(str(tmp_path / "store_index"))
+
+
+def test_build_without_codes_fails(tmp_path):
+    with pytest.raises(ValueError):
+        ClassificationIndex.build(DF.drop(columns=["CPC Classifications", "IPCR Classifications"]),
+                                  str(tmp_path / "index"))
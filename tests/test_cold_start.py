@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+import time
+
+from job_queue import Job, JobQueue
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_program_import_defers_heavy_modules():
+    code = (
+        "import sys; import program; "
+        "print(','.join(m for m in ('ollama', 'httpx', 'pandas', 'matplotlib', 'openpyxl', 'tkinterdnd2') "
+        "if m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+
+def test_warm_up_loads_the_first_model(make_pipeline, mock_ollama):
+    pipeline = make_pipeline(models=["mistral", "llama3"])
+    pipeline.warm_up()
+    assert mock_ollama.loaded_models == {"mistral:latest"}
+    assert pipeline.telemetry.summary()["calls"] == 1
+
+
+def test_first_result_is_timed_from_submission():
+    queue = JobQueue(lambda job: None)
+    try:
+        job = Job(1, "patente.xlsx")
+        job.submitted = time.time() - 5
+        queue.report_progress(job, 0, 4)
+        assert job.first_result is None
+        queue.report_progress(job, 1, 4)
+        first = job.first_result
+        assert 5 <= first < 6
+        queue.report_progress(job, 2, 4)
+        assert job.first_result == first
+    finally:
+        queue.shutdown()
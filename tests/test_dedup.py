@@ -0,0 +1,70 @@
+import numpy as np
+
+from dedup import DuplicateFinder, _UnionFind, collapse_rows, expand_verdicts, minhash, shingles
+
+ABSTRACT = ("an electrochemical oxygen sensor with a positive electrode a negative electrode "
+            "an electrolyte solution and a separation membrane between both electrodes")
+
+
+def find(records):
+    finder = DuplicateFinder()
+    for row_id, record in records.items():
+        finder.add(row_id, record)
+    return finder.duplicates()
+
+
+def test_union_find_keeps_smallest_id_as_representative():
+    groups = _UnionFind()
+    for item in (5, 3, 9, 1):
+        groups.add(item)
+    groups.union(5, 9)
+    groups.union(9, 3)
+    groups.union(1, 1)
+    assert {groups.find(item) for item in (3, 5, 9)} == {3}
+    assert groups.find(1) == 1
+
+
+def test_minhash_estimates_jaccard_similarity():
+    same = minhash(shingles(ABSTRACT))
+    assert np.array_equal(same, minhash(shingles(ABSTRACT.upper())))
+    other = minhash(shingles("a lithium battery cell with anode cathode and a polymer separator in a housing"))
+    assert np.mean(same == other) < 0.2
+
+
+def test_family_members_are_grouped_transitively():
+    duplicates = find({
+        1: {"Lens ID": "A", "Simple Family Members": "B"},
+        2: {"Lens ID": "C", "Simple Family Members": ""},
+        3: {"Lens ID": "D", "Simple Family Members": "B;;C"},
+        4: {"Lens ID": "E"},
+    })
+    assert duplicates == {2: 1, 3: 1}
+
+
+def test_near_duplicate_abstracts_collapse_but_short_ones_do_not():
+    duplicates = find({
+        1: {"Abstract": ABSTRACT},
+        2: {"Abstract": ABSTRACT.replace("between both", "between the two")},
+        3: {"Abstract": "a lithium battery cell with anode cathode and a polymer separator in a housing"},
+        4: {"Abstract": "oxygen sensor"},
+        5: {"Abstract": "oxygen sensor"},
+    })
+    assert duplicates == {2: 1}
+
+
+def test_missing_cells_are_ignored():
+    assert find({1: {"Lens ID": None, "Abstract": float("nan")}, 2: {"Lens ID": None}}) == {}
+
+
+def test_collapse_and_expand_round_trip():
+    rows = [(1, "a"), (2, "b"), (3, "c")]
+    duplicates = {2: 1, 3: 7}
+    assert collapse_rows(rows, duplicates) == [(1, "a")]
+    expanded = expand_verdicts({1: {"verdict": 1, "confidence": 0.9}}, duplicates,
+                               known={7: {"verdict": 0, "confidence": 0.6}})
+    assert expanded == {
+        1: {"verdict": 1, "confidence": 0.9},
+        2: {"verdict": 1, "confidence": 0.9, "duplicate_of": 1},
+        3: {"verdict": 0, "confidence": 0.6, "duplicate_of": 7},
+    }
+    assert expand_verdicts({1: None}, {2: 1}) == {1: None, 2: None}
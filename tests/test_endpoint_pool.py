@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from endpoint_pool import EndpointPool, default_hosts, model_key
+from llm_engine import EndpointSlots, RequestEngine
+from mock_ollama import MockOllamaServer
+from run_benchmarks import dead_host
+
+HOSTS = ["http://gpu1:11434", "http://gpu2:11434"]
+
+
+def generate_all(engine, count):
+    """Startet count gleichzeitige generate-Anfragen"""
+    async def requests():
+        return await asyncio.gather(*(
+            engine.generate(model="llama3", prompt=f"prompt {i}", stream=False) for i in range(count)
+        ))
+
+    return engine.run(requests())
+
+
+def test_model_key_adds_the_default_tag():
+    assert model_key("llama3") == "llama3:latest"
+    assert model_key("llama3:8b") == "llama3:8b"
+    assert model_key("registry:5000/llama3") == "registry:5000/llama3:latest"
+    assert model_key(None) is None
+
+
+def test_default_hosts_from_environment(monkeypatch):
+    monkeypatch.setenv("OLLAMA_HOSTS", " http://a:1, ,http://b:2")
+    assert default_hosts() == ["http://a:1", "http://b:2"]
+    monkeypatch.delenv("OLLAMA_HOSTS")
+    assert default_hosts() == [None]
+
+
+def test_acquire_prefers_endpoints_with_the_model_loaded():
+    pool = EndpointPool(HOSTS + HOSTS[:1])
+    assert len(pool) == 2
+    first, second = pool.endpoints
+    second.loaded_models.add("llama3:latest")
+    assert pool.acquire("llama3") is second
+    # Der belegte Slot zählt: jetzt gewinnt der freie Endpunkt
+    assert pool.acquire("llama3") is first
+    assert pool.acquire("llama3", exclude=[first, second]) is None
+
+
+def test_failed_endpoints_are_avoided_until_they_answer_again():
+    pool = EndpointPool(HOSTS)
+    first, second = pool.endpoints
+    pool.release(pool.acquire("llama3", candidates=[first]), error=ConnectionError())
+    assert not first.healthy and first.failures == 1
+    assert pool.acquire("llama3") is second
+    # Sind alle ungesund, wird trotzdem einer versucht
+    second.healthy = False
+    assert pool.acquire("llama3", exclude=[second]) is first
+    pool.release(first, model="llama3")
+    assert first.healthy and "llama3:latest" in first.loaded_models
+    assert [entry["outstanding"] for entry in pool.stats()] == [0, 1]
+
+
+def test_slots_limit_requests_per_endpoint():
+    pool = EndpointPool(HOSTS)
+    first, second = pool.endpoints
+
+    async def scenario():
+        slots = EndpointSlots(pool, per_endpoint=1)
+        taken = [await slots.acquire("llama3"), await slots.acquire("llama3")]
+        waiting = asyncio.ensure_future(slots.acquire("llama3"))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        slots.release(taken[0], model="llama3")
+        return taken, await asyncio.wait_for(waiting, 1)
+
+    taken, third = asyncio.run(scenario())
+    assert set(taken) == {first, second}
+    assert third is taken[0]
+
+
+def test_requests_fail_over_to_a_failing_endpoints_neighbour(mock_ollama):
+    with MockOllamaServer(time_scale=0.0, parallel=4, fail_after=2) as failing:
+        engine = RequestEngine(max_concurrency=2, hosts=[failing.url, mock_ollama.url])
+        responses = generate_all(engine, 12)
+    assert len(responses) == 12 and all(response["response"] for response in responses)
+    stats = {entry["endpoint"]: entry for entry in engine.pool.stats()}
+    assert stats[failing.url]["failures"] > 0 and not stats[failing.url]["healthy"]
+    assert stats[mock_ollama.url]["failures"] == 0
+    assert mock_ollama.posts >= 12 - failing.fail_after
+
+
+def test_unreachable_endpoints_are_skipped(mock_ollama):
+    engine = RequestEngine(hosts=[dead_host(), mock_ollama.url])
+    responses = generate_all(engine, 3)
+    assert all(response["response"] for response in responses)
+    assert not engine.pool.endpoints[0].healthy
+
+
+def test_the_last_error_is_raised_when_no_endpoint_is_left():
+    engine = RequestEngine(hosts=[dead_host(), dead_host()])
+    with pytest.raises(ConnectionError):
+        generate_all(engine, 1)
+    assert all(entry["failures"] == 1 for entry in engine.pool.stats())
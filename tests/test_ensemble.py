@@ -0,0 +1,72 @@
+import pytest
+
+from ensemble import agreement_summary, combine_verdicts, model_groups, parse_model_weights
+
+
+def vote(verdict, confidence):
+    return {"verdict": verdict, "confidence": confidence}
+
+
+def test_model_groups():
+    assert model_groups(["a", "b", "c"], 2) == [["a", "b"], ["c"]]
+    with pytest.raises(ValueError):
+        model_groups(["a"], 0)
+
+
+def test_parse_model_weights():
+    assert parse_model_weights(["llama3=0.8", "hf.co/x:q4=1.5"]) == {"llama3": 0.8, "hf.co/x:q4": 1.5}
+    assert parse_model_weights(None) == {}
+    with pytest.raises(ValueError):
+        parse_model_weights(["llama3"])
+
+
+def test_majority_vote_with_agreement():
+    combined = combine_verdicts({
+        "a": {1: vote(1, 0.9), 2: vote(0, 0.8)},
+        "b": {1: vote(1, 0.7), 2: None},
+        "c": {1: vote(0, 0.6), 2: vote(0, 0.6)},
+    })
+    assert combined[1]["verdict"] == 1
+    assert combined[1]["confidence"] == pytest.approx(0.8)
+    assert combined[1]["agreement"] == pytest.approx(2 / 3)
+    assert combined[1]["votes"] == {"a": 1, "b": 1, "c": 0}
+    # Fehlende Stimmen zählen nicht mit
+    assert combined[2]["agreement"] == 1.0 and set(combined[2]["votes"]) == {"a", "c"}
+
+
+def test_majority_tie_is_broken_by_weighted_confidence():
+    combined = combine_verdicts({"a": {1: vote(1, 0.6)}, "b": {1: vote(0, 0.9)}}, weights={"a": 2.0})
+    assert combined[1]["verdict"] == 1
+
+
+def test_weighted_vote_can_overrule_the_majority():
+    model_verdicts = {"a": {1: vote(1, 0.9)}, "b": {1: vote(0, 0.5)}, "c": {1: vote(0, 0.5)}}
+    assert combine_verdicts(model_verdicts)[1]["verdict"] == 0
+    combined = combine_verdicts(model_verdicts, "weighted", {"a": 2.0})
+    assert combined[1]["verdict"] == 1
+    assert combined[1]["confidence"] == pytest.approx(1.8 / 2.8)
+
+
+def test_rows_without_votes_stay_unrated():
+    assert combine_verdicts({"a": {1: None}, "b": {}}) == {1: None}
+    with pytest.raises(ValueError):
+        combine_verdicts({}, "unanimous")
+
+
+def test_agreement_summary():
+    combined = combine_verdicts({"a": {1: vote(1, 0.9), 2: vote(0, 0.9)}, "b": {1: vote(1, 0.9), 2: vote(1, 0.1)}})
+    summary = agreement_summary(combined, ["a", "b"])
+    assert summary["unanimous"] == 0.5
+    assert summary["mean_agreement"] == 0.75
+    assert summary["per_model"] == {"a": 1.0, "b": 0.5}
+
+
+def test_ensemble_loads_groups_in_turn(make_pipeline, mock_ollama):
+    pipeline = make_pipeline(models=["llama3", "mistral"], cascade=False)
+    rows, batches = pipeline.prepare([(1, "[1] Title: Sensor"), (2, "[2] Title: Batterie")])
+    _, report, verdicts = pipeline.analyze(rows, batches)
+    assert "=== llama3 ===" in report and "=== mistral ===" in report
+    assert all(set(verdict["votes"]) == {"llama3", "mistral"} for verdict in verdicts.values())
+    assert pipeline.last_agreement["per_model"].keys() == {"llama3", "mistral"}
+    # Die erste Gruppe wurde vor der zweiten entladen
+    assert mock_ollama.loaded_models == {"mistral:latest"}
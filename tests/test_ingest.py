@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from ingest import iter_chunks, project_header, prompt_fields
+from pipeline import load_rows
+
+RECORDS = pd.DataFrame({
+    "Lens ID": ["L1", "L2", "L3"],
+    "TI": ["Sauerstoffsensor", "Batterie", "Sensor"],
+    "AB": ["Sensor mit Elektrolyt", "", "Gehäuse"],
+    "Applicants": ["Firma A", "Firma B", "Firma C"],
+    "Simple Family Members": ["L3", "", ""],
+})
+
+
+@pytest.fixture(params=[".csv", ".xlsx"])
+def workbook(request, tmp_path):
+    path = str(tmp_path / f"patente{request.param}")
+    if request.param == ".csv":
+        RECORDS.to_csv(path, index=False)
+    else:
+        RECORDS.to_excel(path, index=False)
+    return path
+
+
+def test_project_header_maps_aliases_and_keeps_keys():
+    projection = project_header(["PN", "TI", "Applicants", "AB", "CPC"])
+    assert projection == {"Title": 1, "Abstract": 3, "CPC Classifications": 4, "Lens ID": 0}
+
+
+def test_project_header_without_prompt_columns_keeps_everything():
+    assert project_header(["Name", None, " Wert "]) == {"Name": 0, "Wert": 2}
+
+
+def test_iter_chunks_projects_columns_in_blocks(workbook):
+    chunks = list(iter_chunks(workbook, chunk_rows=2))
+    assert [len(chunk) for chunk in chunks] == [2, 1]
+    assert set(chunks[0][0]) == {"Title", "Abstract", "Lens ID", "Simple Family Members"}
+    assert chunks[1][0]["Title"] == "Sensor"
+
+
+def test_iter_chunks_rejects_unknown_formats(tmp_path):
+    with pytest.raises(ValueError):
+        iter_chunks(str(tmp_path / "patente.ods"))
+
+
+def test_prompt_fields_drop_key_columns():
+    record = {"Title": "Sensor", "Lens ID": "L1", "Simple Family Members": ""}
+    assert prompt_fields(record) == {"Title": "Sensor"}
+
+
+def test_load_rows_serializes_and_finds_families_across_chunks(workbook):
+    rows, duplicates = load_rows(workbook, chunk_rows=1)
+    assert rows[0] == (1, "[1] Title: Sauerstoffsensor | Abstract: Sensor mit Elektrolyt")
+    assert rows[1] == (2, "[2] Title: Batterie")
+    assert duplicates == {3: 1}
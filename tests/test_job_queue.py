@@ -0,0 +1,103 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from job_queue import PRIORITY_HIGH, PRIORITY_LOW, Job, JobQueue
+from llm_engine import RequestEngine
+from mock_ollama import MockOllamaServer
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "Zeitüberschreitung"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def gated_queue():
+    """Warteschlange, deren erster Job bis zur Freigabe blockiert"""
+    gate = threading.Event()
+    order = []
+
+    def run_job(job):
+        if job.file_path == "blocker":
+            gate.wait(5)
+        order.append(job.file_path)
+        if job.file_path == "kaputt":
+            raise ValueError("nicht lesbar")
+        while job.file_path == "endlos":
+            job.check_cancelled()
+            time.sleep(0.01)
+
+    queue = JobQueue(run_job)
+    blocker = queue.submit("blocker")
+    wait_until(lambda: blocker.state == "running")
+    yield queue, gate, order
+    gate.set()
+    queue.shutdown()
+
+
+def test_jobs_run_by_priority_then_submission(gated_queue):
+    queue, gate, order = gated_queue
+    low = queue.submit("niedrig", PRIORITY_LOW)
+    queue.submit("normal 1")
+    queue.submit("normal 2")
+    assert queue.set_priority(low.id, PRIORITY_HIGH)
+    gate.set()
+    wait_until(lambda: not queue.active())
+    assert order == ["blocker", "niedrig", "normal 1", "normal 2"]
+
+
+def test_cancelled_queued_job_never_runs(gated_queue):
+    queue, gate, order = gated_queue
+    job = queue.submit("abgebrochen")
+    assert queue.cancel(job.id)
+    assert job.state == "cancelled" and job.cancelled
+    assert not queue.cancel(job.id)
+    assert not queue.set_priority(job.id, PRIORITY_HIGH)
+    gate.set()
+    wait_until(lambda: not queue.active())
+    assert "abgebrochen" not in order
+
+
+def test_running_job_is_cancelled_and_failures_are_kept(gated_queue):
+    queue, gate, _ = gated_queue
+    gate.set()
+    running = queue.submit("endlos")
+    failing = queue.submit("kaputt")
+    wait_until(lambda: running.state == "running")
+    queue.cancel(running.id)
+    wait_until(lambda: not queue.active())
+    assert running.state == "cancelled"
+    assert failing.state == "failed" and failing.error == "nicht lesbar"
+    queue.shutdown()
+    with pytest.raises(RuntimeError):
+        queue.submit("zu spät")
+
+
+def test_progress_fraction():
+    job = Job(1, "patente.xlsx")
+    assert job.progress() == 0.0
+    job.completed, job.total = 3, 4
+    assert job.progress() == 0.75
+    job.state = "done"
+    assert job.progress() == 1.0
+
+
+def test_cancel_event_aborts_running_requests():
+    # Jede Anfrage dauert 5 s; der Abbruch muss die offenen Verbindungen sofort schließen
+    with MockOllamaServer(latency=5.0, prompt_rate=1e9, eval_rate=1e9, time_scale=1.0, parallel=4) as server:
+        engine = RequestEngine(host=server.url)
+        cancel_event = threading.Event()
+
+        async def requests():
+            return await asyncio.gather(*(engine.generate(model="llama3", prompt=str(i)) for i in range(3)))
+
+        threading.Timer(0.3, cancel_event.set).start()
+        started = time.perf_counter()
+        with pytest.raises(asyncio.CancelledError):
+            engine.run(requests(), cancel_event)
+        assert time.perf_counter() - started < 2.0
@@ -0,0 +1,66 @@
+import os
+import time
+
+from llm_cache import ResponseCache, cache_key
+from llm_engine import RequestEngine
+
+REQUEST = {"model": "llama3", "prompt": "Sensor", "options": {"num_ctx": 2048}}
+
+
+def test_cache_key_ignores_stream_and_keep_alive():
+    assert cache_key(REQUEST) == cache_key(dict(REQUEST, stream=True, keep_alive="10m"))
+    assert cache_key(REQUEST) != cache_key(dict(REQUEST, prompt="Anderer Prompt"))
+    assert cache_key(REQUEST) != cache_key(dict(REQUEST, options={"num_ctx": 4096}))
+
+
+def test_put_and_get_count_hits_and_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    assert cache.get(REQUEST) is None
+    cache.put(REQUEST, {"response": "ok"})
+    assert cache.get(REQUEST) == {"response": "ok"}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    cache.close()
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_age=60)
+    cache.put(REQUEST, {"response": "ok"})
+    cache._conn.execute("UPDATE responses SET created_at = ?", (time.time() - 120,))
+    assert cache.get(REQUEST) is None
+    cache.close()
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"), max_bytes=100)
+    first = dict(REQUEST, prompt="eins")
+    second = dict(REQUEST, prompt="zwei")
+    cache.put(first, {"response": "a" * 30})
+    cache.put(second, {"response": "b" * 30})
+    # Der zweite Eintrag ist damit am längsten unbenutzt
+    cache._conn.execute("UPDATE responses SET last_access = 0 WHERE key = ?", (cache_key(second),))
+    cache.put(dict(REQUEST, prompt="drei"), {"response": "c" * 30})
+    assert cache.get(second) is None
+    assert cache.get(first) is not None
+    assert cache.stats()["bytes"] <= 100
+    cache.close()
+
+
+def test_disabled_cache_creates_no_file(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    cache = ResponseCache(str(path), enabled=False)
+    cache.put(REQUEST, {"response": "ok"})
+    assert cache.get(REQUEST) is None
+    assert cache.stats()["entries"] == 0
+    assert not os.path.exists(path)
+
+
+def test_engine_serves_repeated_requests_from_cache(tmp_path, mock_ollama):
+    cache = ResponseCache(str(tmp_path / "cache.sqlite"))
+    engine = RequestEngine(host=mock_ollama.url, cache=cache)
+    first = engine.run(engine.generate(model="llama3", prompt="Sensor", stream=False))
+    second = engine.run(engine.generate(model="llama3", prompt="Sensor", stream=False))
+    assert first["response"] == second["response"]
+    assert mock_ollama.requests == 1
+    assert cache.stats()["hits"] == 1
+    cache.close()
@@ -0,0 +1,41 @@
+import asyncio
+import time
+
+import pytest
+
+from llm_engine import RequestEngine
+from mock_ollama import MockOllamaServer
+
+
+def timed_run(engine, count):
+    """Startet count gleichzeitige Anfragen und misst die Gesamtdauer"""
+    async def requests():
+        return await asyncio.gather(*(
+            engine.generate(model="llama3", prompt=f"prompt {i}", stream=False) for i in range(count)
+        ))
+
+    started = time.perf_counter()
+    responses = engine.run(requests())
+    return responses, time.perf_counter() - started
+
+
+def test_requests_run_concurrently_up_to_the_limit():
+    # Nur die feste Latenz zählt, die Token-Raten sind praktisch unbegrenzt
+    with MockOllamaServer(latency=0.2, prompt_rate=1e9, eval_rate=1e9, time_scale=1.0, parallel=4) as server:
+        parallel, parallel_seconds = timed_run(RequestEngine(max_concurrency=4, host=server.url), 4)
+        serial, serial_seconds = timed_run(RequestEngine(max_concurrency=1, host=server.url), 4)
+    assert len(parallel) == len(serial) == 4
+    assert all(response["response"] for response in parallel)
+    assert parallel_seconds < 0.6
+    assert serial_seconds >= 0.8
+
+
+def test_requests_outside_run_are_rejected(mock_ollama):
+    engine = RequestEngine(host=mock_ollama.url)
+    with pytest.raises(RuntimeError):
+        asyncio.run(engine.generate(model="llama3", prompt="x"))
+
+
+def test_max_concurrency_must_be_positive():
+    with pytest.raises(ValueError):
+        RequestEngine(max_concurrency=0)
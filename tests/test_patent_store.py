@@ -0,0 +1,83 @@
+import json
+import os
+
+import pytest
+
+from patent_store import MISSING, PatentStore, StringTable, _parse_int, import_csv, split_values, write_strings
+
+CSV = (
+    "Lens ID,Title,Jurisdiction,Publication Year,CPC Classifications,Applicants\n"
+    "L1,Sauerstoffsensor,EP,2019,G01N27/404;;G01N27/49;;G01N27/404,Firma A;;Firma B\n"
+    "L2,Batterie äöü,,inf,,Firma B\n"
+    "L3,,US,2021.0,H01M50/40,\n"
+)
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = tmp_path / "patente.csv"
+    path.write_text(CSV, encoding="utf-8")
+    # Kleine Blöcke, damit der Import über mehrere Blöcke fortgeschrieben wird
+    return import_csv(str(path), str(tmp_path / "store"), chunk_rows=2)
+
+
+def test_split_values_deduplicates_in_order():
+    assert split_values("b;; a ;;b;;") == ["b", "a"]
+    assert split_values("") == []
+
+
+@pytest.mark.parametrize("value, expected", [("2019", 2019), ("2021.0", 2021), ("", MISSING),
+                                             ("k.A.", MISSING), ("inf", MISSING), ("1e400", MISSING)])
+def test_parse_int(value, expected):
+    assert _parse_int(value) == expected
+
+
+def test_string_table_round_trip(tmp_path):
+    path = str(tmp_path / "werte")
+    write_strings(path, ["", "äöü", "Sensor"])
+    table = StringTable(path)
+    assert len(table) == 3
+    assert list(table) == ["", "äöü", "Sensor"]
+    write_strings(path, [])
+    assert list(StringTable(path)) == []
+
+
+def test_rows_survive_import_across_chunks(store):
+    assert len(store) == 3
+    assert store.row(0) == {
+        "Lens ID": "L1", "Title": "Sauerstoffsensor", "Jurisdiction": "EP", "Publication Year": 2019,
+        "CPC Classifications": ["G01N27/404", "G01N27/49"], "Applicants": ["Firma A", "Firma B"],
+    }
+    assert store.row(1)["Title"] == "Batterie äöü"
+    assert store.row(1)["Jurisdiction"] is None
+    assert store.row(1)["Publication Year"] is None
+    assert store.row(2)["Applicants"] == []
+
+
+def test_multi_valued_fields_share_interned_ids(store):
+    assert list(store.ids("Applicants", 1)) == [list(store.ids("Applicants", 0))[1]]
+    ids, offsets = store.multi_arrays("CPC Classifications")
+    assert list(offsets) == [0, 2, 2, 3]
+    assert len(ids) == 3
+
+
+def test_vocabularies_live_outside_the_schema(store, tmp_path):
+    with open(tmp_path / "store" / "schema.json", encoding="utf-8") as f:
+        schema = json.load(f)
+    assert "Firma A" not in json.dumps(schema)
+    assert os.path.exists(tmp_path / "store" / f"{schema['vocabularies']['party']}.bin")
+    reopened = PatentStore.load(str(tmp_path / "store"))
+    assert list(reopened.vocabulary("Applicants")) == ["Firma A", "Firma B"]
+
+
+def test_column_type_errors(store):
+    with pytest.raises(KeyError):
+        store.text("Fehlt", 0)
+    with pytest.raises(TypeError):
+        store.text("Applicants", 0)
+
+
+def test_to_dataframe_projects_columns(store):
+    df = store.to_dataframe(["Lens ID", "CPC Classifications", "Fehlt"], rows=[0, 2])
+    assert df.columns.tolist() == ["Lens ID", "CPC Classifications"]
+    assert df["CPC Classifications"].tolist() == ["G01N27/404;;G01N27/49", "H01M50/40"]
@@ -0,0 +1,138 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import pdf_ingest
+from pdf_ingest import PdfTextCache, collect_pdfs, count_pages, iter_pdf_records, patent_record
+from pipeline import iter_pdf_rows
+
+FRONT_PAGE = """(11) EP 1234567 A1
+(51) Int Cl.: G01N 27/404 (2006.01)
+(54) Electrochemical oxygen sensor
+(57) A sensor with an electrolyte
+between two electrodes.
+"""
+BODY = """Description
+The invention relates to gas sensors.
+Claims
+1. A gas sensor comprising an electrolyte.
+"""
+
+
+def write_pdf(directory, name, *pages):
+    """Schreibt eine Pseudo-PDF; die Seiten sind durch Seitenvorschub getrennt"""
+    path = directory / name
+    path.write_text("\f".join(pages), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def fake_reader(monkeypatch):
+    """Ersetzt PyPDF2 durch Textdateien und läuft im Thread- statt Prozesspool"""
+    def pages_of(path):
+        with open(path, encoding="utf-8") as f:
+            return f.read().split("\f")
+
+    monkeypatch.setattr(pdf_ingest, "count_pages", lambda path: len(pages_of(path)))
+    monkeypatch.setattr(pdf_ingest, "extract_pages", lambda path, start, stop: pages_of(path)[start:stop])
+    with ThreadPoolExecutor(4) as executor:
+        yield executor
+
+
+def test_patent_record_reads_inid_fields_and_sections():
+    record = patent_record([FRONT_PAGE, BODY], "/tmp/ep.pdf")
+    assert record["Lens ID"] == "EP 1234567 A1"
+    assert record["Title"] == "Electrochemical oxygen sensor"
+    assert record["Abstract"] == "A sensor with an electrolyte between two electrodes."
+    assert record["Claims"] == "1. A gas sensor comprising an electrolyte."
+    assert "G01N27/404" in record["IPCR Classifications"]
+
+
+def test_patent_record_falls_back_to_headings_and_file_name():
+    page = "Gas sensor\nAbstract\nA short abstract.\nClaims:\n1. A sensor.\n"
+    record = patent_record([page], "/tmp/US123.pdf")
+    assert record["Title"] == "Gas sensor"
+    assert record["Abstract"] == "A short abstract."
+    assert record["Claims"] == "1. A sensor."
+    assert record["Lens ID"] == "US123"
+    assert patent_record([], "/tmp/leer.pdf")["Title"] == "leer"
+
+
+def test_collect_pdfs_from_files_and_directories(tmp_path):
+    b = write_pdf(tmp_path, "b.PDF", "")
+    a = write_pdf(tmp_path, "a.pdf", "")
+    write_pdf(tmp_path, "notiz.txt", "")
+    assert collect_pdfs([str(tmp_path), a, str(tmp_path / "fehlt.pdf")]) == [a, b]
+
+
+def test_count_pages_of_a_real_pdf(tmp_path):
+    from PyPDF2 import PdfWriter
+
+    writer = PdfWriter()
+    for _ in range(3):
+        writer.add_blank_page(width=100, height=100)
+    path = tmp_path / "leer.pdf"
+    with open(path, "wb") as f:
+        writer.write(f)
+    assert count_pages(str(path)) == 3
+
+
+def test_text_cache_round_trip(tmp_path):
+    cache = PdfTextCache(str(tmp_path / "pdf.sqlite"))
+    assert cache.get("abc") is None
+    cache.put("abc", ["Seite 1", "Seite 2"])
+    assert cache.get("abc") == ["Seite 1", "Seite 2"]
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+    cache.close()
+    disabled = PdfTextCache(str(tmp_path / "aus.sqlite"), enabled=False)
+    disabled.put("abc", ["x"])
+    assert disabled.get("abc") is None and disabled.stats()["entries"] == 0
+
+
+def test_records_join_page_ranges_and_use_the_cache(tmp_path, fake_reader, monkeypatch):
+    path = write_pdf(tmp_path, "ep.pdf", FRONT_PAGE, "Seite 2", BODY)
+    cache = PdfTextCache(str(tmp_path / "pdf.sqlite"))
+    [(found, record, error)] = list(iter_pdf_records([path], fake_reader, cache, pages_per_task=2))
+    assert found == path and error is None
+    assert record["Claims"] == "1. A gas sensor comprising an electrolyte."
+    # Der zweite Lauf liest nur noch den Cache
+    monkeypatch.setattr(pdf_ingest, "count_pages", lambda path: 1 / 0)
+    [(_, cached, error)] = list(iter_pdf_records([path], fake_reader, cache))
+    assert error is None and cached == record
+    assert cache.stats()["hits"] == 1
+    cache.close()
+
+
+def test_unreadable_files_are_reported_once(tmp_path, fake_reader, monkeypatch):
+    good = write_pdf(tmp_path, "a.pdf", FRONT_PAGE)
+    bad = write_pdf(tmp_path, "b.pdf", "1", "2", "3")
+
+    def extract(path, start, stop):
+        if path == bad:
+            raise ValueError("kaputt")
+        return [FRONT_PAGE]
+
+    monkeypatch.setattr(pdf_ingest, "extract_pages", extract)
+    results = list(iter_pdf_records([good, bad], fake_reader, pages_per_task=1))
+    assert sorted((path, record is None) for path, record, _ in results) == [(good, False), (bad, True)]
+    assert isinstance(next(error for path, _, error in results if path == bad), ValueError)
+
+
+def test_scheduler_errors_are_raised(tmp_path, fake_reader):
+    path = write_pdf(tmp_path, "a.pdf", FRONT_PAGE)
+    fake_reader.shutdown()
+    with pytest.raises(RuntimeError):
+        list(iter_pdf_records([path], fake_reader))
+
+
+def test_rows_continue_across_chunks_and_find_duplicates(tmp_path, fake_reader):
+    paths = [write_pdf(tmp_path, f"{number}.pdf", FRONT_PAGE) for number in range(3)]
+    errors = []
+    chunks = list(iter_pdf_rows(paths + [str(tmp_path / "fehlt.pdf")], fake_reader, chunk_files=2,
+                                on_error=lambda path, error: errors.append(path)))
+    assert [[row_id for row_id, _ in rows] for rows, _, _ in chunks] == [[1, 2], [3]]
+    assert sorted(path for _, _, sources in chunks for path in sources.values()) == paths
+    # Gleiche Veröffentlichungsnummer: alle fallen auf die erste Zeile zurück
+    assert chunks[0][1] == {2: 1}
+    assert chunks[1][1] == {3: 1}
+    assert errors == [str(tmp_path / "fehlt.pdf")]
@@ -0,0 +1,65 @@
+import pytest
+
+ROWS = [(1, "[1] Title: Sauerstoffsensor"), (2, "[2] Title: Batterie")]
+
+
+@pytest.fixture
+def requests(mock_ollama, monkeypatch):
+    """Zeichnet alle generate-Anfragen des Mock-Servers auf"""
+    recorded = []
+    generate = mock_ollama.generate
+
+    def recording(request):
+        recorded.append(request)
+        return generate(request)
+
+    monkeypatch.setattr(mock_ollama, "generate", recording)
+    return recorded
+
+
+def verdict_requests(requests):
+    return [request for request in requests if request.get("format")]
+
+
+def test_prefix_is_evaluated_once_and_continued(make_pipeline, requests):
+    pipeline = make_pipeline(cascade=False, context_tokens=2048)
+    prefix = pipeline.patent_prompt().split("{content}")[0]
+    for _ in range(2):
+        rows, batches = pipeline.prepare(ROWS)
+        pipeline.analyze(rows, batches)
+    prefix_requests = [request for request in requests if request["prompt"].startswith(prefix)
+                       and not request.get("format")]
+    assert len(prefix_requests) == 1
+    assert prefix_requests[0]["options"]["num_predict"] > 0
+    batches = verdict_requests(requests)
+    assert len(batches) == 2
+    for request in batches:
+        assert request["context"]
+        assert not request["prompt"].startswith(prefix)
+        assert request["prompt"].startswith("[1] Title: Sauerstoffsensor")
+
+
+def test_full_prompt_without_reuse(make_pipeline, requests):
+    pipeline = make_pipeline(cascade=False, reuse_prefix=False)
+    rows, batches = pipeline.prepare(ROWS)
+    pipeline.analyze(rows, batches)
+    (request,) = verdict_requests(requests)
+    assert "context" not in request
+    assert request["prompt"].startswith(pipeline.patent_prompt().split("{content}")[0])
+
+
+def test_full_prompt_when_server_returns_no_context(make_pipeline, mock_ollama, requests, monkeypatch):
+    generate = mock_ollama.generate
+
+    def without_context(request):
+        text, metrics, wait, eval_seconds = generate(request)
+        return text, {key: value for key, value in metrics.items() if key != "context"}, wait, eval_seconds
+
+    monkeypatch.setattr(mock_ollama, "generate", without_context)
+    pipeline = make_pipeline(cascade=False)
+    rows, batches = pipeline.prepare(ROWS)
+    _, _, verdicts = pipeline.analyze(rows, batches)
+    assert all(verdict is not None for verdict in verdicts.values())
+    (request,) = verdict_requests(requests)
+    assert "context" not in request
+    assert request["prompt"].startswith(pipeline.patent_prompt().split("{content}")[0])
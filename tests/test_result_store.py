@@ -0,0 +1,65 @@
+import os
+import time
+
+from result_store import ResultStore, analysis_version, normalize_row, row_fingerprint
+
+ROWS = [(1, "[1] Title: Sauerstoffsensor"), (2, "[2] Title: Batterie")]
+
+
+def test_fingerprint_ignores_row_id_and_whitespace():
+    version = analysis_version("prompt", ["llama3"])
+    assert normalize_row("[12]  Title:  Sensor \n") == "Title: Sensor"
+    assert row_fingerprint("[1] Title: Sensor", version) == row_fingerprint("[7] Title:   Sensor", version)
+    assert row_fingerprint("[1] Title: Sensor", version) != row_fingerprint("[1] Title: Sensoren", version)
+    assert row_fingerprint("[1] Title: Sensor", version) != row_fingerprint(
+        "[1] Title: Sensor", analysis_version("prompt", ["mistral"])
+    )
+
+
+def test_store_round_trip_skips_missing_verdicts(tmp_path):
+    store = ResultStore(str(tmp_path / "verdicts.sqlite"))
+    store.put_many([("a", {"verdict": 1, "confidence": 0.9}), ("b", None)], "v1")
+    assert store.get_many(["a", "b", "a"]) == {"a": {"verdict": 1, "confidence": 0.9}}
+    assert store.stats() == {"entries": 1, "versions": 1}
+    store.close()
+
+
+def test_unused_verdicts_expire(tmp_path):
+    path = str(tmp_path / "verdicts.sqlite")
+    store = ResultStore(path, max_age=60)
+    store.put_many([("alt", {"verdict": 0, "confidence": 0.5})], "v1")
+    store._conn.execute("UPDATE results SET last_access = ?", (time.time() - 120,))
+    store._conn.commit()
+    store.put_many([("neu", {"verdict": 1, "confidence": 0.5})], "v1")
+    assert set(store.get_many(["alt", "neu"])) == {"neu"}
+    store._conn.execute("UPDATE results SET last_access = ?", (time.time() - 120,))
+    store._conn.commit()
+    store.close()
+    # Beim Öffnen wird ebenfalls aufgeräumt, ohne max_age bleibt alles erhalten
+    assert ResultStore(path, max_age=None).stats()["entries"] == 1
+    assert ResultStore(path, max_age=60).stats()["entries"] == 0
+
+
+def test_disabled_store_creates_no_file(tmp_path):
+    path = tmp_path / "verdicts.sqlite"
+    store = ResultStore(str(path), enabled=False)
+    store.put_many([("a", {"verdict": 1, "confidence": 0.9})], "v1")
+    store.prune()
+    assert store.get_many(["a"]) == {}
+    assert not os.path.exists(path)
+
+
+def test_unchanged_rows_are_not_analyzed_again(make_pipeline, mock_ollama):
+    first = make_pipeline(incremental=True, cascade=False)
+    rows, batches = first.prepare(ROWS)
+    _, _, verdicts = first.analyze(rows, batches)
+    first.results.close()
+
+    second = make_pipeline(incremental=True, cascade=False)
+    changed = [(1, "[1]  Title: Sauerstoffsensor"), (2, "[2] Title: Lithium-Batterie")]
+    rows, batches = second.prepare(changed)
+    assert [[row_id for row_id, _ in batch] for batch in batches] == [[2]]
+    _, _, again = second.analyze(rows, batches)
+    assert again[1] == {**verdicts[1], "from_store": True}
+    assert not again[2].get("from_store")
+    assert second.last_stored == 1
@@ -0,0 +1,75 @@
+import pytest
+
+from result_views import VerdictTable, row_title, verdict_records
+
+VERDICTS = {
+    1: {"verdict": 1, "confidence": 0.9, "stage": "model"},
+    2: {"verdict": 0, "confidence": 0.6, "from_store": True},
+    3: None,
+    4: {"verdict": 1, "confidence": 0.8, "duplicate_of": 1},
+    5: {"verdict": 0, "confidence": 0.95, "stage": "screening"},
+}
+TITLES = {1: "Sauerstoffsensor", 2: "Batterie", 3: "Sensorgehäuse", 4: "Sensor", 5: "Ventil"}
+
+
+@pytest.fixture
+def table():
+    return VerdictTable(verdict_records(VERDICTS, TITLES), page_rows=2)
+
+
+def test_row_title():
+    assert row_title("[3] Title: Sensor | Abstract: Text") == "Sensor"
+    assert row_title("[3] Abstract: Text | Title: Ventil") == "Ventil"
+    assert row_title("[3] Abstract: Subtitle: x") == ""
+
+
+def test_verdict_records_name_the_source():
+    sources = {record["row_id"]: record["source"] for record in verdict_records(VERDICTS)}
+    assert sources == {1: "Modell", 2: "frühere Analyse", 3: "", 4: "Duplikat von 1", 5: "Vorauswahl"}
+
+
+def test_pages_hold_at_most_page_rows(table):
+    assert table.page_count == 3
+    assert [record["row_id"] for record in table.page()] == [1, 2]
+    assert [record["row_id"] for record in table.page(5)] == [5]
+    assert table.page_number == 2
+    assert table.page(-1)[0]["row_id"] == 1
+
+
+def test_sort_toggles_direction_and_keeps_missing_last(table):
+    table.sort("confidence")
+    assert [record["row_id"] for record in table.view] == [2, 4, 1, 5, 3]
+    table.sort("confidence")
+    assert [record["row_id"] for record in table.view] == [5, 1, 4, 2, 3]
+    with pytest.raises(ValueError):
+        table.sort("unbekannt")
+
+
+def test_filter_by_verdict_and_title(table):
+    table.filter("Konflikt", " SENSOR ")
+    assert [record["row_id"] for record in table.view] == [1, 4]
+    table.filter("ohne Bewertung")
+    assert [record["row_id"] for record in table.view] == [3]
+    table.filter()
+    assert len(table.view) == 5
+    with pytest.raises(ValueError):
+        table.filter("vielleicht")
+
+
+def test_conflict_chart_updates_in_place():
+    tk = pytest.importorskip("tkinter")
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("Keine Anzeige verfügbar")
+    try:
+        from result_views import ConflictChart
+
+        chart = ConflictChart(root)
+        wedges = list(chart.wedges)
+        chart.update([1, 0, 0, 0])
+        assert chart.wedges == wedges
+        assert chart.summary.get_text() == "1 von 4 mit Konflikt"
+        assert chart.wedges[1].theta2 - chart.wedges[1].theta1 == pytest.approx(90.0)
+    finally:
+        root.destroy()
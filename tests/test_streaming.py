@@ -0,0 +1,36 @@
+from llm_engine import RequestEngine
+
+ROWS = [(1, "[1] Title: Sauerstoffsensor mit Elektrolyt"), (2, "[2] Title: Batterie mit Separator")]
+
+
+def test_streamed_fragments_add_up_to_the_response(mock_ollama):
+    engine = RequestEngine(host=mock_ollama.url)
+    fragments = []
+    response = engine.run(engine.generate(on_token=fragments.append, model="llama3", prompt="Sensor"))
+    assert len(fragments) > 1
+    assert "".join(fragments) == response["response"]
+    # Die Metriken stammen aus dem letzten Chunk
+    assert response["eval_count"] > 0
+
+
+def test_pipeline_streams_keywords_and_each_batch(make_pipeline):
+    pipeline = make_pipeline()
+    rows, batches = pipeline.prepare(ROWS)
+    sections = {}
+
+    def stream_callback(section):
+        return lambda text: sections.setdefault(section, []).append(text)
+
+    keywords, _, verdicts = pipeline.analyze(rows, batches, stream_callback)
+    assert "".join(sections["keywords"]) == keywords
+    # Batches werden ab 1 gezählt
+    assert set(sections) == {"keywords"} | set(range(1, len(batches) + 1))
+    streamed = "".join(sections[1])
+    assert pipeline.extract_partial_binary_list(streamed) == [verdicts[1]["verdict"], verdicts[2]["verdict"]]
+
+
+def test_partial_verdicts_from_unfinished_json(make_pipeline):
+    pipeline = make_pipeline()
+    partial = '{"verdicts": [{"row_id": 1, "verdict": 1, "confidence": 0.9}, {"row_id": 2, "verdict": 0, "conf'
+    assert pipeline.extract_partial_binary_list(partial) == [1, 0]
+    assert pipeline.extract_partial_binary_list('{"verdicts": [{"row_id": 1, "verd') == []
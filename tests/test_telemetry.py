@@ -0,0 +1,64 @@
+import csv
+
+from telemetry import CSV_COLUMNS, Telemetry
+
+REQUEST = {"model": "llama3", "prompt": "x", "options": {"num_ctx": 2048}}
+
+
+def response(prompt_tokens=100, eval_tokens=50):
+    return {
+        "total_duration": 2e9, "load_duration": 0.5e9,
+        "prompt_eval_duration": 0.5e9, "eval_duration": 1e9,
+        "prompt_eval_count": prompt_tokens, "eval_count": eval_tokens,
+    }
+
+
+def test_summary_aggregates_calls_and_endpoints():
+    telemetry = Telemetry()
+    telemetry.record_call("patents", REQUEST, response(), 0.1, 2.0, endpoint="a")
+    telemetry.record_call("patents", REQUEST, response(), 0.3, 2.0, endpoint="b")
+    telemetry.record_call("patents", REQUEST, response(), 0.0, 0.0, cached=True)
+    summary = telemetry.summary()
+    assert (summary["calls"], summary["cached"]) == (2, 1)
+    assert summary["prompt_tokens"] == 200 and summary["eval_tokens"] == 100
+    assert summary["prompt_tokens_per_second"] == 200.0
+    assert summary["eval_tokens_per_second"] == 50.0
+    assert summary["load_seconds"] == 1.0
+    assert summary["prompt_eval_share"] == 0.25
+    assert abs(summary["queue_seconds"] - 0.4) < 1e-9
+    assert summary["endpoints"]["a"] == {"calls": 1, "eval_tokens": 50, "wall_seconds": 2.0, "tokens_per_second": 25.0}
+
+
+def test_truncation_counts_continued_context():
+    telemetry = Telemetry()
+    record = telemetry.record_call("patents", dict(REQUEST, context=list(range(1000))), response(1048), 0, 1)
+    assert record["truncated"]
+    assert not telemetry.record_call("patents", REQUEST, response(1048), 0, 1)["truncated"]
+    assert telemetry.summary()["truncations"] == 1
+
+
+def test_recent_calls_are_bounded_but_totals_are_not(tmp_path):
+    telemetry = Telemetry(recent_calls=3)
+    for _ in range(10):
+        telemetry.record_call("patents", REQUEST, response(), 0, 1, endpoint="a")
+    assert len(telemetry.recent) == 3
+    assert telemetry.summary()["calls"] == 10
+    path = tmp_path / "calls.csv"
+    telemetry.export_csv(str(path))
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        assert tuple(reader.fieldnames) == CSV_COLUMNS
+        assert len(list(reader)) == 3
+
+
+def test_prometheus_export_uses_totals():
+    telemetry = Telemetry(recent_calls=1)
+    for _ in range(4):
+        telemetry.record_call("keywords", REQUEST, response(), 0, 1, endpoint="a")
+    telemetry.observe("parse", 0.25)
+    telemetry.observe("parse", 0.25)
+    text = telemetry.to_prometheus()
+    assert 'ollama_calls_total{label="keywords",model="llama3",endpoint="a",cached="false"} 4' in text
+    assert 'ollama_prompt_tokens_total{label="keywords",model="llama3",endpoint="a",cached="false"} 400' in text
+    assert 'pipeline_stage_seconds_sum{stage="parse"} 0.5' in text
+    assert 'pipeline_stage_seconds_count{stage="parse"} 2' in text
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import vector_index
+from vector_index import VectorIndex, candidate_context, normalize, quantize
+
+# Lens-Export mit einem Patent ohne Text, das nicht indexiert wird
+DF = pd.DataFrame({
+    "Lens ID": ["L0", "L1", "L2", "L3", "L4"],
+    "Display Key": ["D0", "D1", "D2", "D3", "D4"],
+    "Title": ["Sensor", "Batterie", None, "Motor", "Ventil"],
+    "Abstract": ["Sauerstoff", "Separator", None, "Stator", "Dichtung"],
+})
+
+
+def embed(texts):
+    """Ordnet jedem Text eine Achse zu, nach Reihenfolge"""
+    return np.eye(8, dtype=np.float32)[:len(texts)] + 0.01
+
+
+@pytest.fixture(params=["float16", "int8"])
+def index(request, tmp_path):
+    return VectorIndex.build(DF, str(tmp_path / "index"), dtype=request.param, embed_fn=embed)
+
+
+def test_build_skips_rows_without_text(index):
+    assert len(index) == 4
+    assert [index.documents[i]["lens_id"] for i in range(len(index))] == ["L0", "L1", "L3", "L4"]
+    assert index.documents[2]["position"] == 3
+
+
+def test_search_returns_nearest_documents_in_order(index):
+    query = np.eye(8, dtype=np.float32)[[2]] * 2 + np.eye(8, dtype=np.float32)[[0]]
+    hits = index.search(query, k=2)[0]
+    assert [document["lens_id"] for document, _ in hits] == ["L3", "L0"]
+    assert hits[0][1] > hits[1][1]
+
+
+def test_chunked_search_matches_single_block(index, monkeypatch):
+    queries = np.random.default_rng(0).normal(size=(3, 8))
+    expected = [[(d["lens_id"], round(s, 4)) for d, s in hits] for hits in index.search(queries, k=3)]
+    monkeypatch.setattr(vector_index, "SEARCH_CHUNK_ROWS", 1)
+    chunked = [[(d["lens_id"], round(s, 4)) for d, s in hits] for hits in index.search(queries, k=3)]
+    assert chunked == expected
+
+
+def test_load_keeps_vectors_on_disk(index, tmp_path):
+    loaded = VectorIndex.load(str(tmp_path / "index"))
+    assert isinstance(loaded.vectors, np.memmap)
+    assert loaded.documents[0]["title"] == "Sensor"
+    assert VectorIndex.exists(str(tmp_path / "index"))
+    assert not VectorIndex.exists(str(tmp_path / "fehlt"))
+
+
+def test_int8_quantization_stays_close():
+    vectors = normalize(np.random.default_rng(1).normal(size=(4, 16)))
+    assert np.abs(quantize(vectors, "int8") / 127 - vectors).max() < 0.01
+    with pytest.raises(ValueError):
+        quantize(vectors, "float64")
+
+
+def test_candidate_context_truncates_documents():
+    document = {"display_key": "EP 1", "text": "wort " * 1000}
+    context = candidate_context([(document, 0.5)], max_tokens=10)
+    assert context.startswith("Similar existing patents:\n  (1) EP 1 [0.50]: ")
+    assert len(context) < 200
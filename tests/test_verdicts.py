@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+ROWS = [(1, "[1] Title: Sauerstoffsensor"), (2, "[2] Title: Batterie")]
+
+
+@pytest.fixture
+def pipeline(make_pipeline):
+    # Das Parsen braucht keinen Server
+    return make_pipeline(cascade=False, host="http://127.0.0.1:9")
+
+
+@pytest.fixture
+def served_pipeline(make_pipeline):
+    return make_pipeline(cascade=False)
+
+
+def verdicts_json(*entries):
+    return json.dumps({"verdicts": [dict(zip(("row_id", "verdict", "confidence"), entry)) for entry in entries]})
+
+
+def test_parse_verdicts_accepts_valid_entries(pipeline):
+    text = verdicts_json((1, 1, 0.9), (2, 0, 1))
+    assert pipeline.parse_verdicts(text, [1, 2]) == {
+        1: {"verdict": 1, "confidence": 0.9},
+        2: {"verdict": 0, "confidence": 1.0},
+    }
+
+
+@pytest.mark.parametrize("entry", [
+    (3, 1, 0.9),      # unerwartete Zeilen-ID
+    (1, 2, 0.9),      # Urteil außerhalb von 0/1
+    (1, True, 0.9),   # bool statt Zahl
+    (1, 1, 1.5),      # Konfidenz außerhalb von [0, 1]
+    (1, 1, "hoch"),   # Konfidenz keine Zahl
+])
+def test_parse_verdicts_drops_invalid_entries(pipeline, entry):
+    assert pipeline.parse_verdicts(verdicts_json(entry), [1, 2]) == {}
+
+
+def test_parse_verdicts_keeps_first_entry_per_row(pipeline):
+    text = verdicts_json((1, 1, 0.9), (1, 0, 0.2))
+    assert pipeline.parse_verdicts(text, [1]) == {1: {"verdict": 1, "confidence": 0.9}}
+
+
+@pytest.mark.parametrize("text", ["", "kein JSON", "[1, 0]", '{"verdicts": "1,0"}', '{"andere": []}'])
+def test_parse_verdicts_tolerates_malformed_answers(pipeline, text):
+    assert pipeline.parse_verdicts(text, [1, 2]) == {}
+
+
+def test_missing_rows_are_retried_alone(served_pipeline, mock_ollama, monkeypatch):
+    answer = mock_ollama.answer
+    prompts = []
+
+    def first_answer_without_row_2(request):
+        if not request.get("format"):
+            return answer(request)
+        prompts.append(request["prompt"])
+        if len(prompts) == 1:
+            return verdicts_json((1, 1, 0.9))
+        return answer(request)
+
+    monkeypatch.setattr(mock_ollama, "answer", first_answer_without_row_2)
+    rows, batches = served_pipeline.prepare(ROWS)
+    _, _, verdicts = served_pipeline.analyze(rows, batches)
+    assert len(prompts) == 2
+    assert "[2]" in prompts[1] and "[1]" not in prompts[1]
+    assert verdicts[1] == {"verdict": 1, "confidence": 0.9, "stage": "model"}
+    assert verdicts[2]["verdict"] in (0, 1)
+
+
+def test_rows_stay_unrated_after_all_retries(served_pipeline, mock_ollama, monkeypatch):
+    answer = mock_ollama.answer
+    monkeypatch.setattr(
+        mock_ollama, "answer", lambda request: "ungültig" if request.get("format") else answer(request)
+    )
+    rows, batches = served_pipeline.prepare(ROWS)
+    _, _, verdicts = served_pipeline.analyze(rows, batches)
+    assert verdicts == {1: None, 2: None}
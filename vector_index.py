@@ -0,0 +1,204 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from batching import truncate_to_tokens
+from patent_store import PatentStore, StringTable, write_strings
+
+DEFAULT_INDEX_DIR = "patent_index"
+DEFAULT_EMBED_MODEL = "nomic-embed-text"
+DEFAULT_TOP_K = 5
+# Spalten des Lens-Exports, aus denen der Embedding-Text gebildet wird
+INDEX_FIELDS = ("Title", "Abstract", "Claims")
+# Maximale Länge eines Patenttextes für das Embedding-Modell
+MAX_EMBED_TOKENS = 2048
+# Tokens pro Vergleichspatent im Prompt
+CANDIDATE_TOKENS = 150
+# Zeilen pro Matrixblock bei der Suche, begrenzt den Speicherbedarf
+SEARCH_CHUNK_ROWS = 65536
+
+_VECTORS_FILE = "vectors.npy"
+_META_FILE = "metadata.json"
+# Dokumente als documents.bin mit documents.offsets.npy
+_DOCUMENTS_FILE = "documents"
+_DTYPES = ("float16", "int8")
+
+
+def patent_text(row, fields=INDEX_FIELDS):
+    """Fügt die vorhandenen Textfelder eines Patents zusammen"""
+    parts = []
+    for field in fields:
+        value = row.get(field)
+        if value is None or value != value or str(value).strip() == "":
+            continue
+        parts.append(str(value).strip())
+    return "\n".join(parts)
+
+
+def embed_texts(texts, model=DEFAULT_EMBED_MODEL, batch_size=32):
+    """Berechnet Embeddings synchron über die Ollama-API"""
+    import ollama
+
+    vectors = []
+    for start in range(0, len(texts), batch_size):
+        chunk = [truncate_to_tokens(t, MAX_EMBED_TOKENS) for t in texts[start:start + batch_size]]
+        vectors.extend(ollama.embed(model=model, input=chunk)["embeddings"])
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def normalize(vectors):
+    """Normiert Vektoren zeilenweise auf Länge 1 (Kosinus = Skalarprodukt)"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def quantize(vectors, dtype):
+    """Speichert normierte Vektoren kompakt als float16 oder int8"""
+    if dtype == "float16":
+        return vectors.astype(np.float16)
+    if dtype == "int8":
+        # Komponenten normierter Vektoren liegen in [-1, 1]
+        return np.clip(np.rint(vectors * 127), -127, 127).astype(np.int8)
+    raise ValueError(f"Unbekannter Datentyp {dtype!r}, erlaubt: {', '.join(_DTYPES)}")
+
+
+def candidate_context(hits, max_tokens=CANDIDATE_TOKENS):
+    """Formatiert die gefundenen Vergleichspatente für den Prompt"""
+    lines = ["Similar existing patents:"]
+    for number, (document, score) in enumerate(hits, start=1):
+        text = truncate_to_tokens(document["text"].replace("\n", " "), max_tokens)
+        lines.append(f"  ({number}) {document['display_key']} [{score:.2f}]: {text}")
+    return "\n".join(lines)
+
+
+def write_documents(index_dir, documents):
+    """Speichert die Dokumente als JSON in einem UTF-8-Blob mit Offsets (wie die Vokabulare des Patent-Stores)"""
+    write_strings(os.path.join(index_dir, _DOCUMENTS_FILE),
+                  [json.dumps(document, ensure_ascii=False) for document in documents])
+
+
+class DocumentTable:
+    """Memory-gemappte Dokumente eines Index; dekodiert wird erst beim Zugriff auf einen Treffer"""
+
+    def __init__(self, index_dir):
+        self.strings = StringTable(os.path.join(index_dir, _DOCUMENTS_FILE))
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, i):
+        return json.loads(self.strings[i])
+
+
+class VectorIndex:
+    """Memory-gemappter Embedding-Index über einen Lens-Patentexport"""
+
+    def __init__(self, vectors, metadata, documents):
+        self.vectors = vectors
+        self.metadata = metadata
+        self.documents = documents
+        self.model = metadata["model"]
+        # int8-Vektoren werden bei der Suche zurückskaliert
+        self.scale = 1 / 127 if metadata["dtype"] == "int8" else 1.0
+
+    def __len__(self):
+        return len(self.documents)
+
+    @classmethod
+    def build(cls, df, index_dir=DEFAULT_INDEX_DIR, model=DEFAULT_EMBED_MODEL,
+              dtype="float16", fields=INDEX_FIELDS, embed_fn=None):
+        """Erstellt den Index aus einem DataFrame und speichert ihn auf der Platte"""
+        embed_fn = embed_fn or (lambda texts: embed_texts(texts, model=model))
+        documents = []
+        texts = []
+        for position, (_, row) in enumerate(df.iterrows()):
+            text = patent_text(row, fields)
+            if not text:
+                continue
+            texts.append(text)
+            documents.append({
+                "position": position,
+                "lens_id": str(row.get("Lens ID", "")),
+                "display_key": str(row.get("Display Key", "")),
+                "title": str(row.get("Title", "")),
+                "text": text,
+            })
+        if not texts:
+            raise ValueError("Keine Patenttexte zum Indexieren gefunden")
+
+        vectors = quantize(normalize(embed_fn(texts)), dtype)
+        os.makedirs(index_dir, exist_ok=True)
+        np.save(os.path.join(index_dir, _VECTORS_FILE), vectors)
+        write_documents(index_dir, documents)
+        metadata = {"model": model, "dtype": dtype, "fields": list(fields)}
+        with open(os.path.join(index_dir, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False)
+        return cls.load(index_dir)
+
+    @classmethod
+    def load(cls, index_dir=DEFAULT_INDEX_DIR):
+        """Lädt einen gespeicherten Index; die Vektoren bleiben auf der Platte"""
+        with open(os.path.join(index_dir, _META_FILE), encoding="utf-8") as f:
+            metadata = json.load(f)
+        vectors = np.load(os.path.join(index_dir, _VECTORS_FILE), mmap_mode="r")
+        return cls(vectors, metadata, DocumentTable(index_dir))
+
+    @classmethod
+    def exists(cls, index_dir=DEFAULT_INDEX_DIR):
+        """Prüft, ob unter index_dir ein Index liegt"""
+        return (os.path.exists(os.path.join(index_dir, _VECTORS_FILE))
+                and os.path.exists(os.path.join(index_dir, _META_FILE)))
+
+    def search(self, query_vectors, k=DEFAULT_TOP_K):
+        """Liefert pro Anfragevektor die k ähnlichsten Dokumente als (Dokument, Score)"""
+        queries = normalize(np.atleast_2d(query_vectors))
+        k = min(k, len(self))
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_ids = np.empty((len(queries), 0), dtype=np.int64)
+
+        # Blockweise Suche: nur ein Ausschnitt der Matrix liegt jeweils im RAM
+        for start in range(0, len(self), SEARCH_CHUNK_ROWS):
+            block = np.asarray(self.vectors[start:start + SEARCH_CHUNK_ROWS], dtype=np.float32)
+            scores = queries @ block.T * self.scale
+            ids = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+            best_scores = np.concatenate([best_scores, scores], axis=1)
+            best_ids = np.concatenate([best_ids, ids], axis=1)
+            if best_scores.shape[1] > k:
+                top = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_scores = np.take_along_axis(best_scores, top, axis=1)
+                best_ids = np.take_along_axis(best_ids, top, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_ids = np.take_along_axis(best_ids, order, axis=1)
+        return [
+            [(self.documents[i], float(score)) for i, score in zip(ids, scores)]
+            for ids, scores in zip(best_ids, best_scores)
+        ]
+
+
+def main():
+    """Baut den Index einmalig aus einem Lens-CSV-Export"""
+    import pandas as pd
+
+    parser = argparse.ArgumentParser(description="Embedding-Index über einen Lens-Patentexport erstellen")
+    parser.add_argument("csv", help="Lens-Export, z.B. patentdb.csv, oder ein importierter Patent-Store")
+    parser.add_argument("--index-dir", default=DEFAULT_INDEX_DIR)
+    parser.add_argument("--model", default=DEFAULT_EMBED_MODEL)
+    parser.add_argument("--dtype", choices=_DTYPES, default="float16")
+    args = parser.parse_args()
+
+    if PatentStore.exists(args.csv):
+        # Aus dem Store nur die benötigten Spalten dekodieren
+        df = PatentStore.load(args.csv).to_dataframe(["Lens ID", "Display Key", *INDEX_FIELDS])
+    else:
+        df = pd.read_csv(args.csv)
+    index = VectorIndex.build(df, args.index_dir, model=args.model, dtype=args.dtype)
+    print(f"{len(index)} Patente indexiert in '{args.index_dir}'")
+
+
+if __name__ == "__main__":
+    main()